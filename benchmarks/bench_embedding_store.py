@@ -0,0 +1,49 @@
+"""Benchmark do EmbeddingStore: embedar um acervo e, depois, o acervo com transcrições novas.
+
+Na segunda passada só as frases ainda não vistas passam pelo encoder. O encoder é o StubEncoder de
+benchmarks/mocks.py, com custo fixo por frase (`--encode-ms`) no lugar do modelo.
+
+Uso: python -m benchmarks.bench_embedding_store --sentences 20000 --new 0.1 --encode-ms 2
+"""
+import argparse, random, tempfile, time
+from benchmarks.mocks import StubEncoder
+from benchmarks.synthetic_trainee import SyntheticTrainee
+from core.embedding_store import EmbeddingStore
+from core.scenario_index import embed_texts
+
+def archive(n: int, rng: random.Random) -> list:
+    """Falas do treinando sintético com um protocolo por chamada, como frases de transcrições distintas."""
+    trainee = SyntheticTrainee(rng.randrange(1 << 30))
+    out = []
+    while len(out) < n:
+        call = rng.randrange(10 ** 8)
+        out += [f"{msg} protocolo {call}" for msg in trainee.conversation()]
+    return out[:n]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=20000)
+    parser.add_argument("--new", type=float, default=0.1, help="fração de frases novas na segunda passada")
+    parser.add_argument("--encode-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    first = archive(args.sentences, rng)
+    second = first[int(len(first) * args.new):] + archive(int(len(first) * args.new), rng)
+    with tempfile.TemporaryDirectory() as root:
+        store = EmbeddingStore("bench", root=root)
+        encoder = StubEncoder(latency=args.encode_ms / 1000)
+        print(f"{'passada':<22}{'frases':>8}{'encoder':>9}{'s':>8}")
+        for label, texts in [("acervo inicial", first), ("acervo + novas", second), ("sem armazenamento", second)]:
+            before = encoder.encoded
+            t0 = time.perf_counter()
+            embed_texts(texts, encoder=encoder, store=None if label == "sem armazenamento" else store)
+            print(f"{label:<22}{len(texts):>8}{encoder.encoded - before:>9}{time.perf_counter() - t0:>8.2f}")
+        stored = len(store)
+        t0 = time.perf_counter()
+        kept = store.compact(keep=second)
+        print(f"compactação: {kept} de {stored} linhas mantidas em {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Compara os backends de embeddings: sentence-transformers (torch) e ONNX int8 (core.onnx_encoder).
+
+Cada backend roda em um processo próprio, para medir tempo de import e RSS sem interferência; o processo
+pai compara os vetores das frases distintas (cosseno entre os dois backends e vizinho mais próximo).
+As frases misturam falas curtas do treinando sintético com frases e contextos longos de
+data/transcripts_sample.csv, repetidas até `--texts` para medir a vazão.
+
+Uso:
+    python -m core.onnx_encoder --export               # uma vez, com torch instalado
+    python -m benchmarks.bench_embeddings --texts 2000 --tolerance 0.99
+"""
+import os, sys, json, time, argparse, subprocess, tempfile
+import numpy as np
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "transcripts_sample.csv")
+
+def sentences(seed: int) -> list:
+    """Frases distintas: falas do treinando sintético, frases e contextos inteiros das transcrições de exemplo."""
+    from benchmarks.synthetic_trainee import SyntheticTrainee
+    from core.ingest import TEXT_COL
+    from core.scenarios import build_scenarios, load_transcripts
+    from core.turns import split_sentences
+    df = load_transcripts(SAMPLE_PATH)
+    short = [msg for conv in SyntheticTrainee(seed).conversations(200) for msg in conv]
+    contexts = [s["context"] for s in build_scenarios(df)]
+    return list(dict.fromkeys(short + split_sentences(df[TEXT_COL])["text"].tolist() + contexts))
+
+def worker(backend: str, n: int, seed: int, batch_size: int, out: str):
+    """Mede um backend e grava os vetores em `out`; imprime as medidas em JSON."""
+    from benchmarks.load_test import rss_mb
+    unique = sentences(seed)
+    texts = (unique * (n // len(unique) + 1))[:max(n, len(unique))]
+    rss0 = rss_mb()
+    t0 = time.perf_counter()
+    if backend == "onnx":
+        import onnxruntime, tokenizers  # noqa: F401
+    else:
+        import sentence_transformers  # noqa: F401
+    import_s = time.perf_counter() - t0
+
+    os.environ["VOICE_COACH_EMBEDDINGS"] = backend
+    import core.scenario_index as index
+    t0 = time.perf_counter()
+    encoder = index._load_encoder()
+    load_s = time.perf_counter() - t0
+
+    index.embed_texts(texts[:batch_size], batch_size, encoder)  # aquecimento
+    t0 = time.perf_counter()
+    vecs = index.embed_texts(texts, batch_size, encoder)
+    encode_s = time.perf_counter() - t0
+    np.save(out, vecs[:len(unique)])
+    print(json.dumps({"backend": backend, "import_s": import_s, "load_s": load_s,
+                      "sentences_s": len(texts) / encode_s, "rss_mb": rss_mb() - rss0}))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.99, help="cosseno mínimo entre os backends")
+    parser.add_argument("--worker", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.worker, args.texts, args.seed, args.batch_size, args.out)
+        return 0
+
+    results, vectors = [], {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("torch", "onnx"):
+            out = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run([sys.executable, "-m", "benchmarks.bench_embeddings", "--worker", backend,
+                                   "--out", out, "--texts", str(args.texts), "--seed", str(args.seed),
+                                   "--batch-size", str(args.batch_size)], capture_output=True, text=True)
+            if proc.returncode:
+                print(f"{backend}: falhou\n{proc.stderr.strip()}")
+                return 1
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+            vectors[backend] = np.load(out)
+
+    print(f"{'backend':<10}{'import s':>10}{'carga s':>10}{'frases/s':>12}{'RSS MB':>10}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['import_s']:>10.2f}{r['load_s']:>10.2f}{r['sentences_s']:>12.1f}{r['rss_mb']:>10.0f}")
+
+    ref, alt = vectors["torch"], vectors["onnx"]
+    cos = (ref * alt).sum(axis=1)
+    neighbors = np.mean(np.argsort(-(ref @ ref.T), axis=1)[:, 1] == np.argsort(-(alt @ alt.T), axis=1)[:, 1])
+    print(f"cosseno torch x onnx: mínimo {cos.min():.4f}, médio {cos.mean():.4f}; "
+          f"mesmo vizinho mais próximo: {neighbors:.1%}")
+    return 0 if cos.min() >= args.tolerance else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Benchmark do casamento aproximado (Myers) contra o exato (regex) em falas com erros de transcrição.
+
+As falas do treinando sintético recebem erros de reconhecimento simulados (troca, omissão ou duplicação
+de uma letra em palavras longas) e são pontuadas pelo ScoreEngine com e sem o casamento aproximado.
+As falas limpas com palavras a uma edição de um literal ("Vitória" e "vistoria", "entende" e "entendo")
+medem os falsos positivos: com e sem o casamento aproximado, a pontuação delas tem de ser a mesma.
+
+Uso: python -m benchmarks.bench_fuzzy --conversations 500 --error-rate 0.3
+"""
+import argparse, random, time
+from benchmarks.synthetic_trainee import SyntheticTrainee
+from core.rules import RuleEngine, load_rules
+
+# Palavras reais, escritas corretamente, a uma edição de distância de literais das regras
+NEAR_MISSES = [
+    ["A loja fica em Vitória, no Espírito Santo?", "O senhor entende o procedimento?"],
+    ["Eu comento com o meu gerente.", "O problema foi repetido na semana passada."],
+    ["Ela entenda que o vidro é original.", "A vitória foi do time da casa."],
+]
+
+def asr_noise(text: str, rate: float, rng: random.Random) -> str:
+    """Um erro de letra em cada palavra de 5+ letras com probabilidade `rate` (números ficam intactos)."""
+    words = text.split(" ")
+    for i, w in enumerate(words):
+        if len(w) < 5 or not w.isalpha() or rng.random() >= rate:
+            continue
+        j = rng.randrange(1, len(w) - 1)
+        op = rng.randrange(3)
+        c = rng.choice("aeiourslnm")
+        words[i] = w[:j] + c + w[j + 1:] if op == 0 else w[:j] + w[j + 1:] if op == 1 else w[:j] + c + w[j:]
+    return " ".join(words)
+
+def score(convs: list, rules) -> tuple:
+    """(pontuação média, latência por fala em ms: p50, p95)."""
+    totals, latencies = [], []
+    for conv in convs:
+        engine = RuleEngine(rules)
+        for msg in conv:
+            t0 = time.perf_counter()
+            engine.evaluate_message(msg)
+            latencies.append(time.perf_counter() - t0)
+        totals.append(engine.total())
+    latencies.sort()
+    pct = lambda q: 1000 * latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    return sum(totals) / len(totals), pct(0.50), pct(0.95)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=500)
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    clean = SyntheticTrainee(args.seed).conversations(args.conversations)
+    # Falas únicas: sem repetição, o cache de normalização e de janelas não mascara o custo
+    noisy = [[asr_noise(msg, args.error_rate, rng) + f" #{i}.{j}" for j, msg in enumerate(conv)]
+             for i, conv in enumerate(clean)]
+    exact, fuzzy = load_rules(fuzzy=False), load_rules(fuzzy=True)
+
+    print(f"{'':<22}{'pontos':>8}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, convs, rules in [("limpo, exato", clean, exact), ("limpo, aproximado", clean, fuzzy),
+                                ("quase-literais, exato", NEAR_MISSES, exact),
+                                ("quase-literais, aprox.", NEAR_MISSES, fuzzy),
+                                ("com erros, exato", noisy, exact), ("com erros, aproximado", noisy, fuzzy)]:
+        points, p50, p95 = score(convs, rules)
+        print(f"{label:<22}{points:>8.2f}{p50:>10.3f}{p95:>10.3f}")
+
+if __name__ == "__main__":
+    main()
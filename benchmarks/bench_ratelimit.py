@@ -0,0 +1,101 @@
+"""Benchmark do limitador de taxa (core.ratelimit) contra um provedor local que responde 429.
+
+Uma turma de `--sessions` sessões começa junta; cada turno pede a resposta do cliente ("chat", mesmo
+prompt para o mesmo cenário e estágio) e o áudio dela ("tts", falas fixas por estágio), como o
+CustomerBrain e o tts_bytes. O MockProviderServer (benchmarks/mocks.py) limita cada endpoint e devolve
+429 com Retry-After acima do limite. Sem o limitador, cada sessão repete a chamada depois do
+Retry-After; com ele, as chamadas esperam no bucket do endpoint (prioridade para o turno que espera há
+mais tempo) e pedidos idênticos em andamento viram uma requisição só.
+
+Uso: python -m benchmarks.bench_ratelimit --sessions 30 --turns 4 --chat-rps 10 --tts-rps 4
+"""
+import json, time, random, argparse, threading, urllib.request, urllib.error
+from benchmarks.mocks import MockProviderServer
+from core.ratelimit import MAX_RETRIES, RateLimiter, retry_after
+
+SCENARIOS = ("Troca de Para-brisa", "Reparo de Trinca", "Troca de Farol")
+CANNED = ("Certo, meu CPF é 123.456.789-10 e minha placa é ABC1D23.",
+          "A trinca tem uns 10 cm. Aconteceu ontem, peguei um buraco.",
+          "Estou em Belo Horizonte. Pode ser a loja do bairro Funcionários?",
+          "Obrigado. Pode me enviar o link de acompanhamento, por favor?")
+
+def post(url: str, payload: dict) -> dict:
+    req = urllib.request.Request(url, json.dumps(payload, sort_keys=True).encode(),
+                                 {"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as rsp:
+        return json.loads(rsp.read())
+
+def naive(url: str, payload: dict) -> dict:
+    """Cliente sem limitador: repete depois do Retry-After, como o SDK faz por padrão."""
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return post(url, payload)
+        except urllib.error.HTTPError as e:
+            delay = retry_after(e)
+            if delay is None or attempt == MAX_RETRIES:
+                raise
+            time.sleep(delay)
+
+def session(server: str, limiter, rng: random.Random, args, latencies: list, failures: list):
+    scenario = rng.choice(SCENARIOS)
+    time.sleep(rng.uniform(0, args.ramp))
+    for stage in range(1, args.turns + 1):
+        since = time.monotonic()
+        chat = {"model": "gpt-4o-mini", "prompt": f"{scenario} estágio {stage}"}
+        tts = {"model": "tts-1", "input": CANNED[min(stage, len(CANNED)) - 1]}
+        try:
+            if limiter is None:
+                naive(f"{server}/chat", chat)
+                naive(f"{server}/tts", tts)
+            else:
+                limiter.call("chat", tuple(sorted(chat.items())), post, f"{server}/chat", chat, since=since)
+                limiter.call("tts", tuple(sorted(tts.items())), post, f"{server}/tts", tts, since=since)
+            latencies.append(time.monotonic() - since)
+        except urllib.error.HTTPError:
+            failures.append(stage)
+        time.sleep(rng.uniform(0.5, 1.5) * args.think)
+
+def run(args, limited: bool) -> dict:
+    server = MockProviderServer({"chat": (args.chat_rps, args.chat_rps), "tts": (args.tts_rps, args.tts_rps)},
+                                latency=args.latency)
+    # Orçamento um pouco abaixo do limite do provedor, com rajada menor, para não esbarrar no 429
+    limiter = RateLimiter({"chat": {"rate": 0.9 * args.chat_rps, "burst": max(1, args.chat_rps // 2)},
+                           "tts": {"rate": 0.9 * args.tts_rps, "burst": max(1, args.tts_rps // 2)}}) if limited else None
+    latencies, failures = [], []
+    rng = random.Random(args.seed)
+    threads = [threading.Thread(target=session, args=(server.url, limiter, random.Random(rng.random()), args,
+                                                      latencies, failures)) for _ in range(args.sessions)]
+    t0 = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - t0
+    server.close()
+    ordered = sorted(latencies) or [0.0]
+    return {"requisicoes": server.counts["requisicoes"], "429": server.counts["429"],
+            "repetidas": server.duplicates(), "coalescidas": limiter.stats["coalescidas"] if limiter else 0,
+            "falhas": len(failures), "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], "max": ordered[-1], "s": elapsed}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--chat-rps", type=int, default=10, help="limite do provedor para o chat (req/s)")
+    parser.add_argument("--tts-rps", type=int, default=4, help="limite do provedor para o TTS (req/s)")
+    parser.add_argument("--latency", type=float, default=0.3, help="latência de cada resposta do provedor (s)")
+    parser.add_argument("--ramp", type=float, default=1.0, help="janela de início das sessões (s)")
+    parser.add_argument("--think", type=float, default=2.0, help="tempo médio entre turnos (s)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'modo':<16}{'requisições':>12}{'429':>6}{'repetidas':>10}{'coalescidas':>12}{'falhas':>8}"
+          f"{'p50 s':>8}{'p95 s':>8}{'máx s':>8}{'total s':>9}")
+    for label, limited in (("sem limitador", False), ("com limitador", True)):
+        r = run(args, limited)
+        print(f"{label:<16}{r['requisicoes']:>12}{r['429']:>6}{r['repetidas']:>10}{r['coalescidas']:>12}"
+              f"{r['falhas']:>8}{r['p50']:>8.2f}{r['p95']:>8.2f}{r['max']:>8.2f}{r['s']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark da segunda opinião por kNN no gabarito: erro deixando uma referência de fora e vazão em lote.
+
+Erro: cada referência é prevista pelas demais (nota: erro absoluto médio; itens: Brier), comparado com
+prever a média das demais. Vazão: consultas sintéticas (misturas de referências com ruído) previstas
+em lote, sem embedar texto.
+
+Uso: python -m benchmarks.bench_reference_knn --queries 100000
+"""
+import argparse, time
+import numpy as np
+from core.reference_scorer import KnnScorer, ReferenceSet, load_references
+
+def leave_one_out(refs: ReferenceSet, k: int, temperature: float) -> tuple:
+    """(erro absoluto médio da nota, Brier dos itens) prevendo cada referência pelas demais."""
+    errors, brier = [], []
+    for i in range(len(refs)):
+        rest = refs.take([j for j in range(len(refs)) if j != i])
+        if k:
+            expected, probs, _, _ = KnnScorer(rest, k, temperature).predict_vectors(refs.vectors[i:i + 1])
+            expected, probs = expected[0], probs[0]
+        else:
+            expected, probs = rest.scores.mean(), rest.checklist.mean(axis=0)
+        errors.append(abs(expected - refs.scores[i]))
+        brier.append(((probs - refs.checklist[i]) ** 2).mean())
+    return float(np.mean(errors)), float(np.mean(brier))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100000)
+    parser.add_argument("--temperature", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    refs = load_references()
+    print(f"{'previsor':<16}{'erro nota':>10}{'Brier itens':>13}")
+    for label, k in [("média", 0), ("kNN k=1", 1), ("kNN k=3", 3), ("kNN k=5", 5)]:
+        mae, brier = leave_one_out(refs, k, args.temperature)
+        print(f"{label:<16}{mae:>10.2f}{brier:>13.3f}")
+
+    rng = np.random.default_rng(args.seed)
+    mix = rng.dirichlet(np.full(len(refs), 0.3), size=args.queries).astype(np.float32)
+    queries = mix @ refs.vectors + rng.normal(0, 0.01, (args.queries, refs.vectors.shape[1])).astype(np.float32)
+    scorer = KnnScorer(refs, 5, args.temperature)
+    t0 = time.perf_counter()
+    for start in range(0, len(queries), 4096):
+        scorer.predict_vectors(queries[start:start + 4096])
+    elapsed = time.perf_counter() - t0
+    print(f"lote: {args.queries} consultas em {elapsed:.2f}s ({args.queries / elapsed:,.0f}/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark do classificador vetorizado de cenários sobre um corpus sintético.
+
+Uso: python -m benchmarks.bench_scenarios --calls 1000000
+"""
+import argparse, time
+import numpy as np
+import pandas as pd
+from core.scenarios import classify_contexts
+
+SNIPPETS = np.array([
+    "bom dia, carglass, meu nome é ana", "tenho uma trinca no para-brisa", "o retrovisor quebrou",
+    "a tag de pedágio não funciona", "sou corretor do cliente", "é um caminhão da frota",
+    "não estou conseguindo pagar a franquia", "qual é a sua placa?", "moro em são paulo",
+    "pode me enviar o link de acompanhamento?", "obrigado pelo atendimento",
+])
+
+# Personas da implementação anterior (persona_from_scenario), texto completo
+PERSONAS = {
+    "corretor": "Corretor de seguros agindo em nome do cliente, focado em resolver o problema rapidamente.",
+    "caminhão": "Motorista de caminhão, prático e direto, preocupado com o tempo de parada do veículo.",
+    "pagamento": "Cliente frustrado com um problema de pagamento, um pouco impaciente.",
+    "padrão": "Cliente segurado padrão, buscando resolver um problema com seu veículo de forma clara e objetiva.",
+}
+
+def synthetic_contexts(n: int, words_per_call: int = 6, seed: int = 0) -> pd.Series:
+    """Gera n contextos concatenando trechos aleatórios (reprodutível pela seed)."""
+    rng = np.random.default_rng(seed)
+    picks = SNIPPETS[rng.integers(0, len(SNIPPETS), size=(n, words_per_call))]
+    return pd.Series([" ".join(row) for row in picks])
+
+def loop_classify(contexts: pd.Series) -> list:
+    """Implementação anterior, linha a linha, usada como referência."""
+    out = []
+    for context in contexts:
+        c = context.lower()
+        t = "Troca de Para-brisa" if "para-brisa" in c else "Troca de Retrovisor" if "retrovisor" in c \
+            else "Problema com Tag de Pedágio" if "tag" in c else "Não definido"
+        p = PERSONAS["corretor"] if "corretor" in c else PERSONAS["caminhão"] if "caminhão" in c \
+            else PERSONAS["pagamento"] if "não estou conseguindo pagar" in c else PERSONAS["padrão"]
+        out.append((t, p))
+    return out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    contexts = synthetic_contexts(args.calls)
+
+    start = time.perf_counter()
+    labels = classify_contexts(contexts)
+    vec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = loop_classify(contexts)
+    loop = time.perf_counter() - start
+
+    assert labels["type"].tolist() == [t for t, _ in expected], "tipo vetorizado divergiu da referência"
+    assert labels["persona"].tolist() == [p for _, p in expected], "persona vetorizada divergiu da referência"
+    print(f"{args.calls} chamadas | vetorizado: {vec:.2f}s ({args.calls/vec:,.0f}/s) | "
+          f"laço: {loop:.2f}s ({args.calls/loop:,.0f}/s) | speedup {loop/vec:.1f}x")
+
+if __name__ == "__main__":
+    main()
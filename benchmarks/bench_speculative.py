@@ -0,0 +1,83 @@
+"""Benchmark da resposta especulativa do cliente: taxa de acerto e latência economizada após o envio.
+
+O treinando sintético "digita" cada fala a `--cps` caracteres por segundo; a cada `--debounce` segundos
+o texto digitado até a última palavra completa vira uma parcial. A latência medida é a do envio até a
+resposta (texto e áudio) pronta, com e sem especulação, com LLM e TTS simulados (benchmarks/mocks.py).
+
+Uso: python -m benchmarks.bench_speculative --conversations 5 --llm-latency 0.6 --tts-latency 0.2
+"""
+import argparse, time
+from benchmarks.mocks import MockLLM, StubGTTS
+from benchmarks.synthetic_trainee import SyntheticTrainee
+from core.behavior import behavior_for
+from core.profiles import CustomerProfile
+from core.speculative import SpeculativeCustomer
+
+SCENARIO = {"type": "Troca de Para-brisa", "context": "Trinca no para-brisa após pedra na estrada.",
+            "source_id": "bench"}
+
+def partials(text: str, cps: float, debounce: float) -> list:
+    """Parciais vistas a cada tick de debounce: o texto digitado até a última palavra completa e,
+    na pausa antes do envio, o texto inteiro."""
+    out, t = [], debounce
+    while t * cps < len(text):
+        typed = text[:int(t * cps)]
+        cut = typed.rfind(" ")
+        if cut > 0 and (not out or out[-1] != typed[:cut]):
+            out.append(typed[:cut])
+        t += debounce
+    return out + [text]
+
+def run(convs: list, args, speculate: bool) -> tuple:
+    """(latências do envio em s, relatório somado das sessões)."""
+    from core.ai_brain import CustomerBrain
+    import core.stt_tts as stt_tts
+    from core import ratelimit
+    ratelimit.configure({})
+    stt_tts.gTTS = StubGTTS
+    StubGTTS.latency = args.tts_latency
+    behavior = behavior_for(CustomerProfile())
+    latencies, totals = [], {}
+    for conv in convs:
+        brain = CustomerBrain(use_llm=True, scenario=SCENARIO, client=MockLLM(latency=args.llm_latency))
+        customer = SpeculativeCustomer(brain, behavior, synthesize=stt_tts.tts_bytes)
+        turns = []
+        for msg in conv:
+            if speculate:
+                for partial in partials(msg, args.cps, args.debounce):
+                    time.sleep(args.debounce)
+                    customer.observe(turns, partial)
+            time.sleep(args.debounce)  # do último debounce até o clique em Enviar
+            t0 = time.perf_counter()
+            reply, _ = customer.reply(turns, msg, since=time.monotonic())
+            latencies.append(time.perf_counter() - t0)
+            turns = turns + [{"speaker": "agent", "text": msg}, {"speaker": "customer", "text": reply}]
+        for k, v in customer.stats.items():
+            totals[k] = totals.get(k, 0) + v
+    return latencies, totals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=5)
+    parser.add_argument("--cps", type=float, default=40.0, help="caracteres digitados por segundo")
+    parser.add_argument("--debounce", type=float, default=0.15)
+    parser.add_argument("--llm-latency", type=float, default=0.6)
+    parser.add_argument("--tts-latency", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    convs = SyntheticTrainee(args.seed).conversations(args.conversations)
+    pct = lambda xs, q: 1000 * sorted(xs)[min(len(xs) - 1, int(q * len(xs)))]
+    print(f"{'':<16}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, speculate in [("serial", False), ("especulativo", True)]:
+        latencies, totals = run(convs, args, speculate)
+        print(f"{label:<16}{pct(latencies, 0.50):>10.1f}{pct(latencies, 0.95):>10.1f}")
+    replies = totals["acertos"] + totals["erros"]
+    print(f"acertos: {totals['acertos']}/{replies} ({totals['acertos'] / replies:.0%}), "
+          f"especulações: {totals['especulacoes']}, canceladas: {totals['canceladas']}")
+    print(f"latência economizada: {totals['economizado_s']:.1f}s "
+          f"({1000 * totals['economizado_s'] / replies:.0f} ms por resposta), "
+          f"trabalho descartado: {totals['desperdicado_s']:.1f}s")
+
+if __name__ == "__main__":
+    main()
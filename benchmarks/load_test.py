@@ -0,0 +1,181 @@
+"""Teste de carga: N treinandos simulados executando o app real (login, início, conversa, fim) em paralelo.
+
+Cada sessão roda o streamlit_app.py via streamlit.testing.v1.AppTest no mesmo processo, como o
+servidor do Streamlit faz com várias abas, compartilhando cache_resource, banco e modelos; OpenAI,
+Whisper e gTTS são trocados pelos dublês de benchmarks/mocks.py. As sessões rodam de fato em paralelo
+(um AppTest por thread, com um Runtime compartilhado). Para cada nível de concorrência mede vazão,
+latência das falas e crescimento do RSS.
+
+Uso:
+    python -m benchmarks.load_test --concurrency 1,10,30,100 --think-time 0.5
+"""
+import os, sys, json, time, random, argparse, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "streamlit_app.py")
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)  # o AppTest não adiciona o diretório do script ao sys.path
+
+from benchmarks.synthetic_trainee import SyntheticTrainee
+from benchmarks.mocks import MockLLM, StubWhisper, StubGTTS
+
+def rss_mb() -> float:
+    """RSS atual do processo em MB (Linux /proc; cai para ru_maxrss em outros sistemas)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def install_stand_ins(llm_latency: float):
+    """Troca OpenAI, Whisper e gTTS por dublês locais em todo o processo."""
+    from core import ratelimit
+    ratelimit.configure({})  # os dublês não têm limite de provedor
+    shared = MockLLM(latency=llm_latency)
+    try:
+        import openai
+        openai.OpenAI = lambda *a, **kw: shared
+    except ImportError:
+        pass
+    try:
+        import core.stt_tts as stt_tts
+        stt_tts._model = StubWhisper()
+        stt_tts.gTTS = StubGTTS
+    except ImportError:
+        pass
+
+def share_runtime():
+    """Um Runtime simulado para o processo inteiro, como o servidor real tem um só.
+
+    O AppTest cria um Runtime a cada run e o apaga no fim (Runtime._instance = None), o que derruba as
+    outras sessões no meio do run. Com instance()/exists() fixos no Runtime compartilhado, cada thread
+    roda o seu AppTest sem lock global, e o teste mede a disputa real por cache, banco e pools. O
+    bytecode do app também é compartilhado, como no servidor: cada AppTest compilaria o script de novo,
+    e compile() em várias threads ao mesmo tempo falha no CPython 3.11 ("AST constructor recursion depth")."""
+    from unittest.mock import MagicMock
+    from streamlit import config
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    shared = MagicMock(spec=Runtime)
+    shared.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    shared.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: shared)
+    Runtime.exists = classmethod(lambda cls: True)
+    # O AppTest liga global.appTest só durante o run e restaura o valor anterior no fim: ligado de vez,
+    # uma sessão terminando não desliga a opção de outra ainda rodando
+    config.set_option("global.appTest", True)
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+def _run(widget):
+    return widget.run()
+
+def _button(at, text):
+    return next(b for b in at.button if text in b.label)
+
+def run_session(idx: int, args, latencies: list, lock: threading.Lock) -> dict:
+    """Uma sessão completa de um treinando; devolve contagens e erros."""
+    from streamlit.testing.v1 import AppTest
+    rng = random.Random(args.seed + idx)
+    messages = SyntheticTrainee(args.seed + idx).conversation()
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    _run(at)
+    at.text_input[0].input(f"treinando{idx:03d}")
+    at.text_input[1].input("senha")
+    _run(_button(at, "Entrar").click())
+    _run(_button(at, "INICIAR").click())
+
+    turns = 0
+    for msg in messages:
+        time.sleep(rng.expovariate(1 / args.think_time) if args.think_time > 0 else 0)
+        t0 = time.perf_counter()
+        at.text_area(key="agent_input").input(msg)
+        _run(_button(at, "Enviar").click())
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+        turns += 1
+
+    _run(_button(at, "Finalizar").click())
+    return {"turns": turns, "errors": len(at.exception), "exceptions": [e.message for e in at.exception]}
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def run_level(concurrency: int, args) -> dict:
+    latencies, lock = [], threading.Lock()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_session, i, args, latencies, lock) for i in range(concurrency)]
+        results = []
+        for f in futures:
+            try:
+                results.append(f.result())
+            except Exception as e:
+                results.append({"turns": 0, "errors": 1, "failure": repr(e)})
+    elapsed = time.perf_counter() - start
+    rss_after = rss_mb()
+    turns = sum(r["turns"] for r in results)
+    return {
+        "concurrency": concurrency,
+        "sessions": len(results),
+        "failed_sessions": sum(1 for r in results if "failure" in r),
+        "app_exceptions": sum(r["errors"] for r in results),
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_s": turns / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": 1000 * _percentile(latencies, 0.50),
+        "p95_ms": 1000 * _percentile(latencies, 0.95),
+        "p99_ms": 1000 * _percentile(latencies, 0.99),
+        "rss_mb": rss_after,
+        "rss_growth_mb": rss_after - rss_before,
+        "rss_per_session_kb": 1024 * (rss_after - rss_before) / max(1, len(results)),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,10,30")
+    parser.add_argument("--think-time", type=float, default=0.2, help="pausa média entre falas (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="latência simulada da OpenAI (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="timeout de cada rerun do app (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    # Banco descartável para não misturar as sessões simuladas com o histórico real
+    scratch = tempfile.mkdtemp()
+    os.environ.setdefault("VOICE_COACH_DB", os.path.join(scratch, "load_test.db"))
+    os.environ.setdefault("VOICE_COACH_SESSION_DIR", os.path.join(scratch, "sessions"))
+    install_stand_ins(args.llm_latency)
+    share_runtime()
+
+    # Sessão de aquecimento: importa o Streamlit e o app antes de medir o RSS
+    run_session(-1, args, [], threading.Lock())
+
+    rows = []
+    print(f"{'conc':>5} {'turnos/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>8} {'ΔRSS/sessão KB':>15} falhas")
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        row = run_level(level, args)
+        rows.append(row)
+        print(f"{row['concurrency']:>5} {row['turns_per_s']:>9.1f} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['rss_mb']:>8.1f} {row['rss_per_session_kb']:>15.1f} "
+              f"{row['failed_sessions'] + row['app_exceptions']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 1 if any(r["failed_sessions"] for r in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
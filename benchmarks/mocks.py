@@ -0,0 +1,133 @@
+"""Dublês locais para LLM, Whisper e gTTS usados nos benchmarks (sem rede e sem GPU)."""
+import io, json, math, time, wave, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+class MockLLM:
+    """Cliente no formato do OpenAI (client.chat.completions.create) com resposta e latência fixas."""
+
+    def __init__(self, latency: float = 0.0, reply: str = "Certo, pode seguir com o atendimento."):
+        self.latency = latency
+        self.reply = reply
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class StubWhisper:
+    """Substitui o WhisperModel: devolve um segmento fixo depois de tocar no áudio inteiro."""
+
+    def transcribe(self, audio, language="pt"):
+        energy = float((audio ** 2).mean()) if len(audio) else 0.0
+        return iter([SimpleNamespace(text="bom dia carglass", start=0.0, end=len(audio) / 16000, energy=energy)]), None
+
+class StubGTTS:
+    """Substitui o gTTS: grava bytes proporcionais ao tamanho do texto, sem acessar a rede."""
+    latency = 0.0  # segundos por síntese, para simular a chamada de rede
+
+    def __init__(self, text, lang="pt", slow=False):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        if self.latency:
+            time.sleep(self.latency)
+        fp.write(b"\xff\xf3" * (len(self.text) * 16))
+
+def fixture_wav(seconds: float = 3.0, sr: int = 44100, silence: float = 0.5) -> bytes:
+    """WAV mono 16-bit: silêncio, tom de 220 Hz modulado (imitando voz) e silêncio."""
+    n_sil, n_tone = int(silence * sr), int(seconds * sr)
+    frames = bytearray()
+    for i in range(n_sil + n_tone + n_sil):
+        if n_sil <= i < n_sil + n_tone:
+            t = i / sr
+            v = 0.3 * math.sin(2 * math.pi * 220 * t) * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * t))
+        else:
+            v = 0.0
+        frames += int(v * 32767).to_bytes(2, "little", signed=True)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(bytes(frames))
+    return buf.getvalue()
+
+class StubEncoder:
+    """Substitui o SentenceTransformer: vetor determinístico por texto, com custo fixo por frase."""
+
+    def __init__(self, dim: int = 384, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.encoded = 0
+
+    def encode(self, sentences, batch_size=64, normalize_embeddings=True, show_progress_bar=False):
+        import numpy as np
+        self.encoded += len(sentences)
+        if self.latency:
+            time.sleep(self.latency * len(sentences))
+        seeds = [int.from_bytes(s.encode("utf-8")[:8].ljust(8, b"\0"), "little") ^ len(s) for s in sentences]
+        vecs = np.stack([np.random.default_rng(seed).standard_normal(self.dim) for seed in seeds]).astype(np.float32)
+        return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+class _ProviderHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # a turma inteira conecta de uma vez
+
+class MockProviderServer:
+    """Servidor HTTP local no papel do provedor: POST /<endpoint> com limite por endpoint (`limits`:
+    endpoint -> (requisições/s, rajada)); acima do limite responde 429 com Retry-After."""
+
+    def __init__(self, limits: dict, latency: float = 0.0):
+        from core.ratelimit import TokenBucket
+        self.latency = latency
+        self.buckets = {name: TokenBucket(rate, burst) for name, (rate, burst) in limits.items()}
+        self.lock = threading.Lock()
+        self.counts = {"requisicoes": 0, "429": 0}
+        self.bodies = {}  # corpo -> vezes atendido
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                bucket = server.buckets.get(self.path.strip("/"))
+                with server.lock:
+                    server.counts["requisicoes"] += 1
+                    wait = bucket.take(time.monotonic()) if bucket else 0.0
+                    if wait:
+                        server.counts["429"] += 1
+                    else:
+                        server.bodies[body] = server.bodies.get(body, 0) + 1
+                if wait:
+                    self.send_response(429)
+                    self.send_header("Retry-After", f"{wait:.3f}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                out = json.dumps({"eco": len(body)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = _ProviderHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def duplicates(self) -> int:
+        """Requisições atendidas com um corpo já atendido antes (pagas em dobro)."""
+        return sum(n - 1 for n in self.bodies.values())
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,205 @@
+"""Benchmark ponta a ponta dos componentes do Voice Coach com treinando sintético.
+
+Uso:
+    python -m benchmarks.run                      # mede e compara com benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline      # grava o resultado como nova baseline
+    python -m benchmarks.run --local-models       # usa Whisper/gTTS reais em vez dos dublês
+
+Sai com código 1 se algum componente regredir além de --threshold (vazão ou p95).
+"""
+import os, io, sys, json, time, argparse, platform
+from benchmarks.synthetic_trainee import SyntheticTrainee
+from benchmarks.mocks import MockLLM, StubWhisper, StubGTTS, fixture_wav
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+class Skip(Exception):
+    """Componente indisponível neste ambiente (dependência ausente)."""
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+def measure(ops, warmup: int = 3) -> dict:
+    """Executa cada callable de `ops`, medindo a latência individual e a vazão total."""
+    for op in ops[:warmup]:
+        op()
+    latencies = []
+    start = time.perf_counter()
+    for op in ops:
+        t0 = time.perf_counter()
+        op()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    return {
+        "ops": len(ops),
+        "throughput_ops_s": len(ops) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": 1000 * _percentile(latencies, 0.50),
+        "p95_ms": 1000 * _percentile(latencies, 0.95),
+        "p99_ms": 1000 * _percentile(latencies, 0.99),
+    }
+
+# --- componentes: cada função devolve a lista de operações a medir ---
+
+def bench_evaluation_system(convs, args):
+    from core.simulation import EvaluationSystem
+    ops = []
+    for conv in convs:
+        evaluator = EvaluationSystem()
+        ops += [lambda e=evaluator, m=msg: e.evaluate_message(m) for msg in conv]
+    return ops
+
+def bench_virtual_customer(convs, args):
+    from core.simulation import VirtualCustomer
+    ops = []
+    for conv in convs:
+        customer = VirtualCustomer()
+        ops += [lambda c=customer, m=msg: c.generate_response(m) for msg in conv]
+    return ops
+
+def bench_score_engine(convs, args):
+    from core.scorer import ScoreEngine
+    transcripts = [[{"speaker": "agent", "text": m} for m in conv] for conv in convs]
+
+    def score(turns):
+        engine = ScoreEngine()
+        engine.consume_turns(turns)
+        return engine.report()
+    return [lambda t=t: score(t) for t in transcripts]
+
+def bench_customer_brain(convs, args):
+    try:
+        from core.ai_brain import CustomerBrain
+        from core import ratelimit
+    except ImportError as e:
+        raise Skip(e)
+    ratelimit.configure({})
+    scenario = {"type": "Troca de Para-brisa", "context": "Trinca no para-brisa após pedra na estrada.",
+                "source_id": "bench"}
+    ops = []
+    for conv in convs:
+        brain = CustomerBrain(use_llm=True, scenario=scenario, client=MockLLM(latency=args.llm_latency))
+        turns = []
+        for msg in conv:
+            turns = turns + [{"speaker": "agent", "text": msg}]
+            ops.append(lambda b=brain, t=turns: b.reply(t))
+    return ops
+
+def bench_stt(convs, args):
+    try:
+        import core.stt_tts as stt_tts
+    except ImportError as e:
+        raise Skip(e)
+    if not args.local_models:
+        stt_tts._model = StubWhisper()
+    audio = fixture_wav(seconds=3.0)
+    return [lambda: stt_tts.transcribe_bytes(audio) for _ in range(max(5, len(convs) // 4))]
+
+def bench_vad(convs, args):
+    import wave
+    import numpy as np
+    from core.vad import detect_speech, pack_segments
+    with wave.open(io.BytesIO(fixture_wav(seconds=8.0, sr=16000, silence=2.0))) as w:
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").astype(np.float32) / 32768
+    vad = detect_speech(audio, 16000)
+    print(f"{'vad':<20} fração ignorada no fixture: {vad.skipped_fraction:.1%}")
+    return [lambda: pack_segments(detect_speech(audio, 16000)) for _ in range(max(5, len(convs)))]
+
+def bench_prosody(convs, args):
+    import wave
+    import numpy as np
+    from core.vad import detect_speech
+    from core.prosody import prosody_features
+    with wave.open(io.BytesIO(fixture_wav(seconds=8.0, sr=16000, silence=2.0))) as w:
+        audio = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2").astype(np.float32) / 32768
+    vad = detect_speech(audio, 16000)
+    segments = [(0.0, 8.0, "bom dia carglass meu nome é ana em que posso ajudar")]
+    features = prosody_features(audio, vad, segments)
+    print(f"{'prosody':<20} início da fala {features['inicio_fala_s']:.2f}s, tom {features['tom_mediano_hz']:.0f} Hz")
+    return [lambda: prosody_features(audio, vad, segments) for _ in range(max(5, len(convs)))]
+
+def bench_tts(convs, args):
+    try:
+        import core.stt_tts as stt_tts
+    except ImportError as e:
+        raise Skip(e)
+    if not args.local_models:
+        from core import ratelimit
+        ratelimit.configure({})
+        stt_tts.gTTS = StubGTTS
+    lines = [msg for conv in convs for msg in conv][: max(5, len(convs))]
+    return [lambda m=m: stt_tts.tts_bytes(m) for m in lines]
+
+COMPONENTS = {
+    "evaluation_system": bench_evaluation_system,
+    "virtual_customer": bench_virtual_customer,
+    "score_engine": bench_score_engine,
+    "customer_brain": bench_customer_brain,
+    "stt": bench_stt,
+    "vad": bench_vad,
+    "prosody": bench_prosody,
+    "tts": bench_tts,
+}
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Lista de regressões: vazão abaixo ou p95 acima da baseline por mais que `threshold`."""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("components", {}).get(name)
+        if not base or "skipped" in cur or "skipped" in base:
+            continue
+        if cur["throughput_ops_s"] < base["throughput_ops_s"] * (1 - threshold):
+            regressions.append(f"{name}: vazão {cur['throughput_ops_s']:.1f} < baseline {base['throughput_ops_s']:.1f} ops/s")
+        if cur["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {cur['p95_ms']:.3f} > baseline {base['p95_ms']:.3f} ms")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--components", default=",".join(COMPONENTS))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.20, help="regressão tolerada (fração)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="latência simulada do LLM (s)")
+    parser.add_argument("--local-models", action="store_true")
+    parser.add_argument("--output", help="grava os resultados desta execução em JSON")
+    args = parser.parse_args(argv)
+
+    convs = SyntheticTrainee(args.seed).conversations(args.conversations)
+    results = {}
+    for name in args.components.split(","):
+        try:
+            results[name] = measure(COMPONENTS[name](convs, args))
+        except Skip as e:
+            results[name] = {"skipped": str(e)}
+        row = results[name]
+        if "skipped" in row:
+            print(f"{name:<20} ignorado ({row['skipped']})")
+        else:
+            print(f"{name:<20} {row['ops']:>6} ops  {row['throughput_ops_s']:>10.1f} ops/s  "
+                  f"p50 {row['p50_ms']:.3f} ms  p95 {row['p95_ms']:.3f} ms  p99 {row['p99_ms']:.3f} ms")
+
+    run = {"seed": args.seed, "conversations": args.conversations, "python": platform.python_version(),
+           "machine": platform.machine(), "components": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar (use --save-baseline).")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    for r in regressions:
+        print(f"REGRESSÃO {r}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Treinando sintético determinístico: conversas roteirizadas com variações controladas por seed."""
+import random
+
+# Roteiros de atendimento; cada fala tem variantes equivalentes sorteadas pela seed
+SCRIPTS = {
+    "completo": [
+        ["Bom dia! Carglass, meu nome é Ana. Como posso ajudar?", "Boa tarde, Carglass, me chamo Ana, posso ajudar?"],
+        ["Qual o seu nome completo, por favor?", "Pode me informar seu nome?"],
+        ["Qual é o seu CPF?", "Me informa o CPF, por favor?"],
+        ["Confirmando seu CPF: 123.456.789-10, correto?", "Repito o CPF 123.456.789-10, confere?"],
+        ["Qual o telefone de contato?", "Pode me passar um telefone para contato?"],
+        ["Tem um segundo telefone?", "Quer deixar outro telefone?"],
+        ["E a placa do veículo?", "Qual a placa do carro?"],
+        ["Confirmando a placa ABC-1234.", "Repito a placa: ABC-1234, confere?"],
+        ["Qual o seu endereço?", "Me informa o endereço com CEP?"],
+        ["Pela LGPD, lei geral de proteção de dados, autoriza o compartilhamento dos dados?"],
+        ["Entendo sua preocupação, vamos resolver. O que aconteceu com o para-brisa?",
+         "Compreendo. Como aconteceu o dano no para-brisa?"],
+        ["Quando aconteceu e qual o tamanho da trinca?", "Qual o tamanho da trinca e quando foi?"],
+        ["O veículo tem LED, xenon ou sensor de chuva?", "Tem câmera ou sensor no vidro?"],
+        ["Em qual cidade prefere fazer o serviço? A primeira loja do sistema é a unidade Vila Olímpia.",
+         "Qual cidade? Temos a loja da unidade Vila Olímpia."],
+        ["Um momento, aguarde por favor.", "Aguarde um momento, por favor."],
+        ["Seu protocolo é 1234. A proposta tem validade de 14 dias, a franquia é de R$ 300.",
+         "Anote o protocolo 1234, validade de 14 dias e franquia de R$ 300."],
+        ["Vou enviar o link de acompanhamento; leve os documentos e a CNH.",
+         "Você receberá o link de acompanhamento. Leve documento e CNH."],
+        ["Ao final você receberá uma pesquisa de satisfação. Obrigado!",
+         "Responda a pesquisa de satisfação, por favor. Tenha um bom dia!"],
+    ],
+    "apressado": [
+        ["Carglass, bom dia."],
+        ["CPF?"],
+        ["Placa?"],
+        ["Qual o problema?"],
+        ["Cidade?"],
+        ["Ok, obrigado."],
+    ],
+    "repetitivo": [
+        ["Olá, Carglass, meu nome é Bruno."],
+        ["Qual seu nome?"],
+        ["Qual seu nome mesmo?"],
+        ["Qual o CPF?"],
+        ["Me passa o CPF de novo?"],
+        ["Qual a placa?"],
+        ["Qual a placa?"],
+        ["Em qual cidade?"],
+        ["Obrigado."],
+    ],
+}
+
+class SyntheticTrainee:
+    """Gera conversas reprodutíveis: mesma seed, mesmas falas na mesma ordem."""
+
+    def __init__(self, seed: int = 0):
+        self.rng = random.Random(seed)
+
+    def conversation(self, script: str = None) -> list:
+        """Lista de falas do atendente para um roteiro (sorteado se não informado)."""
+        name = script or self.rng.choice(sorted(SCRIPTS))
+        return [self.rng.choice(variants) for variants in SCRIPTS[name]]
+
+    def conversations(self, n: int) -> list:
+        return [self.conversation() for _ in range(n)]
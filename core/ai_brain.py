@@ -1,11 +1,13 @@
-import os, random
+import os, time, random
 import streamlit as st
-from core.utils import normalize_text
+from core.normalize import normalize_text
 from core.scenarios import persona_from_scenario
+from core.tracing import traced
+from core.ratelimit import limiter
 from openai import OpenAI
 
 class CustomerBrain:
-    def __init__(self, use_llm: bool, scenario: dict):
+    def __init__(self, use_llm: bool, scenario: dict, client=None):
         # Prioriza secrets do Streamlit, depois variáveis de ambiente
         openai_key = None
         try:
@@ -13,34 +15,46 @@ class CustomerBrain:
         except:
             openai_key = os.getenv("OPENAI_API_KEY")
         
-        self.use_llm = use_llm and (openai_key is not None)
+        # `client` permite injetar outro cliente compatível (ex.: LLM simulado nos benchmarks)
+        self.use_llm = use_llm and (openai_key is not None or client is not None)
         self.scenario = scenario
         self.persona = persona_from_scenario(scenario)
         self.stage = 0
         
         if self.use_llm:
-            self.client = OpenAI(api_key=openai_key)
+            # Sem retentativas no SDK: os 429 voltam para o limitador de taxa (core.ratelimit)
+            self.client = client or OpenAI(api_key=openai_key, max_retries=0)
 
     def first_utterance(self):
         return "Olá, bom dia! Eu sou segurado e preciso resolver um problema no para-brisa."
 
-    def reply(self, turns):
+    @traced("customer.brain_reply")
+    def reply(self, turns, since: float = None):
+        """Resposta à última fala do atendente. `since`: time.monotonic() do envio da fala (padrão: agora)."""
         # FSM simplificada por estágio (coleta dados, confirmar dano, escolher loja, encerrar)
-        agent_last = normalize_text(next((t["text"] for t in reversed(turns) if t["speaker"]=="agent"), ""))
         self.stage = min(self.stage + 1, 4)
+        return self.draft(turns, self.stage, since=time.monotonic() if since is None else since)
+
+    def draft(self, turns, stage: int, since: float = None) -> str:
+        """Resposta para `stage` sem avançar o estágio (também usada pela geração especulativa).
+        `since`: desde quando a sessão espera a resposta (prioridade na fila do limitador de taxa)."""
+        agent_last = normalize_text(next((t["text"] for t in reversed(turns) if t["speaker"]=="agent"), ""))
 
         if self.use_llm:
             prompt = f"""
 Você é um cliente brasileiro. Persona: {self.persona}.
 Cenário: {self.scenario['type']} - {self.scenario['context'][:300]}
 Última fala do atendente: "{agent_last}"
-Responda de forma curta, natural, mantendo o foco no próximo passo do fluxo (estágio {self.stage}).
+Responda de forma curta, natural, mantendo o foco no próximo passo do fluxo (estágio {stage}).
 """
             try:
-                rsp = self.client.chat.completions.create(
+                # Prompts idênticos em andamento (ex.: o mesmo estágio do mesmo cenário) compartilham a chamada
+                rsp = limiter().call(
+                    "openai.chat", ("gpt-4o-mini", prompt), self.client.chat.completions.create,
                     model="gpt-4o-mini",
                     messages=[{"role":"user","content":prompt}],
                     temperature=0.6,
+                    since=since,
                 )
                 return rsp.choices[0].message.content.strip()
             except Exception as e:
@@ -54,4 +68,4 @@ Responda de forma curta, natural, mantendo o foco no próximo passo do fluxo (es
             "Estou em Belo Horizonte. Pode ser a loja do bairro Funcionários?",
             "Obrigado. Pode me enviar o link de acompanhamento, por favor?"
         ]
-        return canned[min(self.stage-1, len(canned)-1)]
+        return canned[min(stage-1, len(canned)-1)]
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+from core.storage import SessionStore
+
+N_ITEMS = 12
+HIST_BINS = 10          # faixas de 10 pontos percentuais
+PASS_THRESHOLD = 0.8    # item "aprovado" com >= 80% dos pontos, como no results_screen
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    day TEXT NOT NULL,
+    usuario TEXT NOT NULL,
+    sessoes INTEGER NOT NULL,
+    aprovacoes INTEGER NOT NULL,
+    soma_percentual REAL NOT NULL,
+    soma_quadrados REAL NOT NULL,
+    PRIMARY KEY (day, usuario)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_item_rollups (
+    day TEXT NOT NULL,
+    usuario TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    sessoes INTEGER NOT NULL,
+    aprovacoes INTEGER NOT NULL,
+    soma_score REAL NOT NULL,
+    PRIMARY KEY (day, usuario, item_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_score_hist (
+    day TEXT NOT NULL,
+    faixa INTEGER NOT NULL,
+    sessoes INTEGER NOT NULL,
+    PRIMARY KEY (day, faixa)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    last_session_id INTEGER NOT NULL
+);
+"""
+
+class ReportArrays:
+    """Relatórios de sessão em formato colunar: um array por campo, uma linha por sessão."""
+
+    def __init__(self, session_id, usuario, day, percentual, aprovado, item_scores, item_max):
+        self.session_id = np.asarray(session_id, dtype=np.int64)
+        self.usuario = np.asarray(usuario, dtype=object)
+        self.day = np.asarray(day, dtype="datetime64[D]")
+        self.percentual = np.asarray(percentual, dtype=np.float64)
+        self.aprovado = np.asarray(aprovado, dtype=bool)
+        self.item_scores = np.asarray(item_scores, dtype=np.float64).reshape(-1, N_ITEMS)
+        self.item_max = np.asarray(item_max, dtype=np.float64).reshape(-1, N_ITEMS)
+
+    def __len__(self):
+        return len(self.session_id)
+
+def reports_to_arrays(reports: list, session_ids=None) -> ReportArrays:
+    """Converte relatórios no formato do results_screen (report_data) em ReportArrays."""
+    n = len(reports)
+    scores = np.zeros((n, N_ITEMS))
+    maxes = np.zeros((n, N_ITEMS))
+    for row, report in enumerate(reports):
+        for item in report.get("detalhamento", []):
+            scores[row, item["id"] - 1] = item["score"]
+            maxes[row, item["id"] - 1] = item["max"]
+    return ReportArrays(
+        session_ids if session_ids is not None else np.arange(n),
+        [r["usuario"] for r in reports],
+        [r["data"][:10] for r in reports],
+        [r["percentual"] for r in reports],
+        [r["aprovado"] for r in reports],
+        scores, maxes,
+    )
+
+def load_sessions(store: SessionStore, after_id: int = 0) -> ReportArrays:
+    """Lê do banco, em duas consultas, todas as sessões com id > after_id."""
+    conn = store.connection()
+    sessions = pd.read_sql_query(
+        "SELECT id, usuario, substr(data, 1, 10) AS day, percentual, aprovado FROM sessions"
+        " WHERE id > ? ORDER BY id", conn, params=(after_id,))
+    items = pd.read_sql_query(
+        "SELECT session_id, item_id, score, max_score FROM item_scores WHERE session_id > ?",
+        conn, params=(after_id,))
+
+    scores = np.zeros((len(sessions), N_ITEMS))
+    maxes = np.zeros((len(sessions), N_ITEMS))
+    if len(items):
+        rows = np.searchsorted(sessions["id"].to_numpy(), items["session_id"].to_numpy())
+        cols = items["item_id"].to_numpy() - 1
+        scores[rows, cols] = items["score"].to_numpy()
+        maxes[rows, cols] = items["max_score"].to_numpy()
+    return ReportArrays(sessions["id"], sessions["usuario"], sessions["day"],
+                        sessions["percentual"], sessions["aprovado"], scores, maxes)
+
+def rollup(arr: ReportArrays):
+    """Agrega por (dia, treinando) e por dia com group-bys vetorizados (factorize + bincount)."""
+    days = arr.day.astype(str)
+    key = pd.MultiIndex.from_arrays([days, arr.usuario])
+    codes, groups = pd.factorize(key)
+    ng = len(groups)
+    pct = arr.percentual
+
+    per_user = pd.DataFrame({
+        "day": groups.get_level_values(0), "usuario": groups.get_level_values(1),
+        "sessoes": np.bincount(codes, minlength=ng),
+        "aprovacoes": np.bincount(codes, weights=arr.aprovado, minlength=ng).astype(int),
+        "soma_percentual": np.bincount(codes, weights=pct, minlength=ng),
+        "soma_quadrados": np.bincount(codes, weights=pct * pct, minlength=ng),
+    })
+
+    # Itens: grupo x item achatado em um único índice para um bincount só
+    passed = (arr.item_max > 0) & (arr.item_scores >= PASS_THRESHOLD * arr.item_max)
+    flat = (codes[:, None] * N_ITEMS + np.arange(N_ITEMS)).ravel()
+    size = ng * N_ITEMS
+    per_item = pd.DataFrame({
+        "day": np.repeat(per_user["day"].to_numpy(), N_ITEMS),
+        "usuario": np.repeat(per_user["usuario"].to_numpy(), N_ITEMS),
+        "item_id": np.tile(np.arange(1, N_ITEMS + 1), ng),
+        "sessoes": np.repeat(per_user["sessoes"].to_numpy(), N_ITEMS),
+        "aprovacoes": np.bincount(flat, weights=passed.ravel(), minlength=size).astype(int),
+        "soma_score": np.bincount(flat, weights=arr.item_scores.ravel(), minlength=size),
+    })
+
+    faixa = np.clip((pct // (100 / HIST_BINS)).astype(int), 0, HIST_BINS - 1)
+    day_codes, day_values = pd.factorize(days)
+    hist_flat = np.bincount(day_codes * HIST_BINS + faixa, minlength=len(day_values) * HIST_BINS)
+    hist = pd.DataFrame({
+        "day": np.repeat(np.asarray(day_values), HIST_BINS),
+        "faixa": np.tile(np.arange(HIST_BINS), len(day_values)),
+        "sessoes": hist_flat,
+    })
+    return per_user, per_item, hist[hist["sessoes"] > 0]
+
+class CohortAnalytics:
+    """Agregados de turma mantidos como rollups diários materializados no mesmo banco do SessionStore."""
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+        self.store.connection().executescript(ROLLUP_SCHEMA)
+
+    def refresh(self) -> int:
+        """Incorpora aos rollups apenas as sessões gravadas desde a última atualização.
+
+        Leitura do estado, das sessões novas e as somas ficam em uma transação IMMEDIATE: duas
+        atualizações concorrentes (threads ou processos) não somam as mesmas sessões duas vezes."""
+        conn = self.store.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT last_session_id FROM rollup_state WHERE name = 'daily'").fetchone()
+            last_id = row[0] if row else 0
+            arr = load_sessions(self.store, last_id)
+            if not len(arr):
+                conn.rollback()
+                return 0
+
+            per_user, per_item, hist = rollup(arr)
+            conn.executemany(
+                "INSERT INTO daily_rollups VALUES (?,?,?,?,?,?) ON CONFLICT(day, usuario) DO UPDATE SET"
+                " sessoes = sessoes + excluded.sessoes, aprovacoes = aprovacoes + excluded.aprovacoes,"
+                " soma_percentual = soma_percentual + excluded.soma_percentual,"
+                " soma_quadrados = soma_quadrados + excluded.soma_quadrados",
+                per_user.itertuples(index=False, name=None))
+            conn.executemany(
+                "INSERT INTO daily_item_rollups VALUES (?,?,?,?,?,?) ON CONFLICT(day, usuario, item_id) DO UPDATE SET"
+                " sessoes = sessoes + excluded.sessoes, aprovacoes = aprovacoes + excluded.aprovacoes,"
+                " soma_score = soma_score + excluded.soma_score",
+                per_item.astype({"item_id": int, "sessoes": int, "aprovacoes": int}).itertuples(index=False, name=None))
+            conn.executemany(
+                "INSERT INTO daily_score_hist VALUES (?,?,?) ON CONFLICT(day, faixa) DO UPDATE SET"
+                " sessoes = sessoes + excluded.sessoes",
+                hist.astype({"faixa": int, "sessoes": int}).itertuples(index=False, name=None))
+            conn.execute(
+                "INSERT INTO rollup_state VALUES ('daily', ?) ON CONFLICT(name) DO UPDATE SET"
+                " last_session_id = excluded.last_session_id", (int(arr.session_id.max()),))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return len(arr)
+
+    def _query(self, sql: str, since: str, until: str) -> pd.DataFrame:
+        return pd.read_sql_query(sql, self.store.connection(), params=(since or "", until or "9999"))
+
+    def item_pass_rates(self, since: str = None, until: str = None) -> pd.DataFrame:
+        """Taxa de aprovação e nota média por item do checklist no período."""
+        df = self._query(
+            "SELECT item_id, SUM(sessoes) AS sessoes, SUM(aprovacoes) AS aprovacoes, SUM(soma_score) AS soma_score"
+            " FROM daily_item_rollups WHERE day BETWEEN ? AND ? GROUP BY item_id ORDER BY item_id", since, until)
+        df["taxa_aprovacao"] = df["aprovacoes"] / df["sessoes"]
+        df["media_score"] = df["soma_score"] / df["sessoes"]
+        return df.drop(columns="soma_score")
+
+    def score_distribution(self, since: str = None, until: str = None) -> pd.DataFrame:
+        """Quantidade de sessões por faixa de 10 pontos percentuais."""
+        df = self._query(
+            "SELECT faixa, SUM(sessoes) AS sessoes FROM daily_score_hist WHERE day BETWEEN ? AND ?"
+            " GROUP BY faixa", since, until)
+        df = df.set_index("faixa").reindex(range(HIST_BINS), fill_value=0)
+        df.index = [f"{b * 10}-{b * 10 + 10}%" for b in df.index]
+        return df
+
+    def daily_trend(self, since: str = None, until: str = None) -> pd.DataFrame:
+        """Média percentual e taxa de aprovação da turma por dia."""
+        df = self._query(
+            "SELECT day, SUM(sessoes) AS sessoes, SUM(aprovacoes) AS aprovacoes, SUM(soma_percentual) AS soma"
+            " FROM daily_rollups WHERE day BETWEEN ? AND ? GROUP BY day ORDER BY day", since, until)
+        df["media_percentual"] = df["soma"] / df["sessoes"]
+        df["taxa_aprovacao"] = df["aprovacoes"] / df["sessoes"]
+        return df.drop(columns="soma").set_index("day")
+
+    def trainee_summary(self, since: str = None, until: str = None) -> pd.DataFrame:
+        """Sessões, média, desvio-padrão e taxa de aprovação por treinando."""
+        df = self._query(
+            "SELECT usuario, SUM(sessoes) AS sessoes, SUM(aprovacoes) AS aprovacoes, SUM(soma_percentual) AS soma,"
+            " SUM(soma_quadrados) AS soma_q FROM daily_rollups WHERE day BETWEEN ? AND ? GROUP BY usuario",
+            since, until)
+        df["media_percentual"] = df["soma"] / df["sessoes"]
+        df["desvio_percentual"] = np.sqrt((df["soma_q"] / df["sessoes"] - df["media_percentual"] ** 2).clip(lower=0))
+        df["taxa_aprovacao"] = df["aprovacoes"] / df["sessoes"]
+        return df.drop(columns=["soma", "soma_q"]).sort_values("media_percentual", ascending=False)
@@ -0,0 +1,175 @@
+"""Transcrição em lote de um acervo de gravações para o esquema de load_transcripts (IdAnalysis, Transcrição da Ligação).
+
+Decodificação, reamostragem e VAD rodam em um pool de processos; o faster-whisper roda no processo
+principal com inferência em lote (BatchedInferencePipeline) sobre as janelas de fala de cada ligação.
+A saída é um diretório Parquet particionado (ou um CSV) e a execução pode ser retomada: arquivos
+cujo IdAnalysis já está na saída são pulados. O IdAnalysis é o caminho relativo ao diretório de
+entrada, sem extensão ("2024/03/ligacao_17"), para gravações de mesmo nome em subdiretórios não colidirem.
+
+Uso:
+    python -m core.batch_transcribe gravacoes/ data/transcricoes_audio/ --workers 8 --batch-size 16
+"""
+import os, time, wave
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from core.ingest import ID_COL, TEXT_COL
+from core.tracing import span
+from core.vad import detect_speech, pack_segments, gather
+
+SR = 16000
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".m4a", ".opus")
+_WAV_DTYPES = {1: np.uint8, 2: "<i2", 4: "<i4"}
+
+def list_recordings(audio_dir: str) -> list:
+    """Gravações do diretório (recursivo), em ordem estável."""
+    paths = []
+    for root, _, files in os.walk(audio_dir):
+        paths += [os.path.join(root, f) for f in files if f.lower().endswith(AUDIO_EXTENSIONS)]
+    return sorted(paths)
+
+def recording_id(path: str, root: str = None) -> str:
+    """IdAnalysis: caminho relativo a `root` sem extensão, com "/" (só o nome do arquivo sem `root`)."""
+    rel = os.path.relpath(path, root) if root else os.path.basename(path)
+    return os.path.splitext(rel)[0].replace(os.sep, "/")
+
+def resample(audio: np.ndarray, sr: int, target: int = SR) -> np.ndarray:
+    if sr == target:
+        return audio
+    duration = len(audio) / sr
+    t = np.linspace(0, duration, int(target * duration), endpoint=False)
+    return np.interp(t, np.linspace(0, duration, len(audio), endpoint=False), audio).astype(np.float32)
+
+def decode(path: str) -> np.ndarray:
+    """Áudio float32 mono 16 kHz. WAV PCM é lido direto com numpy; os demais formatos via PyAV do faster-whisper."""
+    if path.lower().endswith(".wav"):
+        with wave.open(path) as w:
+            width, channels, sr = w.getsampwidth(), w.getnchannels(), w.getframerate()
+            raw = w.readframes(w.getnframes())
+        if width in _WAV_DTYPES:
+            audio = np.frombuffer(raw, dtype=_WAV_DTYPES[width]).astype(np.float32)
+            audio = (audio - 128) / 128 if width == 1 else audio / float(2 ** (8 * width - 1))
+            if channels > 1:
+                audio = audio.reshape(-1, channels).mean(axis=1)
+            return resample(audio, sr)
+    from faster_whisper.audio import decode_audio
+    return decode_audio(path, sampling_rate=SR)
+
+def prepare(path: str, root: str = None):
+    """Etapa dos workers: decodifica, corta o silêncio e agrupa a fala em janelas de até 30 s.
+
+    Devolve (id, fala concatenada, janelas em segundos sobre a fala concatenada, duração, segundos de fala).
+    """
+    audio = decode(path)
+    vad = detect_speech(audio, SR)
+    chunks = pack_segments(vad)
+    voiced = gather(audio, [piece for chunk in chunks for piece in chunk])
+    sizes = np.cumsum([0] + [sum(e - s for s, e in chunk) for chunk in chunks])
+    clips = [{"start": a / SR, "end": b / SR} for a, b in zip(sizes[:-1].tolist(), sizes[1:].tolist())]
+    return recording_id(path, root), voiced, clips, vad.duration, vad.voiced
+
+def load_pipeline(model_size: str = "small", compute_type: str = "int8", cpu_threads: int = 0):
+    from faster_whisper import WhisperModel, BatchedInferencePipeline
+    model = WhisperModel(model_size, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+    return BatchedInferencePipeline(model=model)
+
+def _done_ids(out: str) -> set:
+    """IdAnalysis já gravados na saída (para retomar)."""
+    if out.endswith(".csv"):
+        return set(pd.read_csv(out, usecols=[ID_COL], dtype=str)[ID_COL]) if os.path.exists(out) else set()
+    parts = [p for p in os.listdir(out) if p.endswith(".parquet")] if os.path.isdir(out) else []
+    return set(pd.read_parquet(out, columns=[ID_COL])[ID_COL]) if parts else set()
+
+def _flush(rows: list, out: str):
+    """Grava um bloco de transcrições; partes Parquet são escritas em arquivo temporário e renomeadas."""
+    df = pd.DataFrame(rows, columns=[ID_COL, TEXT_COL]).astype("string")
+    if out.endswith(".csv"):
+        df.to_csv(out, mode="a", header=not os.path.exists(out), index=False)
+        return
+    os.makedirs(out, exist_ok=True)
+    n = sum(1 for p in os.listdir(out) if p.endswith(".parquet"))
+    part = os.path.join(out, f"part-{n:05d}.parquet")
+    df.to_parquet(part + ".tmp", index=False)
+    os.replace(part + ".tmp", part)
+
+def transcribe_archive(audio_dir: str, out: str, workers: int = None, batch_size: int = 16,
+                       flush_every: int = 200, pipeline=None, model_size: str = "small",
+                       compute_type: str = "int8", language: str = "pt") -> dict:
+    """Transcreve todas as gravações ainda ausentes em `out` (diretório Parquet ou arquivo .csv)."""
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    done = _done_ids(out)
+    stats = {"files": 0, "skipped": 0, "failed": [], "audio_s": 0.0, "voiced_s": 0.0}
+    todo = []
+    for path in list_recordings(audio_dir):
+        if recording_id(path, audio_dir) in done:
+            stats["skipped"] += 1
+        else:
+            todo.append(path)
+    if not todo:
+        stats.update(seconds=0.0, audio_h_per_min=0.0)
+        return stats
+    pipeline = pipeline or load_pipeline(model_size, compute_type)
+
+    start = time.perf_counter()
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Janela de pré-busca: os workers decodificam as próximas gravações enquanto o modelo transcreve
+        pending, paths = deque(), iter(todo)
+        for path in paths:
+            pending.append((path, pool.submit(prepare, path, audio_dir)))
+            if len(pending) < 2 * workers:
+                continue
+            rows += _transcribe_next(pending, pipeline, batch_size, language, stats)
+            if len(rows) >= flush_every:
+                _flush(rows, out)
+                rows = []
+        while pending:
+            rows += _transcribe_next(pending, pipeline, batch_size, language, stats)
+            if len(rows) >= flush_every:
+                _flush(rows, out)
+                rows = []
+    if rows:
+        _flush(rows, out)
+
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["audio_h_per_min"] = round(stats["audio_s"] / 3600 / (elapsed / 60), 3) if elapsed > 0 else 0.0
+    return stats
+
+def _transcribe_next(pending: deque, pipeline, batch_size: int, language: str, stats: dict) -> list:
+    path, future = pending.popleft()
+    try:
+        rec_id, voiced, clips, duration, voiced_s = future.result()
+    except Exception as e:
+        stats["failed"].append((path, repr(e)))
+        return []
+    stats["files"] += 1
+    stats["audio_s"] += duration
+    stats["voiced_s"] += voiced_s
+    if not clips:
+        return [(rec_id, "")]
+    with span("batch.transcribe", audio_s=duration, fala_s=voiced_s):
+        segments, _ = pipeline.transcribe(voiced, language=language, batch_size=batch_size,
+                                          vad_filter=False, clip_timestamps=clips, without_timestamps=True)
+        text = " ".join(s.text.strip() for s in segments).strip()
+    return [(rec_id, text)]
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio_dir")
+    parser.add_argument("out", help="diretório Parquet ou arquivo .csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--flush-every", type=int, default=200)
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--compute-type", default="int8")
+    args = parser.parse_args()
+    s = transcribe_archive(args.audio_dir, args.out, args.workers, args.batch_size, args.flush_every,
+                           model_size=args.model, compute_type=args.compute_type)
+    print(f"{s['files']} gravações transcritas ({s['skipped']} já existentes, {len(s['failed'])} com falha), "
+          f"{s['audio_s'] / 3600:.2f} h de áudio ({s['voiced_s'] / 3600:.2f} h de fala) em {s.get('seconds', 0)} s "
+          f"— {s['audio_h_per_min']} h de áudio/min")
+    for path, err in s["failed"]:
+        print(f"FALHA {path}: {err}")
@@ -0,0 +1,130 @@
+import os, json
+from functools import lru_cache
+from core.normalize import normalize_text
+from core.profiles import profile_key
+from core.rules import LiteralScanner
+
+BEHAVIOR_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "customer_behavior.json")
+
+def _alternatives(alts, fields: dict) -> tuple:
+    """Alternativas de uma intenção (literal ou conjunção de literais) formatadas para o perfil e normalizadas."""
+    return tuple(frozenset(normalize_text(lit.format(**fields)) for lit in ([alt] if isinstance(alt, str) else alt))
+                 for alt in alts)
+
+def _reply(spec, fields: dict) -> tuple:
+    """Resposta pré-formatada: tupla de (limiar acima, limiar abaixo, texto), a primeira que valer é usada.
+
+    Opções com "profile" só entram se o perfil tiver aqueles valores (resolvido na compilação).
+    """
+    options = [{"text": spec}] if isinstance(spec, str) else spec
+    options = [o for o in options if all(fields[k] == v for k, v in o.get("profile", {}).items())]
+    return tuple((o.get("above"), o.get("below"), o["text"].format(**fields)) for o in options)
+
+class Transition:
+    """Transição do cliente: dispara se todas as intenções de `when` aparecem, nenhuma de `unless`, e o estado confere."""
+    __slots__ = ("index", "name", "when", "unless", "state", "stages", "set", "goto", "patience", "repetitions", "reply")
+
+    def __init__(self, index: int, spec: dict, fields: dict):
+        self.index = index
+        self.name = spec["name"]
+        self.when = frozenset(spec.get("when", ()))
+        self.unless = frozenset(spec.get("unless", ()))
+        self.state = tuple(spec.get("state", {}).items())
+        self.stages = frozenset(spec["stages"]) if "stages" in spec else None
+        self.set = tuple(spec.get("set", ()))
+        self.goto = spec.get("goto")
+        self.patience = spec.get("patience", 0)
+        self.repetitions = spec.get("repetitions", 0)
+        self.reply = _reply(spec["reply"], fields)
+
+    def fires(self, state, intents: frozenset) -> bool:
+        if not self.when <= intents or self.unless & intents:
+            return False
+        if self.stages is not None and state.stage not in self.stages:
+            return False
+        collected = state.collected_data
+        return all(getattr(collected, flag) == value for flag, value in self.state)
+
+    def apply(self, state) -> str:
+        """Atualiza o estado e devolve a resposta (escolhida pela paciência antes da transição)."""
+        text = self.reply[-1][2]
+        for above, below, option in self.reply:
+            if (above is None or state.patience > above) and (below is None or state.patience < below):
+                text = option
+                break
+        for flag in self.set:
+            setattr(state.collected_data, flag, True)
+        state.patience += self.patience
+        state.repetitions += self.repetitions
+        if self.goto:
+            state.stage = self.goto
+        return text
+
+class CompiledBehavior:
+    """Máquina de estados do cliente compilada para um perfil: scanner de intenções, tabela de despacho e respostas prontas."""
+
+    def __init__(self, spec: dict, fields: dict):
+        self.source = None  # (fields, path) quando criado por _compile, para serializar por referência
+        self.initial_stage = spec.get("initial_stage", "initial")
+        self.intents = {name: _alternatives(alts, fields) for name, alts in spec["intents"].items()}
+        self.scanner = LiteralScanner(lit for alts in self.intents.values() for alt in alts for lit in alt)
+        # literal -> intenções que ele sozinho já ativa; as que exigem conjunção são testadas à parte
+        self.by_literal = {lit: set() for lit in self.scanner.literals}
+        self.compound = {}
+        for name, alts in self.intents.items():
+            for alt in alts:
+                if len(alt) == 1:
+                    self.by_literal[next(iter(alt))].add(name)
+                else:
+                    self.compound.setdefault(name, []).append(alt)
+
+        self.transitions = [Transition(i, t, fields) for i, t in enumerate(spec["transitions"])]
+        self.fallback = Transition(len(self.transitions), spec["fallback"], fields)
+        # Cada transição entra na tabela pela primeira intenção de `when` (todas precisam estar presentes)
+        self.table = {}
+        for t in self.transitions:
+            self.table.setdefault(spec["transitions"][t.index]["when"][0], []).append(t)
+
+    def __reduce__(self):
+        if self.source is None:
+            return super().__reduce__()
+        return (_compile, self.source)
+
+    def detect(self, text: str) -> frozenset:
+        """Intenções presentes na fala (já normalizada)."""
+        found = self.scanner.found(text)
+        hits = set()
+        for lit in found:
+            hits |= self.by_literal[lit]
+        for name, alts in self.compound.items():
+            if name not in hits and any(alt <= found for alt in alts):
+                hits.add(name)
+        return frozenset(hits)
+
+    def step(self, state, intents: frozenset) -> Transition:
+        """Primeira transição (na ordem do arquivo) que dispara entre as indexadas pelas intenções presentes."""
+        best = self.fallback
+        for name in intents:
+            # Cada lista da tabela está na ordem do arquivo: basta a primeira que dispara
+            for t in self.table.get(name, ()):
+                if t.index >= best.index:
+                    break
+                if t.fires(state, intents):
+                    best = t
+                    break
+        return best
+
+@lru_cache(maxsize=None)
+def load_behavior_spec(path: str = BEHAVIOR_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+@lru_cache(maxsize=256)
+def _compile(fields: tuple, path: str) -> CompiledBehavior:
+    behavior = CompiledBehavior(load_behavior_spec(path), dict(fields))
+    behavior.source = (fields, path)
+    return behavior
+
+def behavior_for(profile, path: str = BEHAVIOR_PATH) -> CompiledBehavior:
+    """Comportamento compilado para o perfil (compartilhado por clientes com o mesmo perfil)."""
+    return _compile(profile_key(profile), path)
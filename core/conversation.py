@@ -0,0 +1,61 @@
+from array import array
+
+# Falantes internados como códigos de 1 byte; a ordem define o código
+SPEAKERS = ("cliente", "agente")
+SPEAKER_CODES = {name: code for code, name in enumerate(SPEAKERS)}
+
+class ConversationLog:
+    """Conversa em formato compacto: um código de falante e um offset por fala e um único buffer UTF-8 com todo o texto.
+
+    É a única cópia da conversa na sessão; avaliador, cliente virtual e interface leem dela.
+    Iterar produz tuplas (falante, texto), como a antiga lista de mensagens.
+    """
+    __slots__ = ("codes", "ends", "text")
+
+    def __init__(self, turns=()):
+        self.codes = array("B")
+        self.ends = array("I")
+        self.text = bytearray()
+        for speaker, message in turns:
+            self.append(speaker, message)
+
+    def append(self, speaker: str, message: str) -> int:
+        """Acrescenta uma fala e devolve seu índice."""
+        self.text += message.encode("utf-8")
+        self.codes.append(SPEAKER_CODES[speaker])
+        self.ends.append(len(self.text))
+        return len(self.codes) - 1
+
+    def __len__(self):
+        return len(self.codes)
+
+    def message(self, i: int) -> str:
+        start = self.ends[i - 1] if i > 0 else 0
+        return self.text[start:self.ends[i]].decode("utf-8")
+
+    def speaker(self, i: int) -> str:
+        return SPEAKERS[self.codes[i]]
+
+    def __getitem__(self, i: int):
+        i = range(len(self))[i]
+        return self.speaker(i), self.message(i)
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def messages(self, speaker: str):
+        """Textos das falas de um falante, em ordem."""
+        code = SPEAKER_CODES[speaker]
+        return (self.message(i) for i, c in enumerate(self.codes) if c == code)
+
+    def last(self, speaker: str) -> str:
+        """Última fala de `speaker` ("" se ainda não falou)."""
+        code = SPEAKER_CODES[speaker]
+        for i in range(len(self) - 1, -1, -1):
+            if self.codes[i] == code:
+                return self.message(i)
+        return ""
+
+    def nbytes(self) -> int:
+        """Bytes ocupados pelos buffers (texto, códigos e offsets)."""
+        return len(self.text) + self.codes.itemsize * len(self.codes) + self.ends.itemsize * len(self.ends)
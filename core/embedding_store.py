@@ -0,0 +1,193 @@
+"""Armazenamento em disco de embeddings por conteúdo: (modelo, hash do texto normalizado) -> vetor float32.
+
+Cada modelo tem um diretório com `meta.json` e segmentos append-only: `NNNNN.vec` (linhas float32
+de `dim` valores) e `NNNNN.key` (hash de 16 bytes de cada linha, na mesma ordem). As linhas são só
+acrescentadas e um texto já gravado não é gravado de novo; a compactação reescreve tudo em um segmento
+só (opcionalmente só os textos ainda em uso). Um escritor por diretório (como a retomada do
+batch_transcribe): no processo, use open_store para compartilhar a instância; os vetores são lidos
+por memmap.
+
+Textos que normalizam igual (core.normalize) compartilham o vetor.
+"""
+import os, re, json, hashlib, threading
+from functools import lru_cache
+import numpy as np
+from core.normalize import normalize_text
+
+STORE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "embeddings")
+SEGMENT_ROWS = 65536  # linhas por segmento antes de abrir o próximo
+KEY_BYTES = 16
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+def _model_dir(root: str, model_id: str) -> str:
+    return os.path.join(root, re.sub(r"[^A-Za-z0-9._-]+", "_", model_id))
+
+class EmbeddingStore:
+    """Vetores de um modelo, com leitura e gravação em lote."""
+
+    def __init__(self, model_id: str, dim: int = None, root: str = STORE_DIR, segment_rows: int = SEGMENT_ROWS):
+        self.model_id = model_id
+        self.path = _model_dir(root, model_id)
+        self.segment_rows = segment_rows
+        self.lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        meta = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta):
+            with open(meta, encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"{model_id}: dimensão {dim} diferente da gravada ({self.dim})")
+        else:
+            self.dim = dim
+            if dim is not None:
+                self._write_meta()
+        self.index = {}     # chave -> (segmento, linha)
+        self.rows = {}      # segmento -> linhas gravadas
+        self._maps = {}     # segmento -> (linhas, memmap)
+        for seg in self._segments():
+            self._load_keys(seg)
+
+    def _write_meta(self):
+        tmp = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model_id, "dim": self.dim}, f)
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+
+    def _segments(self) -> list:
+        return sorted(int(name[:-4]) for name in os.listdir(self.path) if re.fullmatch(r"\d{5}\.key", name))
+
+    def _file(self, seg: int, ext: str) -> str:
+        return os.path.join(self.path, f"{seg:05d}.{ext}")
+
+    def _load_keys(self, seg: int):
+        with open(self._file(seg, "key"), "rb") as f:
+            keys = f.read()
+        # Gravação interrompida: vale o menor número de linhas completas entre os dois arquivos,
+        # e o resto é cortado para as próximas linhas continuarem alinhadas
+        n = min(len(keys) // KEY_BYTES, os.path.getsize(self._file(seg, "vec")) // (4 * self.dim))
+        if len(keys) != n * KEY_BYTES or os.path.getsize(self._file(seg, "vec")) != n * 4 * self.dim:
+            os.truncate(self._file(seg, "key"), n * KEY_BYTES)
+            os.truncate(self._file(seg, "vec"), n * 4 * self.dim)
+        for row in range(n):
+            self.index[keys[row * KEY_BYTES:(row + 1) * KEY_BYTES]] = (seg, row)
+        self.rows[seg] = n
+
+    def _vectors(self, seg: int) -> np.ndarray:
+        """Linhas de um segmento por memmap, remapeado se o segmento cresceu."""
+        n = self.rows[seg]
+        cached = self._maps.get(seg)
+        if cached is None or cached[0] != n:
+            cached = (n, np.memmap(self._file(seg, "vec"), dtype=np.float32, mode="r", shape=(n, self.dim)))
+            self._maps[seg] = cached
+        return cached[1]
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, text: str) -> bool:
+        return text_key(text) in self.index
+
+    def get_many(self, texts) -> tuple:
+        """(vetores (n, dim), máscara dos encontrados); linhas não encontradas ficam zeradas."""
+        keys = [text_key(t) for t in texts]
+        out = np.zeros((len(keys), self.dim or 0), dtype=np.float32)
+        found = np.zeros(len(keys), dtype=bool)
+        with self.lock:
+            by_segment = {}
+            for i, key in enumerate(keys):
+                loc = self.index.get(key)
+                if loc is not None:
+                    by_segment.setdefault(loc[0], ([], []))
+                    by_segment[loc[0]][0].append(i)
+                    by_segment[loc[0]][1].append(loc[1])
+            for seg, (positions, rows) in by_segment.items():
+                out[positions] = self._vectors(seg)[rows]
+                found[positions] = True
+        return out, found
+
+    def put_many(self, texts, vectors: np.ndarray):
+        """Acrescenta os vetores dos textos ainda não gravados (repetidos no lote entram uma vez)."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self.lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._write_meta()
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"{self.model_id}: vetores com dimensão {vectors.shape[1]}, esperado {self.dim}")
+            new = {}
+            for text, row in zip(texts, range(len(vectors))):
+                key = text_key(text)
+                if key not in self.index and key not in new:
+                    new[key] = row
+            keys, rows = list(new), list(new.values())
+            start = 0
+            while start < len(keys):
+                seg = max(self.rows, default=0)
+                if not self.rows or self.rows[seg] >= self.segment_rows:
+                    seg += 1
+                    self.rows[seg] = 0
+                take = min(len(keys) - start, self.segment_rows - self.rows[seg])
+                chunk_keys, chunk_rows = keys[start:start + take], rows[start:start + take]
+                # Vetores antes das chaves: uma chave gravada sempre tem o vetor completo
+                with open(self._file(seg, "vec"), "ab") as f:
+                    f.write(vectors[chunk_rows].tobytes())
+                with open(self._file(seg, "key"), "ab") as f:
+                    f.write(b"".join(chunk_keys))
+                for offset, key in enumerate(chunk_keys):
+                    self.index[key] = (seg, self.rows[seg] + offset)
+                self.rows[seg] += take
+                start += take
+
+    def embed(self, texts, encode) -> np.ndarray:
+        """Vetores de todos os textos; `encode(lista)` só roda para os textos (distintos) que faltam."""
+        texts = list(texts)
+        if self.dim is None:
+            out, found = None, np.zeros(len(texts), dtype=bool)
+        else:
+            out, found = self.get_many(texts)
+        missing = {}
+        for i in np.flatnonzero(~found).tolist():
+            missing.setdefault(normalize_text(texts[i]), texts[i])
+        if missing:
+            fresh = list(missing.values())
+            self.put_many(fresh, encode(fresh))
+            out, _ = self.get_many(texts)
+        return out if out is not None else np.empty((0, 0), dtype=np.float32)
+
+    def compact(self, keep=None) -> int:
+        """Reescreve o armazenamento em um segmento só, sem linhas duplicadas (e só os textos de `keep`,
+        se informado). Devolve o número de linhas mantidas."""
+        with self.lock:
+            if keep is not None:
+                wanted = {text_key(t) for t in keep}
+                entries = [(k, loc) for k, loc in self.index.items() if k in wanted]
+            else:
+                entries = list(self.index.items())
+            old = self._segments()
+            seg = max(old, default=0) + 1
+            tmp_vec, tmp_key = self._file(seg, "vec") + ".tmp", self._file(seg, "key") + ".tmp"
+            with open(tmp_vec, "wb") as fv, open(tmp_key, "wb") as fk:
+                entries.sort(key=lambda e: e[1])
+                for start in range(0, len(entries), self.segment_rows):
+                    chunk = entries[start:start + self.segment_rows]
+                    by_segment = {}
+                    for key, (s, row) in chunk:
+                        by_segment.setdefault(s, []).append(row)
+                    fv.write(b"".join(self._vectors(s)[rows].tobytes() for s, rows in sorted(by_segment.items())))
+                    fk.write(b"".join(key for key, _ in chunk))
+            self._maps.clear()
+            os.replace(tmp_vec, self._file(seg, "vec"))
+            os.replace(tmp_key, self._file(seg, "key"))
+            for s in old:
+                os.remove(self._file(s, "key"))
+                os.remove(self._file(s, "vec"))
+            self.index, self.rows = {}, {}
+            self._load_keys(seg)
+            return len(self.index)
+
+@lru_cache(maxsize=None)
+def open_store(model_id: str, root: str = STORE_DIR) -> EmbeddingStore:
+    """Instância compartilhada do armazenamento de um modelo (scorer, cenários e gabarito usam a mesma)."""
+    return EmbeddingStore(model_id, root=root)
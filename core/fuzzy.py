@@ -0,0 +1,100 @@
+"""Casamento aproximado de palavras-chave, tolerante a erros de transcrição ("cargless" -> "carglass").
+
+A distância de edição é calculada com o algoritmo bit-paralelo de Myers (uma operação de inteiro por
+caractere do candidato, com a coluna inteira da tabela de programação dinâmica em um bit-vector).
+Os candidatos são janelas de palavras da fala com o número de palavras do literal, uma a mais ou uma a
+menos (o reconhecedor às vezes separa ou junta palavras: "car glass"), então o casamento aproximado
+sempre respeita limites de palavra; o resultado por janela fica em cache. A janela precisa começar pela
+mesma letra do literal: o reconhecedor raramente erra a primeira letra, e sem essa âncora palavras
+diferentes a uma edição de distância casariam ("comento" -> "momento").
+"""
+from functools import lru_cache
+
+def _peq(pattern: str) -> dict:
+    """Máscara de posições de cada caractere no padrão (bit i = pattern[i])."""
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    return peq
+
+def edit_distance(peq: dict, m: int, text: str, limit: int) -> int:
+    """Distância de Levenshtein entre o padrão (peq, m) e `text`; para cedo se já passou de `limit`."""
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    remaining = len(text)
+    for c in text:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        remaining -= 1
+        # Cada caractere restante reduz a distância em no máximo 1
+        if score - remaining > limit:
+            return score - remaining
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+class FuzzyMatcher:
+    """Literais com orçamento de erros (distância máxima), agrupados por número de palavras e tamanho."""
+    __slots__ = ("budgets", "by_words", "window_matches")
+
+    def __init__(self, budgets: dict):
+        self.budgets = {lit: k for lit, k in budgets.items() if k > 0}
+        self.by_words = {}
+        for lit, k in self.budgets.items():
+            words = lit.count(" ") + 1
+            for size in {max(1, words - 1), words, words + 1}:
+                self.by_words.setdefault(size, []).append((lit, k, _peq(lit), len(lit)))
+        self.window_matches = lru_cache(maxsize=16384)(self._window_matches)
+
+    def _window_matches(self, window: str, words: int) -> tuple:
+        n = len(window)
+        return tuple(lit for lit, k, peq, m in self.by_words[words]
+                     if abs(n - m) <= k and window[0] == lit[0] and window != lit
+                     and edit_distance(peq, m, window, k) <= k)
+
+    def scan(self, text: str, skip=frozenset()) -> dict:
+        """Ocorrências aproximadas (literal -> [(start, end)]) dos literais fora de `skip` (já achados exatos).
+
+        Janela que já é um literal achado exato não é reinterpretada como outro ("para brisa" não vira "parabrisa").
+        """
+        if not self.budgets or not text:
+            return {}
+        words, starts, pos = text.split(" "), [], 0
+        for w in words:
+            starts.append(pos)
+            pos += len(w) + 1
+        found = {}
+        for size in self.by_words:
+            for i in range(len(words) - size + 1):
+                end = starts[i + size - 1] + len(words[i + size - 1])
+                window = text[starts[i]:end]
+                if window in skip:
+                    continue
+                for lit in self.window_matches(window, size):
+                    if lit not in skip:
+                        found.setdefault(lit, []).append((starts[i], end))
+        return found
+
+def budgets_for(literals, spec: dict) -> dict:
+    """Orçamento de cada literal pela configuração "fuzzy" das regras: explícito em `literals`, senão pelo
+    tamanho (`lengths`: pares [tamanho mínimo, erros]). Literais com dígitos são sempre exatos."""
+    explicit = spec.get("literals", {})
+    lengths = sorted(spec.get("lengths", []))
+    budgets = {}
+    for lit in literals:
+        if any(c.isdigit() for c in lit):
+            continue
+        k = explicit.get(lit, max((errors for size, errors in lengths if len(lit) >= size), default=0))
+        if k:
+            budgets[lit] = k
+    return budgets
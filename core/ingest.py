@@ -0,0 +1,85 @@
+import os, time
+import pandas as pd
+
+ID_COL = "IdAnalysis"
+TEXT_COL = "Transcrição da Ligação"
+
+# Nomes alternativos vistos nas exportações -> nome canônico
+COLUMN_ALIASES = {
+    "idanalysis": ID_COL,
+    "id_analysis": ID_COL,
+    "id": ID_COL,
+    "transcrição da ligação": TEXT_COL,
+    "transcricao da ligacao": TEXT_COL,
+    "transcricao": TEXT_COL,
+    "transcrição": TEXT_COL,
+}
+
+DTYPES = {ID_COL: "string", TEXT_COL: "string"}
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza os nomes de colunas (espaços, caixa e aliases conhecidos)."""
+    rename = {}
+    for col in df.columns:
+        clean = str(col).strip().lstrip("﻿")
+        rename[col] = COLUMN_ALIASES.get(clean.lower(), clean)
+    return df.rename(columns=rename)
+
+def iter_transcripts(path: str, chunksize: int = 50_000):
+    """Lê o CSV de transcrições em blocos, com tipos fixos e colunas normalizadas."""
+    # Lê só o cabeçalho para descobrir os nomes reais antes de aplicar os dtypes
+    raw = pd.read_csv(path, nrows=0)
+    canon = normalize_columns(raw).columns
+    dtype = {r: DTYPES[c] for r, c in zip(raw.columns, canon) if c in DTYPES}
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtype):
+        chunk = normalize_columns(chunk)
+        if TEXT_COL in chunk.columns:
+            chunk[TEXT_COL] = chunk[TEXT_COL].fillna("").str.strip()
+        yield chunk
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """Hash de 64 bits por linha sobre (IdAnalysis, transcrição), usado na deduplicação."""
+    cols = [c for c in (ID_COL, TEXT_COL) if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols], index=False)
+
+def ingest_to_parquet(path: str, out_dir: str, chunksize: int = 50_000) -> dict:
+    """Converte o CSV em Parquet particionado (um arquivo por bloco), removendo linhas repetidas.
+
+    A memória de pico depende do tamanho do bloco, não do arquivo; apenas o conjunto
+    de hashes já vistos (um inteiro por linha única) cresce com a entrada.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    seen = set()
+    stats = {"rows_in": 0, "rows_out": 0, "duplicates": 0, "parts": 0}
+    start = time.perf_counter()
+
+    for chunk in iter_transcripts(path, chunksize):
+        stats["rows_in"] += len(chunk)
+        if ID_COL in chunk.columns:
+            keys = row_keys(chunk)
+            fresh = ~keys.duplicated() & ~keys.isin(seen)
+            chunk = chunk[fresh.to_numpy()]
+            seen.update(keys[fresh].tolist())
+        if chunk.empty:
+            continue
+        part = os.path.join(out_dir, f"part-{stats['parts']:05d}.parquet")
+        chunk.to_parquet(part, index=False)
+        stats["parts"] += 1
+        stats["rows_out"] += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    stats["duplicates"] = stats["rows_in"] - stats["rows_out"]
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_sec"] = round(stats["rows_in"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Ingestão de transcrições CSV -> Parquet")
+    parser.add_argument("csv")
+    parser.add_argument("out_dir")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    args = parser.parse_args()
+    s = ingest_to_parquet(args.csv, args.out_dir, args.chunksize)
+    print(f"{s['rows_in']} linhas lidas, {s['rows_out']} gravadas ({s['duplicates']} duplicadas) "
+          f"em {s['parts']} partes — {s['rows_per_sec']} linhas/s")
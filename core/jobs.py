@@ -0,0 +1,127 @@
+"""Fila de tarefas em segundo plano do processo (pós-sessão: persistência, segunda opinião, exportações).
+
+Threads de trabalho consomem uma fila de prioridade (menor número primeiro; empate na ordem de envio).
+Cada tarefa tem uma chave: enviar de novo uma chave já conhecida devolve a mesma tarefa, mesmo se falhou,
+então os reruns do Streamlit não duplicam trabalho nem repetem uma falha a cada rerun; uma tarefa com erro
+só roda de novo por `retry` (ex.: botão "Tentar novamente"). O tempo na fila e o de execução de cada
+tarefa vão para o tracer ("job.<nome>.fila" e "job.<nome>").
+"""
+import time, heapq, itertools, threading
+from collections import OrderedDict
+from core.tracing import TRACER
+
+PENDING, RUNNING, DONE, FAILED = "pendente", "executando", "concluida", "erro"
+
+class Job:
+    """Uma tarefa: estado, resultado (ou erro) e tempos."""
+    __slots__ = ("key", "name", "priority", "fn", "args", "kwargs", "status", "result", "error",
+                 "submitted", "started", "finished", "event")
+
+    def __init__(self, key, name: str, priority: int, fn, args, kwargs):
+        self.key = key
+        self.name = name
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = PENDING
+        self.result = None
+        self.error = None
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.event = threading.Event()
+
+    def done(self) -> bool:
+        return self.event.is_set()
+
+    def wait(self, timeout: float = None):
+        """Espera a tarefa terminar e devolve o resultado (ou relança o erro)."""
+        if not self.event.wait(timeout):
+            raise TimeoutError(f"tarefa {self.name} ainda {self.status}")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class JobQueue:
+    """Executor com prioridades e deduplicação por chave; guarda as últimas `keep` tarefas concluídas."""
+
+    def __init__(self, workers: int = 2, keep: int = 1024, tracer=TRACER):
+        self.tracer = tracer
+        self.keep = keep
+        self.jobs = OrderedDict()  # chave -> Job, na ordem de envio
+        self.heap = []
+        self.seq = itertools.count()
+        self.cond = threading.Condition()
+        self.threads = [threading.Thread(target=self._work, name=f"job-{i}", daemon=True) for i in range(workers)]
+        for t in self.threads:
+            t.start()
+
+    def submit(self, key, fn, *args, name: str = None, priority: int = 10, **kwargs) -> Job:
+        """Enfileira fn(*args, **kwargs) sob `key`; se a chave já existe (mesmo com erro), devolve a tarefa existente."""
+        with self.cond:
+            job = self.jobs.get(key)
+            if job is not None:
+                return job
+            return self._enqueue(Job(key, name or getattr(fn, "__name__", "job"), priority, fn, args, kwargs))
+
+    def retry(self, key):
+        """Roda de novo uma tarefa que falhou, com os mesmos argumentos; devolve a tarefa (nova ou a atual)."""
+        with self.cond:
+            job = self.jobs.get(key)
+            if job is None or job.status != FAILED:
+                return job
+            return self._enqueue(Job(key, job.name, job.priority, job.fn, job.args, job.kwargs))
+
+    def _enqueue(self, job: Job) -> Job:
+        """Registra e enfileira (chamado com o lock)."""
+        self.jobs[job.key] = job
+        self.jobs.move_to_end(job.key)
+        heapq.heappush(self.heap, (job.priority, next(self.seq), job))
+        self._evict()
+        self.cond.notify()
+        return job
+
+    def get(self, key):
+        with self.cond:
+            return self.jobs.get(key)
+
+    def discard(self, key):
+        """Esquece a tarefa (se ainda pendente, não roda mais)."""
+        with self.cond:
+            job = self.jobs.pop(key, None)
+            if job is not None and job.status == PENDING:
+                job.status = FAILED
+                job.error = RuntimeError("tarefa descartada")
+                job.event.set()
+
+    def pending(self) -> int:
+        with self.cond:
+            return sum(job.status in (PENDING, RUNNING) for job in self.jobs.values())
+
+    def _evict(self):
+        """Remove as concluídas mais antigas além de `keep` (chamado com o lock)."""
+        excess = len(self.jobs) - self.keep
+        for key in [k for k, j in self.jobs.items() if j.done()][:max(0, excess)]:
+            del self.jobs[key]
+
+    def _work(self):
+        while True:
+            with self.cond:
+                while not self.heap:
+                    self.cond.wait()
+                _, _, job = heapq.heappop(self.heap)
+                if job.status != PENDING:
+                    continue
+                job.status = RUNNING
+                job.started = time.perf_counter()
+            self.tracer.record(f"job.{job.name}.fila", job.started - job.submitted, 0.0, priority=job.priority)
+            try:
+                with self.tracer.span(f"job.{job.name}"):
+                    job.result = job.fn(*job.args, **job.kwargs)
+                job.status = DONE
+            except Exception as e:
+                job.error = e
+                job.status = FAILED
+            job.finished = time.perf_counter()
+            job.event.set()
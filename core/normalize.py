@@ -0,0 +1,180 @@
+"""Normalização de texto pt-BR compartilhada por todos os casadores (checklist, cliente virtual, cenários, turnos).
+
+Etapas, na ordem:
+  1. NFC e placas na grafia original ("ABC-1234", "ABC 1D23" -> "ABC1234", "ABC1D23");
+  2. tabela `str.translate` pré-calculada: minúsculas, acentos removidos (NFKD) e pontuação -> espaço,
+     sempre um caractere por outro;
+  3. espaços colapsados;
+  4. números ditados por extenso em sequências de 3 ou mais, unidos ("um dois três" -> "123");
+  5. grupos de dígitos separados por espaço/ponto/hífen unidos quando têm o formato de CPF, CNPJ,
+     telefone ou CEP ("123.456.789-10" -> "12345678910"); outros números ficam separados ("ano 2016 15 cm").
+
+Os padrões (literais das regras) passam pela mesma função que as falas. `normalize` guarda, para cada
+caractere do texto normalizado, a posição de origem na fala, para que as evidências continuem apontando
+para o texto exibido.
+"""
+import re, unicodedata
+from functools import lru_cache
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+def _build_table() -> dict:
+    table = {ord(c): " " for c in "\t\n\r\x0b\x0c"}
+    ranges = [range(0x20, 0x2B0), range(0x2000, 0x2070), range(0x20A0, 0x20D0)]
+    for cp in (cp for r in ranges for cp in r):
+        c = chr(cp)
+        if unicodedata.category(c)[0] in "PSZ":
+            table[cp] = " "
+            continue
+        base = "".join(ch for ch in unicodedata.normalize("NFKD", c) if not unicodedata.combining(ch)).lower()
+        # Só substituições de um caractere: o texto mantém o tamanho e os offsets continuam valendo.
+        # Latin-1 só vira Latin-1, para a mesma tabela servir em bytes (_fold)
+        if len(base) == 1 and base != c and (cp > 0xFF or ord(base) <= 0xFF):
+            table[cp] = base
+    del table[ord(" ")]
+    return table
+
+TABLE = _build_table()
+_LATIN1 = bytes(ord(TABLE.get(cp, chr(cp))) for cp in range(256))
+
+def _fold(text: str) -> str:
+    """Aplica TABLE; texto em Latin-1 (o caso comum, e sempre já em NFC) usa bytes.translate,
+    bem mais rápido que str.translate."""
+    try:
+        return text.encode("latin-1").translate(_LATIN1).decode("latin-1")
+    except UnicodeEncodeError:
+        return unicodedata.normalize("NFC", text).translate(TABLE)
+
+DIGIT_WORDS = {"zero": "0", "um": "1", "uma": "1", "dois": "2", "duas": "2", "tres": "3", "quatro": "4",
+               "cinco": "5", "seis": "6", "meia": "6", "sete": "7", "oito": "8", "nove": "9"}
+_TOKEN = r"(?:\d+|" + "|".join(DIGIT_WORDS) + ")"
+
+# Placa antiga ou Mercosul; separada por espaço só em maiúsculas ("ano 2016" não é placa)
+_PLATE = re.compile(r"\b([A-Za-z]{3})-(\d[A-Za-z0-9]\d{2})\b|\b([A-Z]{3}) (\d[A-Z0-9]\d{2})\b")
+_SPACES = re.compile(r"^ +| +$| {2,}")
+_SPELLED = re.compile(rf"\b{_TOKEN}(?: {_TOKEN}){{2,}}\b")
+_DIGIT_GROUPS = re.compile(r"\b\d+(?: \d+)+\b")
+# Tamanhos dos grupos de cada formato: CPF (também ditado 3-3-5), CNPJ, telefone com e sem DDD, CEP
+_GROUP_FORMATS = {(3, 3, 3, 2), (3, 3, 5), (2, 3, 3, 4, 2), (4, 4), (5, 4), (2, 4, 4), (2, 5, 4), (5, 3)}
+
+def _plate(m: re.Match) -> str:
+    return (m.group(1) or m.group(3)) + (m.group(2) or m.group(4))
+
+def _space(m: re.Match) -> str:
+    return " " if m.start() and m.end() < len(m.string) else ""
+
+def _spelled(m: re.Match) -> str:
+    tokens = m.group().split(" ")
+    # Só dígitos ("3 2 1"): não é ditado por extenso, fica para _digits decidir pelo formato
+    if all(t.isdigit() for t in tokens):
+        return m.group()
+    return "".join(DIGIT_WORDS.get(t, t) for t in tokens)
+
+def _digits(m: re.Match) -> str:
+    groups = m.group().split(" ")
+    if tuple(len(g) for g in groups) not in _GROUP_FORMATS:
+        return m.group()
+    return "".join(groups)
+
+_STEPS = ((_SPACES, _space), (_SPELLED, _spelled), (_DIGIT_GROUPS, _digits))
+
+class NormalizedText:
+    """Texto normalizado e, se o tamanho mudou, a posição de origem de cada caractere."""
+    __slots__ = ("text", "origin", "source")
+
+    def __init__(self, text: str, origin: list = None, source: str = ""):
+        self.text = text
+        self.origin = origin  # None: mesma posição do original
+        self.source = source
+
+    def span(self, start: int, end: int) -> tuple:
+        """Offsets [start, end) no texto normalizado -> offsets no texto original."""
+        if self.origin is None or start >= end:
+            return start, end
+        end = self.origin[end - 1] + 1
+        # Um caractere composto (NFC) termina depois dos acentos combinantes da fala original
+        while end < len(self.source) and unicodedata.combining(self.source[end]):
+            end += 1
+        return self.origin[start], end
+
+    def __str__(self):
+        return self.text
+
+def _sub(regex: re.Pattern, repl, text: str, origin: list):
+    """re.sub que mantém o mapa de origem; trechos trocados herdam a origem do início e do fim do casamento."""
+    pieces, mapped, pos = [], [], 0
+    for m in regex.finditer(text):
+        s, e = m.span()
+        new = repl(m)
+        if new == m.group():
+            continue
+        pieces += [text[pos:s], new]
+        mapped += origin[pos:s] if origin is not None else range(pos, s)
+        if new:
+            first = origin[s] if origin is not None else s
+            last = origin[e - 1] if origin is not None else e - 1
+            mapped += [first] * (len(new) - 1) + [last]
+        pos = e
+    if not pieces:
+        return text, origin
+    pieces.append(text[pos:])
+    mapped += origin[pos:] if origin is not None else range(pos, len(text))
+    return "".join(pieces), mapped
+
+def _compose(text: str):
+    """NFC mantendo o mapa de origem: cada caractere composto aponta para o início do seu grupo
+    (caractere base + acentos combinantes) na fala original."""
+    if unicodedata.is_normalized("NFC", text):
+        return text, None
+    pieces, origin, start = [], [], 0
+    for i in range(1, len(text) + 1):
+        if i < len(text) and unicodedata.combining(text[i]):
+            continue
+        composed = unicodedata.normalize("NFC", text[start:i])
+        pieces.append(composed)
+        origin += [start] * len(composed)
+        start = i
+    return "".join(pieces), origin
+
+@lru_cache(maxsize=8192)
+def normalize(text: str) -> NormalizedText:
+    """Normaliza uma fala (resultado em cache: avaliação e cliente virtual normalizam a mesma fala)."""
+    if not text:
+        return NormalizedText("")
+    source = text
+    text, origin = _compose(text)
+    text, origin = _sub(_PLATE, _plate, text, origin)
+    text = _fold(text)
+    for regex, repl in _STEPS:
+        text, origin = _sub(regex, repl, text, origin)
+    return NormalizedText(text, origin, source)
+
+def normalize_text(text: str) -> str:
+    """Só o texto normalizado (padrões, chaves de busca)."""
+    return normalize(text).text
+
+def _numbers(text: str) -> str:
+    return _DIGIT_GROUPS.sub(_digits, _SPELLED.sub(_spelled, text))
+
+def _fold_spaces(text: str) -> str:
+    text = _fold(text)
+    while "  " in text:
+        text = text.replace("  ", " ")
+    return text.strip(" ")
+
+# Versão RE2 dos padrões de placa e de números, para os kernels do Arrow
+_ARROW_PLATE = r"\b([A-Za-z]{3})-(\d[A-Za-z0-9]\d{2})\b|\b([A-Z]{3}) (\d[A-Z0-9]\d{2})\b"
+_ARROW_NUMBERS = rf"\d \d|\b{_TOKEN}(?: {_TOKEN}){{2,}}\b"
+
+def normalize_series(texts: pd.Series) -> pd.Series:
+    """Normaliza uma coluna inteira: placas e busca de números nos kernels do Arrow, tabela de tradução
+    por linha, e as etapas de números em Python só nas linhas que têm números. Mesmo resultado de normalize_text."""
+    arr = pc.fill_null(pa.array(texts, type=pa.string(), from_pandas=True), "")
+    arr = pc.replace_substring_regex(arr, _ARROW_PLATE, r"\1\3\2\4")
+    folded = [_fold_spaces(t) for t in arr.to_numpy(zero_copy_only=False)]
+    numbers = pc.match_substring_regex(pa.array(folded, type=pa.string()), _ARROW_NUMBERS).to_numpy(zero_copy_only=False)
+    out = pd.Series(folded, index=texts.index, dtype=object)
+    if numbers.any():
+        out[numbers] = [_numbers(t) for t in out[numbers]]
+    return out.astype("string")
@@ -0,0 +1,121 @@
+"""Encoder de sentenças em ONNX Runtime com o modelo quantizado em int8, sem importar torch.
+
+Mesmo modelo do caminho padrão (MODEL_NAME, mean pooling, vetores normalizados), exportado uma vez com
+`python -m core.onnx_encoder --export` (essa etapa precisa de torch e transformers). Para inferência só
+são usados onnxruntime e tokenizers. As frases são ordenadas pelo número de tokens e agrupadas em lotes
+com orçamento de tokens, cada lote preenchido só até o maior comprimento dele.
+
+Uso no app: VOICE_COACH_EMBEDDINGS=onnx (ver core.scenario_index).
+"""
+import os, argparse
+import numpy as np
+from core.scenario_index import MODEL_NAME
+
+ONNX_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "onnx", "paraphrase-multilingual-MiniLM-L12-v2")
+MAX_LENGTH = 128        # max_seq_length do modelo no sentence-transformers
+MAX_BATCH_TOKENS = 8192 # orçamento de tokens (lote x comprimento preenchido) por chamada ao runtime
+
+def export(model_name: str = MODEL_NAME, out_dir: str = ONNX_DIR, opset: int = 14) -> str:
+    """Exporta o transformer para ONNX (eixos de lote e sequência dinâmicos) e quantiza os pesos em int8."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+
+    sample = tokenizer(["exportação do modelo"], return_tensors="pt")
+    fp32 = os.path.join(out_dir, "model.onnx")
+    axes = {0: "batch", 1: "tokens"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (sample["input_ids"], sample["attention_mask"]), fp32,
+            input_names=["input_ids", "attention_mask"], output_names=["last_hidden_state"],
+            dynamic_axes={"input_ids": axes, "attention_mask": axes, "last_hidden_state": axes},
+            opset_version=opset,
+        )
+    int8 = os.path.join(out_dir, "model.int8.onnx")
+    quantize_dynamic(fp32, int8, weight_type=QuantType.QInt8)
+    return int8
+
+def length_batches(lengths: np.ndarray, batch_size: int, max_tokens: int = MAX_BATCH_TOKENS) -> list:
+    """Índices das frases agrupados por comprimento: lotes de até `batch_size` frases cujo preenchimento
+    (frases x maior comprimento do lote) cabe em `max_tokens`."""
+    batches, current = [], []
+    # Em ordem crescente, a frase que entra é sempre a mais longa do lote
+    for i in np.argsort(lengths, kind="stable").tolist():
+        if current and (len(current) == batch_size or (len(current) + 1) * int(lengths[i]) > max_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+class OnnxEncoder:
+    """Substituto do SentenceTransformer para `encode` (mesma assinatura usada por embed_texts)."""
+
+    def __init__(self, model_dir: str = ONNX_DIR, threads: int = None, max_length: int = MAX_LENGTH,
+                 max_tokens: int = MAX_BATCH_TOKENS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length)
+        self.pad_id = self.tokenizer.token_to_id("<pad>") or 0
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, "model.int8.onnx"), options,
+                                            providers=["CPUExecutionProvider"])
+        self.inputs = {i.name for i in self.session.get_inputs()}
+        self.max_tokens = max_tokens
+
+    def _run(self, ids: list) -> np.ndarray:
+        """Mean pooling da última camada para um lote, preenchido até o maior comprimento do lote."""
+        width = max(len(x) for x in ids)
+        input_ids = np.full((len(ids), width), self.pad_id, dtype=np.int64)
+        mask = np.zeros((len(ids), width), dtype=np.int64)
+        for row, x in enumerate(ids):
+            input_ids[row, :len(x)] = x
+            mask[row, :len(x)] = 1
+        feed = {"input_ids": input_ids, "attention_mask": mask}
+        if "token_type_ids" in self.inputs:
+            feed["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, feed)[0]
+        weights = mask[:, :, None].astype(np.float32)
+        return (hidden * weights).sum(axis=1) / weights.sum(axis=1).clip(min=1e-9)
+
+    def encode(self, sentences, batch_size: int = 64, normalize_embeddings: bool = True, **_) -> np.ndarray:
+        sentences = list(sentences)
+        if not sentences:
+            return np.empty((0, 0), dtype=np.float32)
+        ids = [e.ids for e in self.tokenizer.encode_batch(sentences)]
+        lengths = np.fromiter(map(len, ids), dtype=np.int64, count=len(ids))
+        out = None
+        for batch in length_batches(lengths, batch_size, self.max_tokens):
+            vecs = self._run([ids[i] for i in batch])
+            if out is None:
+                out = np.empty((len(sentences), vecs.shape[1]), dtype=np.float32)
+            out[batch] = vecs
+        if normalize_embeddings:
+            out /= np.linalg.norm(out, axis=1, keepdims=True).clip(min=1e-12)
+        return out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--export", action="store_true", help="exporta e quantiza o modelo em --out")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--out", default=ONNX_DIR)
+    args = parser.parse_args()
+    if args.export:
+        print(export(args.model, args.out))
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os, json, threading, dataclasses
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "profile_catalog.json")
+
+@dataclass(slots=True)
+class CustomerProfile:
+    """Perfil do cliente para simulação"""
+    name: str = "João Silva"
+    cpf: str = "123.456.789-10"
+    phone1: str = "11-99999-8888"
+    phone2: str = "11-97777-6666"
+    plate: str = "ABC-1234"
+    car: str = "Honda Civic 2020"
+    address: str = "Rua das Flores, 123 - Vila Olímpia, São Paulo/SP"
+    insurance: str = "Porto Seguro"
+    problem: str = "trinca no para-brisa de 15cm"
+    problem_date: str = "ontem"
+    has_special: bool = False  # LED/Xenon
+    city: str = "São Paulo"
+    neighborhood: str = "Vila Olímpia"
+
+def profile_fields(profile: CustomerProfile) -> dict:
+    """Campos do perfil para templates e padrões, mais as variantes com que o atendente costuma repetir os dados."""
+    values = {f.name: getattr(profile, f.name) for f in dataclasses.fields(profile)}
+    phone1, phone2 = profile.phone1.split("-"), profile.phone2.split("-")
+    values.update(
+        cpf_digits="".join(c for c in profile.cpf if c.isdigit()),
+        cpf_prefix=profile.cpf[:7],
+        phone1_prefix=profile.phone1[:8],
+        phone1_local=phone1[1] if len(phone1) > 1 else profile.phone1,
+        phone1_suffix=phone1[-1],
+        phone2_local=phone2[1] if len(phone2) > 1 else profile.phone2,
+        plate_compact=profile.plate.replace("-", ""),
+        plate_spaced=profile.plate.replace("-", " "),
+    )
+    return values
+
+def profile_key(profile: CustomerProfile) -> tuple:
+    """Chave hashable do perfil, usada nos caches de regras e comportamento compilados."""
+    return tuple(sorted(profile_fields(profile).items()))
+
+@lru_cache(maxsize=None)
+def load_catalog(path: str = CATALOG_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _ascii(codes: np.ndarray) -> np.ndarray:
+    """Matriz (n, largura) de códigos ASCII -> array de strings, sem laço em Python."""
+    codes = np.ascontiguousarray(codes, dtype=np.uint8)
+    return codes.view(f"S{codes.shape[1]}").ravel().astype(str)
+
+def _cpfs(rng: np.random.Generator, n: int) -> np.ndarray:
+    """CPFs com dígitos verificadores válidos, no formato 000.000.000-00."""
+    base = rng.integers(0, 10, (n, 9))
+    # Sequências repetidas (111.111.111-11 etc.) são inválidas
+    same = (base == base[:, :1]).all(axis=1)
+    base[same, 0] = (base[same, 0] + 1) % 10
+    d1 = (base @ np.arange(10, 1, -1)) % 11
+    d1 = np.where(d1 < 2, 0, 11 - d1)
+    d2 = (np.column_stack([base, d1]) @ np.arange(11, 1, -1)) % 11
+    d2 = np.where(d2 < 2, 0, 11 - d2)
+    digits = np.column_stack([base, d1, d2]) + ord("0")
+    out = np.empty((n, 14), dtype=np.uint8)
+    out[:, [0, 1, 2, 4, 5, 6, 8, 9, 10, 12, 13]] = digits
+    out[:, [3, 7]] = ord(".")
+    out[:, 11] = ord("-")
+    return _ascii(out)
+
+def _phones(rng: np.random.Generator, ddd: np.ndarray) -> np.ndarray:
+    """Celulares no formato DD-9XXXX-XXXX."""
+    n = len(ddd)
+    out = np.empty((n, 13), dtype=np.uint8)
+    out[:, 0] = ddd // 10 + ord("0")
+    out[:, 1] = ddd % 10 + ord("0")
+    out[:, [2, 8]] = ord("-")
+    out[:, 3] = ord("9")
+    out[:, [4, 5, 6, 7, 9, 10, 11, 12]] = rng.integers(0, 10, (n, 8)) + ord("0")
+    return _ascii(out)
+
+def _plates(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Placas no padrão antigo (ABC-1234) ou Mercosul (ABC1D23), meio a meio."""
+    letters = rng.integers(0, 26, (n, 4)) + ord("A")
+    digits = rng.integers(0, 10, (n, 4)) + ord("0")
+    old = np.empty((n, 8), dtype=np.uint8)
+    old[:, :3] = letters[:, :3]
+    old[:, 3] = ord("-")
+    old[:, 4:] = digits
+    mercosul = np.column_stack([letters[:, :3], digits[:, 0], letters[:, 3], digits[:, 1:3]])
+    return np.where(rng.random(n) < 0.5, _ascii(old), _ascii(mercosul))
+
+def generate_profiles(n: int, seed=None, catalog: dict = None) -> dict:
+    """Gera `n` perfis em formato colunar (um array por campo do CustomerProfile)."""
+    rng = np.random.default_rng(seed)
+    catalog = catalog or load_catalog()
+    pick = lambda values: np.asarray(values)[rng.integers(0, len(values), n)]
+
+    hoods = catalog["neighborhoods"]
+    hood_idx = rng.integers(0, len(hoods), n)
+    neighborhood = np.asarray([h[0] for h in hoods])[hood_idx]
+    city = np.asarray([h[1] for h in hoods])[hood_idx]
+    uf = np.asarray([h[2] for h in hoods])[hood_idx]
+    ddd = np.asarray([h[3] for h in hoods])[hood_idx]
+
+    add = np.char.add
+    first, last = pick(catalog["first_names"]), pick(catalog["last_names"])
+    number = np.char.mod("%d", rng.integers(1, 3000, n))
+    y0, y1 = catalog["car_years"]
+    return {
+        "name": add(add(first, " "), last),
+        "cpf": _cpfs(rng, n),
+        "phone1": _phones(rng, ddd),
+        "phone2": _phones(rng, ddd),
+        "plate": _plates(rng, n),
+        "car": add(add(pick(catalog["cars"]), " "), np.char.mod("%d", rng.integers(y0, y1 + 1, n))),
+        "address": add(add(add(add(add(add(add(add(pick(catalog["streets"]), ", "), number), " - "),
+                                   neighborhood), ", "), city), "/"), uf),
+        "insurance": pick(catalog["insurers"]),
+        "problem": pick(catalog["problems"]),
+        "problem_date": pick(catalog["problem_dates"]),
+        "has_special": rng.random(n) < catalog["special_rate"],
+        "city": city,
+        "neighborhood": neighborhood,
+    }
+
+class ProfilePool:
+    """Perfis pré-gerados em lotes; cada nova sessão tira o próximo (reprodutível com `seed`)."""
+
+    def __init__(self, batch_size: int = 1024, seed=None):
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.lock = threading.Lock()
+        self._refill()
+
+    def _refill(self):
+        self.columns = generate_profiles(self.batch_size, self.rng)
+        self.pos = 0
+
+    def draw(self) -> CustomerProfile:
+        with self.lock:
+            if self.pos >= self.batch_size:
+                self._refill()
+            i = self.pos
+            self.pos += 1
+            return CustomerProfile(**{name: col[i].item() for name, col in self.columns.items()})
@@ -0,0 +1,84 @@
+"""Prosódia e ritmo de fala medidos no áudio já decodificado para a transcrição.
+
+Tudo sai do mesmo buffer e da mesma energia por janela do VAD (core.vad), sem decodificar de novo:
+  - início da fala: primeira janela acima do limiar (item 1, "atendeu em 5s");
+  - energia e tom (F0 por autocorrelação, calculada por FFT de uma vez na matriz de janelas com fala);
+  - pausas: trechos sem fala de MIN_PAUSE_MS ou mais entre a primeira e a última janela com fala;
+  - ritmo: palavras e sílabas pelos tempos dos segmentos do Whisper.
+Os valores entram no checklist como sinais de áudio (seção "audio" dos sinais em checklist_rules.json).
+"""
+import re
+import numpy as np
+from core.normalize import normalize_text
+from core.vad import MIN_PAUSE_MS, VadResult, _runs
+
+F0_MIN, F0_MAX = 75.0, 400.0   # faixa de tom da voz falada
+MIN_CLARITY = 0.5               # pico da autocorrelação normalizada para a janela contar como vozeada
+_SYLLABLE = re.compile(r"[aeiou]+")
+
+def pitch_track(audio: np.ndarray, vad: VadResult) -> np.ndarray:
+    """F0 (Hz) de cada janela com fala e periódica, na ordem do áudio."""
+    n, sr = vad.frame_len, vad.sr
+    full = len(audio) // n if n else 0
+    idx = np.flatnonzero(vad.energy[:full] > vad.threshold)
+    lo, hi = int(sr / F0_MAX), min(n - 1, int(np.ceil(sr / F0_MIN)))
+    if not len(idx) or hi <= lo + 1:
+        return np.empty(0, dtype=np.float32)
+    frames = audio[:full * n].reshape(full, n)[idx]
+    frames = frames - frames.mean(axis=1, keepdims=True)
+    size = 1 << (2 * n - 1).bit_length()
+    spectrum = np.fft.rfft(frames, size, axis=1)
+    ac = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, size, axis=1)[:, :hi + 2]
+    ac /= ac[:, :1] + 1e-10
+    lag = lo + np.argmax(ac[:, lo:hi + 1], axis=1)
+    rows = np.arange(len(lag))
+    peak = ac[rows, lag]
+    # Interpolação parabólica em volta do pico: tom com resolução melhor que uma amostra
+    a, c = ac[rows, lag - 1], ac[rows, lag + 1]
+    denom = a - 2 * peak + c
+    shift = np.where(denom < 0, 0.5 * (a - c) / np.where(denom < 0, denom, 1), 0.0)
+    f0 = sr / (lag + shift)
+    return f0[peak >= MIN_CLARITY].astype(np.float32)
+
+def speech_rate(segments) -> tuple:
+    """(palavras por minuto, sílabas por segundo) pelos segmentos (start, end, texto) do Whisper."""
+    seconds = sum(max(0.0, end - start) for start, end, _ in segments)
+    if seconds <= 0:
+        return None, None
+    texts = [normalize_text(text) for _, _, text in segments]
+    words = sum(len(t.split()) for t in texts)
+    syllables = sum(len(_SYLLABLE.findall(t)) for t in texts)
+    return 60 * words / seconds, syllables / seconds
+
+def prosody_features(audio: np.ndarray, vad: VadResult, segments=()) -> dict:
+    """Medidas de prosódia e ritmo do áudio (None quando não há fala para medir)."""
+    features = dict.fromkeys(("inicio_fala_s", "energia_media_db", "energia_desvio_db", "tom_mediano_hz",
+                              "variacao_tom_st", "fracao_vozeada", "fracao_pausa", "pausas_min",
+                              "pausa_media_s", "palavras_min", "silabas_s"))
+    voiced = vad.energy > vad.threshold
+    runs = _runs(voiced)
+    if len(runs):
+        frame_s = vad.frame_len / vad.sr
+        first, last = runs[0, 0], runs[-1, 1]
+        gaps = (runs[1:, 0] - runs[:-1, 1]) * frame_s
+        pauses = gaps[gaps * 1000 >= MIN_PAUSE_MS]
+        span_s = (last - first) * frame_s
+        energy = vad.energy[voiced]
+        features.update(
+            inicio_fala_s=float(first * frame_s),
+            energia_media_db=float(energy.mean()),
+            energia_desvio_db=float(energy.std()),
+            fracao_pausa=float(pauses.sum() / span_s),
+            pausas_min=float(60 * len(pauses) / span_s),
+            pausa_media_s=float(pauses.mean()) if len(pauses) else 0.0,
+        )
+        f0 = pitch_track(audio, vad)
+        if len(f0):
+            median = float(np.median(f0))
+            features.update(
+                tom_mediano_hz=median,
+                variacao_tom_st=float((12 * np.log2(f0 / median)).std()),
+                fracao_vozeada=len(f0) / int(voiced.sum()),
+            )
+    features["palavras_min"], features["silabas_s"] = speech_rate(segments)
+    return features
@@ -0,0 +1,174 @@
+"""Limite de taxa global do processo para as chamadas externas (LLM, TTS, embeddings) e coalescência.
+
+Cada endpoint tem um token bucket (`rate` chamadas por segundo, rajada de até `burst`), definido em
+data/rate_limits.json. Quem espera por um token é atendido pela ordem de espera da sessão: `since`
+é quando a sessão começou a esperar a resposta (ex.: o envio da fala), então quem espera há mais tempo
+passa na frente. Chamadas idênticas em andamento (mesma chave) compartilham uma única requisição.
+Um 429 do provedor esvazia o bucket pelo Retry-After e a chamada é repetida. Os clientes do SDK da OpenAI
+são criados com max_retries=0: as retentativas do SDK não passariam pelo bucket nem o pausariam.
+"""
+import os, json, time, heapq, itertools, threading
+from functools import lru_cache
+from core.tracing import TRACER
+
+LIMITS_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "rate_limits.json")
+MAX_RETRIES = 4
+
+class TokenBucket:
+    """Bucket de tokens reabastecido continuamente; não é thread-safe (o RateLimiter protege)."""
+    __slots__ = ("rate", "burst", "tokens", "stamp")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self, now: float) -> float:
+        """Consome um token e devolve 0, ou devolve quantos segundos faltam para haver um."""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds: float, now: float):
+        """Provedor pediu para esperar: nenhum token antes de `seconds`."""
+        self._refill(now)
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+class _Flight:
+    """Chamada em andamento compartilhada por quem pediu a mesma chave."""
+    __slots__ = ("event", "result", "error", "waiters")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+def retry_after(exc: Exception):
+    """Segundos de espera se a exceção é um 429 (OpenAI, requests, urllib), senão None."""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(response, "headers", None) or getattr(exc, "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after") or headers.get("Retry-After") or 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+
+class RateLimiter:
+    """Token buckets por endpoint, fila por tempo de espera e single-flight por chave."""
+
+    def __init__(self, budgets: dict, tracer=TRACER):
+        self.tracer = tracer
+        self.cond = threading.Condition()
+        self.buckets = {name: TokenBucket(b["rate"], b.get("burst", 1)) for name, b in budgets.items()}
+        self.queues = {name: [] for name in budgets}
+        self.flights = {}
+        self.seq = itertools.count()
+        self.stats = dict(chamadas=0, coalescidas=0, limitadas=0, espera_s=0.0)
+
+    def _acquire(self, endpoint: str, since: float):
+        """Bloqueia até o endpoint ter um token e esta chamada ser a que espera há mais tempo."""
+        bucket, queue = self.buckets[endpoint], self.queues[endpoint]
+        entry = (since, next(self.seq))
+        with self.cond:
+            heapq.heappush(queue, entry)
+            while True:
+                if queue[0] == entry:
+                    wait = bucket.take(time.monotonic())
+                    if not wait:
+                        heapq.heappop(queue)
+                        self.cond.notify_all()
+                        return
+                else:
+                    wait = None
+                self.cond.wait(wait)
+
+    def call(self, endpoint: str, key, fn, *args, since: float = None, **kwargs):
+        """fn(*args, **kwargs) dentro do orçamento de `endpoint`; chamadas com a mesma `key` em andamento
+        recebem o mesmo resultado (key=None: sem coalescência). Endpoints sem orçamento passam direto."""
+        since = time.monotonic() if since is None else since
+        if key is not None:
+            with self.cond:
+                flight = self.flights.get((endpoint, key))
+                follower = flight is not None
+                if follower:
+                    flight.waiters += 1
+                    self.stats["coalescidas"] += 1
+                else:
+                    self.flights[(endpoint, key)] = _Flight()
+            if follower:
+                flight.event.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+        try:
+            result = self._call(endpoint, fn, args, kwargs, since)
+        except Exception as e:
+            if key is not None:
+                self._land(endpoint, key, None, e)
+            raise
+        if key is not None:
+            self._land(endpoint, key, result, None)
+        return result
+
+    def _land(self, endpoint: str, key, result, error):
+        with self.cond:
+            flight = self.flights.pop((endpoint, key))
+        flight.result, flight.error = result, error
+        flight.event.set()
+
+    def _call(self, endpoint: str, fn, args, kwargs, since: float):
+        if endpoint not in self.buckets:
+            return fn(*args, **kwargs)
+        for attempt in range(MAX_RETRIES + 1):
+            t0 = time.monotonic()
+            self._acquire(endpoint, since)
+            waited = time.monotonic() - t0
+            self.tracer.record(f"ratelimit.{endpoint}.espera", waited, 0.0)
+            with self.cond:
+                self.stats["chamadas"] += 1
+                self.stats["espera_s"] += waited
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                delay = retry_after(e)
+                if delay is None or attempt == MAX_RETRIES:
+                    raise
+                with self.cond:
+                    self.stats["limitadas"] += 1
+                    self.buckets[endpoint].pause(delay, time.monotonic())
+                    self.cond.notify_all()
+
+@lru_cache(maxsize=None)
+def load_budgets(path: str = LIMITS_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+_LIMITER = None
+_LOCK = threading.Lock()
+
+def configure(budgets: dict = None) -> RateLimiter:
+    """Troca o limitador do processo (budgets=None: data/rate_limits.json; {}: sem limite, só coalescência,
+    como nos benchmarks com dublês locais)."""
+    global _LIMITER
+    with _LOCK:
+        _LIMITER = RateLimiter(load_budgets() if budgets is None else budgets)
+        return _LIMITER
+
+def limiter() -> RateLimiter:
+    """Limitador compartilhado pelo processo (todas as sessões do Streamlit)."""
+    global _LIMITER
+    # Verifica e cria sob o mesmo lock: duas sessões no primeiro acesso não criam dois limitadores
+    with _LOCK:
+        if _LIMITER is None:
+            _LIMITER = RateLimiter(load_budgets())
+        return _LIMITER
@@ -0,0 +1,156 @@
+"""Segunda opinião da nota por vizinhos mais próximos no gabarito (ligações de referência já avaliadas).
+
+Cada entrada do gabarito tem o embedding da ligação (OpenAI, 1536 dimensões), a pontuação esperada e o
+checklist item a item. A sessão é embedada no mesmo espaço (o texto do gabarito não está completo no
+arquivo, então não dá para reembedar as referências com o modelo local) e comparada com todas as
+referências em um produto de matrizes. A nota prevista e a probabilidade de cada item são médias das
+k referências mais próximas, com pesos softmax(similaridade / temperatura): as similaridades do
+modelo ficam concentradas em uma faixa estreita (0.8-0.95), e o peso linear seria quase uniforme.
+
+Uso em lote: python -m core.reference_scorer transcricoes.csv --out previsoes.csv
+"""
+import os, pickle, argparse
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from core.embedding_store import open_store
+from core.ratelimit import limiter
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+GABARITO_PATHS = (os.path.join(ROOT, "data", "gabarito_embeddings.pkl"),
+                  os.path.join(ROOT, "gabarito_embeddings.pkl"),
+                  os.path.join(ROOT, "gabarito_embeddings (1).pkl"))
+REFERENCE_MODEL = "text-embedding-ada-002"  # modelo que gerou os vetores do gabarito (1536 dimensões)
+MAX_CHARS = 20000                           # cabe no limite de tokens do modelo de embeddings
+
+def find_gabarito():
+    """Primeiro arquivo de gabarito existente, ou None."""
+    return next((p for p in GABARITO_PATHS if os.path.exists(p)), None)
+
+class ReferenceSet:
+    """Gabarito em arrays: vetores normalizados, pontuação esperada e checklist (referências x itens)."""
+    __slots__ = ("ids", "vectors", "scores", "items", "checklist", "previews")
+
+    def __init__(self, entries: list):
+        keys = sorted({k for e in entries for k in e["metadata"]["checklist"]}, key=lambda k: int(k.split("_")[0]))
+        self.ids = [e["id"] for e in entries]
+        vectors = np.array([e["embedding"] for e in entries], dtype=np.float32)
+        self.vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+        self.scores = np.array([e["metadata"]["pontuacao_esperada"] for e in entries], dtype=np.float32)
+        self.items = tuple(int(k.split("_")[0]) for k in keys)
+        self.checklist = np.array([[bool(e["metadata"]["checklist"].get(k)) for k in keys] for e in entries],
+                                  dtype=np.float32)
+        self.previews = [e["metadata"].get("transcricao_preview", "") for e in entries]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, rows) -> "ReferenceSet":
+        """Subconjunto das referências (ex.: validação deixando uma de fora)."""
+        sub = ReferenceSet.__new__(ReferenceSet)
+        sub.ids = [self.ids[i] for i in rows]
+        sub.vectors, sub.scores, sub.checklist = self.vectors[rows], self.scores[rows], self.checklist[rows]
+        sub.items = self.items
+        sub.previews = [self.previews[i] for i in rows]
+        return sub
+
+@lru_cache(maxsize=None)
+def load_references(path: str = None) -> ReferenceSet:
+    path = path or find_gabarito()
+    if path is None:
+        raise FileNotFoundError(f"gabarito não encontrado em {', '.join(GABARITO_PATHS)}")
+    with open(path, "rb") as f:
+        return ReferenceSet(pickle.load(f))
+
+def openai_embedder(client=None, model: str = REFERENCE_MODEL, batch_size: int = 256, store=None):
+    """Função textos -> vetores no espaço do gabarito; textos já embedados vêm do EmbeddingStore."""
+    if client is None:
+        from openai import OpenAI
+        client = OpenAI(max_retries=0)  # retentativas pelo limitador de taxa
+    store = store or open_store(f"openai:{model}")
+
+    def encode(texts: list) -> np.ndarray:
+        out = []
+        for start in range(0, len(texts), batch_size):
+            batch = [t[:MAX_CHARS] or " " for t in texts[start:start + batch_size]]
+            rsp = limiter().call("openai.embeddings", (model, tuple(batch)), client.embeddings.create,
+                                 model=model, input=batch)
+            out += [d.embedding for d in sorted(rsp.data, key=lambda d: d.index)]
+        return np.array(out, dtype=np.float32)
+
+    return lambda texts: store.embed(texts, encode)
+
+def session_text(log) -> str:
+    """Texto corrido da sessão (as duas vozes, em ordem), como as transcrições do gabarito."""
+    return " ".join(message for _, message in log)
+
+class KnnScorer:
+    """Nota esperada e probabilidade por item a partir das k referências mais próximas."""
+
+    def __init__(self, references: ReferenceSet, k: int = 5, temperature: float = 0.02):
+        self.references = references
+        self.k = max(1, min(k, len(references)))
+        self.temperature = temperature
+
+    def predict_vectors(self, queries: np.ndarray) -> tuple:
+        """Para consultas (m, dim): nota (m,), probabilidades (m, itens), vizinhos (m, k) e similaridades (m, k)."""
+        refs = self.references
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.shape[1] != refs.vectors.shape[1]:
+            raise ValueError(f"consultas com dimensão {queries.shape[1]}, gabarito com {refs.vectors.shape[1]}")
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True).clip(min=1e-12)
+        sims = queries @ refs.vectors.T
+        rows = np.arange(len(sims))[:, None]
+        idx = np.argpartition(-sims, self.k - 1, axis=1)[:, :self.k]
+        idx = idx[rows, np.argsort(-sims[rows, idx], axis=1)]
+        top = sims[rows, idx]
+        weights = np.exp((top - top[:, :1]) / self.temperature)
+        weights /= weights.sum(axis=1, keepdims=True)
+        expected = (weights * refs.scores[idx]).sum(axis=1)
+        probs = np.einsum("mk,mkj->mj", weights, refs.checklist[idx])
+        return expected, probs, idx, top
+
+    def predict(self, text: str, embed) -> dict:
+        """Segunda opinião para uma sessão: nota, probabilidade por item e referências usadas."""
+        expected, probs, idx, top = self.predict_vectors(embed([text]))
+        refs = self.references
+        return {"expected": round(float(expected[0]), 1),
+                "items": dict(zip(refs.items, probs[0].astype(float).round(3).tolist())),
+                "neighbors": [(refs.ids[i], float(s)) for i, s in zip(idx[0], top[0])]}
+
+    def predict_batch(self, texts: pd.Series, embed, chunk: int = 4096) -> pd.DataFrame:
+        """Previsões para um acervo inteiro (mesmo índice de `texts`), em blocos de `chunk` consultas."""
+        refs = self.references
+        parts = []
+        for start in range(0, len(texts), chunk):
+            block = texts.iloc[start:start + chunk]
+            expected, probs, idx, top = self.predict_vectors(embed(block.astype(str).tolist()))
+            part = pd.DataFrame(probs.astype(float).round(3), index=block.index, columns=[f"item_{i}" for i in refs.items])
+            part.insert(0, "pontuacao_prevista", expected.astype(float).round(1))
+            part.insert(1, "similaridade_max", top[:, 0].astype(float).round(4))
+            part.insert(2, "vizinhos", [[refs.ids[i] for i in row] for row in idx])
+            parts.append(part)
+        columns = ["pontuacao_prevista", "similaridade_max", "vizinhos"] + [f"item_{i}" for i in refs.items]
+        return pd.concat(parts) if parts else pd.DataFrame(columns=columns)
+
+def main():
+    from core.ingest import ID_COL, TEXT_COL
+    from core.scenarios import load_transcripts
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcripts", help="CSV ou diretório/arquivo Parquet de transcrições")
+    parser.add_argument("--out", default="previsoes_gabarito.csv")
+    parser.add_argument("--gabarito", default=None)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--temperature", type=float, default=0.02)
+    parser.add_argument("--model", default=REFERENCE_MODEL)
+    args = parser.parse_args()
+
+    df = load_transcripts(args.transcripts)
+    calls = df.groupby(ID_COL, sort=True)[TEXT_COL].agg(lambda s: " ".join(s.astype(str)))
+    scorer = KnnScorer(load_references(args.gabarito), args.k, args.temperature)
+    preds = scorer.predict_batch(calls, openai_embedder(model=args.model))
+    preds.to_csv(args.out)
+    print(f"{len(preds)} ligações -> {args.out} (nota prevista média {preds['pontuacao_prevista'].mean():.1f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+import os, re, json, html
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from collections import namedtuple
+from core.fuzzy import FuzzyMatcher, budgets_for
+from core.normalize import normalize, normalize_text
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "checklist_rules.json")
+
+# Formato único de evidência: fala (turn), offsets [start, end) no texto da fala e id do sinal (rule)
+Span = namedtuple("Span", "turn start end rule")
+
+class SpanTable:
+    """Spans de evidência guardados em arrays compactos (uma coluna por campo)."""
+    __slots__ = ("turn", "start", "end", "rule")
+
+    def __init__(self):
+        self.turn = array("I")
+        self.start = array("I")
+        self.end = array("I")
+        self.rule = array("H")
+
+    def append(self, span: Span):
+        self.turn.append(span.turn)
+        self.start.append(span.start)
+        self.end.append(span.end)
+        self.rule.append(span.rule)
+
+    def extend(self, spans):
+        for span in spans:
+            self.append(span)
+
+    def __len__(self):
+        return len(self.turn)
+
+    def __iter__(self):
+        return map(Span, self.turn, self.start, self.end, self.rule)
+
+    def for_turn(self, turn: int) -> list:
+        """Spans de uma fala (as falas são gravadas em ordem, então a coluna turn é crescente)."""
+        lo, hi = bisect_left(self.turn, turn), bisect_right(self.turn, turn)
+        return [Span(turn, self.start[i], self.end[i], self.rule[i]) for i in range(lo, hi)]
+
+class Signal:
+    """Sinal de um item: alguma alternativa (conjunção de literais) presente e, se houver, algum literal de `requires`.
+
+    Sinais de áudio não têm literais: `audio` são faixas (medida, mínimo, máximo) de core.prosody.
+    """
+    __slots__ = ("id", "item_id", "name", "points", "alternatives", "requires", "literals", "audio")
+
+    def __init__(self, id, item_id, name, points, alternatives, requires=None, audio=()):
+        self.id = id
+        self.item_id = item_id
+        self.name = name
+        self.points = points
+        self.alternatives = alternatives
+        self.requires = requires  # None: sem exigência
+        self.literals = frozenset().union(*alternatives) | (requires or frozenset())
+        self.audio = audio
+
+    def matches(self, found: frozenset) -> bool:
+        if self.requires is not None and not (self.requires & found):
+            return False
+        return any(alt <= found for alt in self.alternatives)
+
+    def matches_audio(self, features: dict) -> bool:
+        """Todas as medidas presentes e dentro das faixas (sinal sem `audio` nunca casa)."""
+        if not self.audio:
+            return False
+        for name, lo, hi in self.audio:
+            value = features.get(name)
+            if value is None or (lo is not None and value < lo) or (hi is not None and value > hi):
+                return False
+        return True
+
+class Item:
+    """Item do checklist com o modo de pontuação e seus sinais já compilados."""
+    __slots__ = ("id", "description", "points", "required", "mode", "initial", "signals")
+
+    def __init__(self, spec: dict, signals: list):
+        self.id = spec["id"]
+        self.description = spec["description"]
+        self.points = spec["points"]
+        self.required = spec.get("required", False)
+        # accumulate: soma os sinais de cada fala; distinct: soma sinais distintos da conversa;
+        # manual: só valor inicial e penalidades externas
+        self.mode = spec.get("mode", "accumulate")
+        self.initial = spec.get("initial", 0)
+        self.signals = signals
+
+WHOLE_WORD_MAX = 4  # literais de até 4 letras ("ola", "cpf", "cep") só casam como palavra inteira
+
+def _bounded(literal: str) -> str:
+    """Regex do literal: começa no início de uma palavra ("ola" não casa em "escola") e, se for curto,
+    termina no fim dela ("ola" não casa em "olaria"). Literais longos continuam valendo como radical
+    ("confirma" em "confirmando"); números casam dentro de números unidos (final de telefone)."""
+    pattern = re.escape(literal)
+    if literal[:1].isalpha():
+        pattern = "(?<![a-z0-9])" + pattern
+    if len(literal) <= WHOLE_WORD_MAX and literal[-1:].isalpha():
+        pattern += "(?![a-z0-9])"
+    return pattern
+
+class LiteralScanner:
+    """Conjunto de literais compilado em uma única regex que encontra todas as ocorrências em uma passada."""
+    __slots__ = ("literals", "regex", "prefixes", "bounded")
+
+    def __init__(self, literals):
+        self.literals = sorted(set(literals), key=len, reverse=True)
+        # Lookahead: testa todas as posições; em cada uma, a alternativa mais longa vence
+        self.regex = re.compile("(?=(" + "|".join(_bounded(l) for l in self.literals) + "))")
+        # Literais mais curtos que começam na mesma posição são prefixos do mais longo
+        self.prefixes = {l: tuple(p for p in self.literals if l.startswith(p)) for l in self.literals}
+        self.bounded = {l: re.compile(_bounded(l)) for l in self.literals if _bounded(l) != re.escape(l)}
+
+    def scan(self, text: str) -> dict:
+        """Literais presentes no texto -> lista de offsets (start, end)."""
+        found = {}
+        for m in self.regex.finditer(text):
+            start = m.start(1)
+            for lit in self.prefixes[m.group(1)]:
+                # Um prefixo de palavra inteira não vale no meio da palavra mais longa
+                if lit in self.bounded and not self.bounded[lit].match(text, start):
+                    continue
+                found.setdefault(lit, []).append((start, start + len(lit)))
+        return found
+
+    def found(self, text: str) -> frozenset:
+        """Só o conjunto de literais presentes, sem offsets (busca de substring em C, mais rápida que a regex;
+        a regex com as fronteiras de palavra só roda para os literais que aparecem)."""
+        bounded = self.bounded
+        return frozenset([lit for lit in self.literals
+                          if lit in text and (lit not in bounded or bounded[lit].search(text))])
+
+def _format_literal(literal: str, fields: dict):
+    """Literal com campos do perfil ({cpf}, {plate}...) preenchidos e normalizado; None se faltar o perfil."""
+    if "{" not in literal:
+        return normalize_text(literal)
+    return normalize_text(literal.format(**fields)) if fields else None
+
+class CompiledRules:
+    """Regras do checklist compiladas em uma única regex que varre a fala uma vez só.
+
+    Literais com campos do perfil (ex.: "{cpf_prefix}") viram os dados do cliente da simulação;
+    sem perfil (transcrições reais), são descartados. Com `fuzzy`, literais que não aparecem exatos
+    ainda casam com erros de transcrição, dentro do orçamento da seção "fuzzy" do arquivo.
+    """
+
+    def __init__(self, spec: dict, fields: dict = None, fuzzy: bool = True):
+        self.max_total = spec["max_total"]
+        self.source = None  # (path, fields, fuzzy) quando criado por load_rules, para serializar por referência
+        fmt = lambda lits: frozenset(f for f in (_format_literal(l, fields) for l in lits) if f is not None)
+
+        self.items = []
+        self.signals = []
+        for item in spec["items"]:
+            signals = []
+            for sig in item["signals"]:
+                alternatives = []
+                for alt in sig.get("any", ()):
+                    lits = [alt] if isinstance(alt, str) else alt
+                    # Alternativa com campo do perfil ausente não tem como casar
+                    if all(_format_literal(l, fields) is not None for l in lits):
+                        alternatives.append(fmt(lits))
+                signals.append(Signal(
+                    len(self.signals), item["id"], sig["name"], sig["points"], tuple(alternatives),
+                    fmt(sig["requires"]) if "requires" in sig else None,
+                    tuple((name, r.get("min"), r.get("max")) for name, r in sig.get("audio", {}).items()),
+                ))
+                self.signals.append(signals[-1])
+            self.items.append(Item(item, signals))
+        self.by_id = {item.id: item for item in self.items}
+        self.scanner = LiteralScanner(frozenset().union(*(sig.literals for sig in self.signals)))
+        self.literals = self.scanner.literals
+        self.fuzzy = None
+        if fuzzy and "fuzzy" in spec:
+            config = dict(spec["fuzzy"], literals={normalize_text(l): k for l, k in spec["fuzzy"].get("literals", {}).items()})
+            self.fuzzy = FuzzyMatcher(budgets_for(self.literals, config))
+
+    def __reduce__(self):
+        # Regras compiladas são compartilhadas: ao desserializar, volta a instância do cache
+        if self.source is None:
+            return super().__reduce__()
+        return (_compile_rules, self.source)
+
+    def scan(self, text: str) -> dict:
+        """Literais presentes no texto (já normalizado) -> lista de offsets (start, end)."""
+        occurrences = self.scanner.scan(text)
+        if self.fuzzy is not None:
+            occurrences.update(self.fuzzy.scan(text, skip=occurrences.keys()))
+        return occurrences
+
+@lru_cache(maxsize=None)
+def _read_spec(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+@lru_cache(maxsize=256)
+def _compile_rules(path: str, fields: tuple, fuzzy: bool) -> CompiledRules:
+    rules = CompiledRules(_read_spec(path), dict(fields), fuzzy)
+    rules.source = (path, fields, fuzzy)
+    return rules
+
+def load_rules(path: str = RULES_PATH, fields: tuple = (), fuzzy: bool = True) -> CompiledRules:
+    """Lê e compila o arquivo de regras, uma vez por processo e por perfil (`fields` = profiles.profile_key)."""
+    return _compile_rules(path, fields, fuzzy)
+
+class RuleEngine:
+    """Avaliação do checklist para uma conversa, fala a fala ou sobre a transcrição inteira."""
+
+    def __init__(self, rules: CompiledRules = None):
+        self.rules = rules or load_rules()
+        self.scores = {item.id: item.initial for item in self.rules.items}
+        self.evidence = {item.id: [] for item in self.rules.items}
+        self.spans = SpanTable()
+        self.turn = 0
+        self._seen = {item.id: set() for item in self.rules.items}
+
+    def evaluate_message(self, text: str) -> list:
+        """Pontua uma fala do atendente e retorna os Spans que pontuaram nela (offsets na fala original)."""
+        norm = normalize(text)
+        occurrences = self.rules.scan(norm.text)
+        found = frozenset(occurrences)
+        turn_spans = []
+        for item in self.rules.items:
+            if item.mode == "manual" or self.scores[item.id] >= item.points:
+                continue
+            gained = 0
+            for sig in item.signals:
+                if not sig.matches(found):
+                    continue
+                if item.mode == "distinct":
+                    if sig.name in self._seen[item.id]:
+                        continue
+                    self._seen[item.id].add(sig.name)
+                gained += sig.points
+                for lit in sig.literals & found:
+                    turn_spans.extend(Span(self.turn, *norm.span(a, b), sig.id) for a, b in occurrences[lit])
+                if sig.name not in self.evidence[item.id]:
+                    self.evidence[item.id].append(sig.name)
+            if gained:
+                self.scores[item.id] = min(item.points, self.scores[item.id] + gained)
+        turn_spans.sort(key=lambda sp: (sp.start, sp.end))
+        self.spans.extend(turn_spans)
+        self.turn += 1
+        return turn_spans
+
+    def evaluate_audio(self, features: dict) -> list:
+        """Pontua os sinais de áudio com as medidas de core.prosody; cada sinal vale uma vez por conversa.
+
+        Retorna os nomes dos sinais que pontuaram (viram evidência do item, sem spans de texto).
+        """
+        awarded = []
+        for item in self.rules.items:
+            if item.mode == "manual":
+                continue
+            for sig in item.signals:
+                if self.scores[item.id] >= item.points:
+                    break
+                if sig.name in self._seen[item.id] or not sig.matches_audio(features):
+                    continue
+                self._seen[item.id].add(sig.name)
+                self.scores[item.id] = min(item.points, self.scores[item.id] + sig.points)
+                if sig.name not in self.evidence[item.id]:
+                    self.evidence[item.id].append(sig.name)
+                awarded.append(sig.name)
+        return awarded
+
+    def evaluate_transcript(self, turns: list, speaker: str = "agent") -> "RuleEngine":
+        """Avalia em sequência todas as falas de `speaker` em turns [{"speaker", "text"}]."""
+        for t in turns:
+            if t["speaker"] == speaker:
+                self.evaluate_message(t["text"])
+        return self
+
+    def penalize(self, item_id: int, points: float = 1):
+        """Desconta pontos de um item (ex.: item 5 quando o cliente precisa repetir dados)."""
+        self.scores[item_id] = max(0, self.scores[item_id] - points)
+
+    def total(self) -> float:
+        return sum(self.scores.values())
+
+    def export_spans(self) -> list:
+        """Spans como dicts (item, sinal, fala, offsets) para exportação/auditoria."""
+        return [
+            {"turn": sp.turn, "start": sp.start, "end": sp.end,
+             "item": self.rules.signals[sp.rule].item_id, "signal": self.rules.signals[sp.rule].name}
+            for sp in self.spans
+        ]
+
+def highlight(text: str, spans: list, open_tag: str = "<mark>", close_tag: str = "</mark>") -> str:
+    """Marca no texto os trechos cobertos pelos spans de uma fala, unindo sobreposições. O texto da fala
+    é escapado (é renderizado como HTML); só as tags de marcação passam como estão."""
+    merged = []
+    for sp in sorted(spans, key=lambda sp: sp.start):
+        if merged and sp.start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], sp.end)
+        else:
+            merged.append([sp.start, sp.end])
+    out, pos = [], 0
+    for a, b in merged:
+        out += [html.escape(text[pos:a]), open_tag, html.escape(text[a:b]), close_tag]
+        pos = b
+    out.append(html.escape(text[pos:]))
+    return "".join(out)
@@ -0,0 +1,113 @@
+import os, random
+import numpy as np
+from core.embedding_store import EmbeddingStore, open_store
+from core.scorer import CHECKLIST_WEIGHTS
+
+MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+# "torch": sentence-transformers; "onnx": mesmo modelo em int8 no ONNX Runtime (core.onnx_encoder)
+EMBEDDING_BACKEND = os.getenv("VOICE_COACH_EMBEDDINGS", "torch")
+
+_encoder = None
+def _load_encoder():
+    global _encoder
+    if _encoder is None:
+        if EMBEDDING_BACKEND == "onnx":
+            from core.onnx_encoder import OnnxEncoder
+            _encoder = OnnxEncoder()
+        else:
+            from sentence_transformers import SentenceTransformer
+            _encoder = SentenceTransformer(MODEL_NAME)
+    return _encoder
+
+def default_store() -> EmbeddingStore:
+    """Vetores já calculados pelo modelo e backend em uso (os backends não se misturam)."""
+    return open_store(f"{MODEL_NAME}@{EMBEDDING_BACKEND}")
+
+def embed_texts(texts, batch_size: int = 64, encoder=None, store: EmbeddingStore = None) -> np.ndarray:
+    """Gera embeddings normalizados (float32) em lotes.
+
+    Com o encoder padrão (ou com `store`), só os textos que ainda não estão no EmbeddingStore são calculados.
+    """
+    if encoder is None:
+        encoder = _load_encoder()
+        store = store or default_store()
+    encode = lambda batch: np.asarray(encoder.encode(list(batch), batch_size=batch_size, normalize_embeddings=True,
+                                                     show_progress_bar=False), dtype=np.float32)
+    return store.embed(texts, encode) if store is not None else encode(texts)
+
+def update_index(scenarios: list, batch_size: int = 64, encoder=None, store: EmbeddingStore = None):
+    """(ids, vetores) dos cenários; contextos já embedados vêm do EmbeddingStore, sem recalcular."""
+    ids = np.array([str(s["source_id"]) for s in scenarios])
+    return ids, embed_texts([s["context"] for s in scenarios], batch_size, encoder, store)
+
+def minibatch_kmeans(X: np.ndarray, k: int, batch_size: int = 256, n_iter: int = 100, seed: int = 0):
+    """K-means em mini-lotes (Sculley, 2010) sobre vetores normalizados; retorna (centros, rótulos)."""
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    k = max(1, min(k, n))
+    # Inicialização k-means++ sobre uma amostra
+    sample = X[rng.choice(n, size=min(n, 20 * k), replace=False)]
+    centers = [sample[rng.integers(len(sample))]]
+    for _ in range(1, k):
+        d = np.min(1.0 - sample @ np.array(centers).T, axis=1).clip(min=0)
+        p = d / d.sum() if d.sum() > 0 else None
+        centers.append(sample[rng.choice(len(sample), p=p)])
+    centers = np.array(centers, dtype=np.float32)
+    counts = np.zeros(k)
+
+    for _ in range(n_iter):
+        batch = X[rng.integers(0, n, size=min(batch_size, n))]
+        nearest = np.argmax(batch @ centers.T, axis=1)
+        for c in np.unique(nearest):
+            members = batch[nearest == c]
+            counts[c] += len(members)
+            lr = len(members) / counts[c]
+            centers[c] = (1 - lr) * centers[c] + lr * members.mean(axis=0)
+        centers /= np.linalg.norm(centers, axis=1, keepdims=True).clip(min=1e-12)
+
+    labels = np.concatenate([np.argmax(chunk @ centers.T, axis=1) for chunk in np.array_split(X, max(1, n // 10_000))])
+    return centers, labels
+
+class ScenarioSampler:
+    """Sorteia cenários alternando entre clusters para evitar chamadas quase idênticas em sequência."""
+
+    def __init__(self, scenarios: list, vectors: np.ndarray, labels: np.ndarray, seed=None, history: int = 20):
+        self.scenarios = scenarios
+        self.vectors = vectors
+        self.rng = random.Random(seed)
+        self.clusters = [np.flatnonzero(labels == c).tolist() for c in np.unique(labels)]
+        self.rng.shuffle(self.clusters)
+        self.cursor = 0
+        self.recent = []
+        self.history = history
+
+    def _remember(self, i: int) -> dict:
+        self.recent = (self.recent + [i])[-self.history:]
+        return self.scenarios[i]
+
+    def pick(self) -> dict:
+        """Próximo cenário: clusters em rodízio, sorteio dentro do cluster evitando os mais recentes."""
+        members = self.clusters[self.cursor % len(self.clusters)]
+        self.cursor += 1
+        options = [i for i in members if i not in self.recent] or members
+        return self._remember(self.rng.choice(options))
+
+    def pick_for_weak_items(self, weak_items: list, encoder=None) -> dict:
+        """Cenário mais próximo da descrição dos itens do checklist em que o treinando foi mal."""
+        labels = [label for idx, _, label in CHECKLIST_WEIGHTS if idx in set(weak_items)]
+        if not labels:
+            return self.pick()
+        query = embed_texts([" ".join(labels)], encoder=encoder)[0]
+        sims = self.vectors @ query
+        sims[self.recent] = -np.inf
+        return self._remember(int(np.argmax(sims)))
+
+def build_sampler(scenarios: list, k: int = None, encoder=None, seed=None, store: EmbeddingStore = None) -> ScenarioSampler:
+    """Embeda os cenários (só os contextos novos são calculados), agrupa e devolve um ScenarioSampler;
+    None sem cenários (pick_scenario cai no sorteio simples)."""
+    if not scenarios:
+        return None
+    _, vectors = update_index(scenarios, encoder=encoder, store=store)
+    k = k or max(1, int(np.sqrt(len(scenarios) / 2)))
+    _, labels = minibatch_kmeans(vectors, k, seed=seed or 0)
+    return ScenarioSampler(scenarios, vectors, labels, seed=seed)
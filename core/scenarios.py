@@ -1,37 +1,64 @@
+import os, re
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 import random
+from core.ingest import iter_transcripts, row_keys, ID_COL, TEXT_COL
+from core.normalize import normalize_series, normalize_text
 
-def load_transcripts(path: str) -> pd.DataFrame:
-    """Carrega e normaliza as transcrições de um arquivo CSV."""
-    df = pd.read_csv(path)
-    # Adicione aqui a normalização de colunas se necessário
+RULES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "scenario_rules.csv")
+
+def load_transcripts(path: str, chunksize: int = 50_000) -> pd.DataFrame:
+    """Carrega e normaliza as transcrições de um CSV ou de um diretório/arquivo Parquet."""
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    df = pd.concat(iter_transcripts(path, chunksize), ignore_index=True)
+    if ID_COL in df.columns:
+        df = df[~row_keys(df).duplicated().to_numpy()].reset_index(drop=True)
     return df
 
+@lru_cache(maxsize=None)
+def load_rules(path: str = RULES_PATH) -> tuple:
+    """Lê a tabela de regras e compila, por coluna de saída, (padrões, rótulos, padrão-default).
+
+    Cada linha tem `column` (type/persona), `keywords` separados por "|" e o `value`;
+    a ordem das linhas é a prioridade e a linha sem keywords define o valor padrão.
+    """
+    rules = pd.read_csv(path, dtype=str, keep_default_na=False)
+    compiled = []
+    for column, group in rules.groupby("column", sort=False):
+        matchers = group[group["keywords"] != ""]
+        default = group.loc[group["keywords"] == "", "value"]
+        patterns = ["|".join(re.escape(normalize_text(k)) for k in kw.split("|")) for kw in matchers["keywords"]]
+        compiled.append((column, patterns, matchers["value"].tolist(), default.iloc[0] if len(default) else ""))
+    return tuple(compiled)
+
+def classify_contexts(contexts: pd.Series, rules_path: str = RULES_PATH) -> pd.DataFrame:
+    """Classifica todos os contextos de uma vez, retornando uma coluna por saída da tabela de regras."""
+    # string[pyarrow] executa o contains em kernels nativos do Arrow
+    lower = normalize_series(contexts).astype("string[pyarrow]")
+    out = {}
+    for column, patterns, values, default in load_rules(rules_path):
+        conds = [lower.str.contains(p, regex=True).fillna(False).to_numpy(dtype=bool) for p in patterns]
+        out[column] = np.select(conds, values, default=default) if conds else np.full(len(lower), default)
+    return pd.DataFrame(out, index=contexts.index)
+
 def build_scenarios(df: pd.DataFrame) -> list:
     """Constrói cenários de treinamento a partir do DataFrame de transcrições."""
-    scenarios = []
     # Agrupa por um ID de chamada ou similar, se disponível
-    if "IdAnalysis" in df.columns:
-        for _, group in df.groupby("IdAnalysis"):
-            context = " ".join(group["Transcrição da Ligação"].astype(str))
-            # Tenta extrair um "tipo" de cenário (ex: troca de para-brisa, problema com tag)
-            scenario_type = "Não definido"
-            if "para-brisa" in context.lower():
-                scenario_type = "Troca de Para-brisa"
-            elif "retrovisor" in context.lower():
-                scenario_type = "Troca de Retrovisor"
-            elif "tag" in context.lower():
-                scenario_type = "Problema com Tag de Pedágio"
-
-            scenarios.append({
-                "type": scenario_type,
-                "context": context,
-                "source_id": group["IdAnalysis"].iloc[0]
-            })
-    return scenarios
-
-def pick_scenario(scenarios: list) -> dict:
-    """Seleciona um cenário aleatório da lista."""
+    if ID_COL not in df.columns:
+        return []
+    contexts = df.groupby(ID_COL, sort=True)[TEXT_COL].agg(lambda s: " ".join(s.astype(str)))
+    labels = classify_contexts(contexts)
+    return [
+        {"type": t, "persona": p, "context": c, "source_id": sid}
+        for sid, c, t, p in zip(contexts.index, contexts.to_numpy(), labels["type"], labels["persona"])
+    ]
+
+def pick_scenario(scenarios: list, sampler=None) -> dict:
+    """Seleciona um cenário: pelo ScenarioSampler (diverso entre clusters), se houver, senão aleatório."""
+    if sampler is not None:
+        return sampler.pick()
     return random.choice(scenarios) if scenarios else {
         "type": "Padrão",
         "context": "O cliente liga para relatar um problema com o veículo.",
@@ -40,12 +67,6 @@ def pick_scenario(scenarios: list) -> dict:
 
 def persona_from_scenario(scenario: dict) -> str:
     """Gera uma persona de cliente simples com base no contexto do cenário."""
-    context = scenario.get("context", "").lower()
-    if "corretor" in context:
-        return "Corretor de seguros agindo em nome do cliente, focado em resolver o problema rapidamente."
-    if "caminhão" in context:
-        return "Motorista de caminhão, prático e direto, preocupado com o tempo de parada do veículo."
-    if "não estou conseguindo pagar" in context:
-        return "Cliente frustrado com um problema de pagamento, um pouco impaciente."
-    return "Cliente segurado padrão, buscando resolver um problema com seu veículo de forma clara e objetiva."
-
+    if scenario.get("persona"):
+        return scenario["persona"]
+    return classify_contexts(pd.Series([scenario.get("context", "")]))["persona"].iloc[0]
@@ -0,0 +1,139 @@
+import os, sys, time, pickle, threading
+from array import array
+from collections import OrderedDict
+from types import FunctionType, ModuleType
+
+SESSIONS_DIR = os.getenv("VOICE_COACH_SESSION_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "sessions"))
+IDLE_SECONDS = float(os.getenv("VOICE_COACH_IDLE_SECONDS", "600"))
+SPILL_TTL_FACTOR = 12  # sessão gravada em disco e não reaberta em 12x o tempo de ociosidade: aba abandonada
+
+_LEAVES = (str, bytes, bytearray, array, int, float, complex, bool, type(None), type, FunctionType, ModuleType)
+
+def deep_sizeof(obj, shared=()) -> int:
+    """Tamanho aproximado em bytes do grafo de objetos, sem contar `shared` (objetos comuns a todas as sessões)."""
+    seen = {id(o) for o in shared}
+    stack, total = [obj], 0
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, _LEAVES):
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            for cls in type(o).__mro__:
+                slots = getattr(cls, "__slots__", ())
+                for name in ([slots] if isinstance(slots, str) else slots):
+                    if hasattr(o, name):
+                        stack.append(getattr(o, name))
+    return total
+
+class SessionPool:
+    """Sessões vivas em memória; as ociosas são gravadas em disco e recarregadas no próximo acesso.
+
+    As sessões precisam ter `id`, `last_seen` e `nbytes()`; o st.session_state guarda só o id.
+    Arquivos em disco mais velhos que `spill_ttl` (padrão: SPILL_TTL_FACTOR x idle_seconds) são apagados.
+    """
+
+    def __init__(self, directory: str = SESSIONS_DIR, idle_seconds: float = IDLE_SECONDS,
+                 max_live: int = None, sweep_interval: float = 30.0, spill_ttl: float = None):
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        self.spill_ttl = SPILL_TTL_FACTOR * idle_seconds if spill_ttl is None else spill_ttl
+        self.max_live = max_live
+        self.sweep_interval = sweep_interval
+        self.live = OrderedDict()
+        self.lock = threading.Lock()
+        self._last_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.pkl")
+
+    def add(self, session):
+        with self.lock:
+            session.last_seen = time.time()
+            self.live[session.id] = session
+        self.sweep()
+        return session
+
+    def get(self, session_id: str):
+        """Sessão pelo id, recarregando do disco se tiver sido despejada; None se não existir."""
+        if not session_id:
+            return None
+        with self.lock:
+            session = self.live.get(session_id)
+            if session is None:
+                path = self._path(session_id)
+                if not os.path.exists(path):
+                    return None
+                with open(path, "rb") as f:
+                    session = pickle.load(f)
+                os.remove(path)
+                self.live[session_id] = session
+            self.live.move_to_end(session_id)
+            session.last_seen = time.time()
+        self.sweep()
+        return session
+
+    def discard(self, session_id: str):
+        with self.lock:
+            self.live.pop(session_id, None)
+            if session_id and os.path.exists(self._path(session_id)):
+                os.remove(self._path(session_id))
+
+    def _spill(self, session):
+        path = self._path(session.id)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(session, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    def sweep(self, force: bool = False) -> int:
+        """Grava em disco as sessões ociosas (e as menos recentes além de max_live); devolve quantas saíram da memória."""
+        now = time.time()
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return 0
+        with self.lock:
+            self._last_sweep = now
+            # live está em ordem de acesso: as mais antigas primeiro
+            evict = [sid for sid, s in self.live.items() if now - s.last_seen > self.idle_seconds]
+            if self.max_live is not None:
+                excess = len(self.live) - len(evict) - self.max_live
+                evict += [sid for sid in self.live if sid not in evict][:max(0, excess)]
+            for sid in evict:
+                self._spill(self.live.pop(sid))
+            self._expire(now)
+        return len(evict)
+
+    def _expire(self, now: float) -> int:
+        """Apaga as sessões em disco (e .tmp interrompidos) não reabertas em spill_ttl (chamado com o lock)."""
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".pkl", ".pkl.tmp")) and now - entry.stat().st_mtime > self.spill_ttl:
+                try:
+                    os.remove(entry.path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def on_disk(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".pkl"))
+
+    def memory_report(self) -> list:
+        """Uma linha por sessão em memória: usuário, falas, KB estimados e segundos ociosa."""
+        now = time.time()
+        with self.lock:
+            sessions = list(self.live.values())
+        return [{
+            "sessao": s.id[:8], "usuario": getattr(s, "usuario", ""), "falas": len(getattr(s, "log", ())),
+            "kb": s.nbytes() / 1024, "ociosa_s": int(now - s.last_seen),
+        } for s in sessions]
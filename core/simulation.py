@@ -0,0 +1,175 @@
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from core.behavior import behavior_for
+from core.conversation import ConversationLog
+from core.normalize import normalize_text
+from core.profiles import CustomerProfile, profile_key
+from core.rules import RuleEngine, load_rules
+from core.sessions import deep_sizeof
+from core.tracing import traced
+
+# ==================== CHECKLIST OFICIAL CARGLASS (81 PONTOS) ====================
+# Regras declarativas em data/checklist_rules.json, compartilhadas com core.scorer
+OFFICIAL_CHECKLIST = [
+    {"id": item.id, "description": item.description, "points": item.points, "required": item.required}
+    for item in load_rules().items
+]
+
+# ==================== MODELOS DE DADOS ====================
+@dataclass(slots=True)
+class CollectedData:
+    """Dados já informados pelo cliente"""
+    greeting: bool = False
+    name: bool = False
+    cpf: bool = False
+    phone1: bool = False
+    phone2: bool = False
+    plate: bool = False
+    address: bool = False
+    lgpd: bool = False
+    problem: bool = False
+    damage_details: bool = False
+    city: bool = False
+    closing: bool = False
+
+@dataclass(slots=True)
+class ConversationState:
+    """Estado da conversa"""
+    collected_data: CollectedData = field(default_factory=CollectedData)
+    patience: int = 100
+    satisfaction: int = 70
+    repetitions: int = 0
+    stage: str = "initial"
+
+# ==================== SISTEMA DE AVALIAÇÃO ====================
+class EvaluationSystem:
+    """Sistema de avaliação baseado no checklist oficial"""
+    
+    def __init__(self, log: ConversationLog = None, profile: CustomerProfile = None):
+        # Regras compiladas com os dados do cliente, para reconhecer quando o agente os repete
+        self.engine = RuleEngine(load_rules(fields=profile_key(profile or CustomerProfile())))
+        self.checklist_scores = self.engine.scores
+        self.evidence = self.engine.evidence
+        # Sem log compartilhado, o próprio avaliador registra as falas que recebe
+        self._owns_log = log is None
+        self.log = ConversationLog() if log is None else log
+    
+    @property
+    def messages_history(self) -> List[str]:
+        """Falas do agente, na ordem em que foram avaliadas"""
+        return list(self.log.messages("agente"))
+        
+    @traced("evaluation.message")
+    def evaluate_message(self, message: str) -> Dict:
+        """Avalia mensagem do agente baseado no checklist"""
+        if self._owns_log:
+            self.log.append("agente", message)
+        spans = self.engine.evaluate_message(message)
+        
+        results = {}
+        for span in spans:
+            signal = self.engine.rules.signals[span.rule]
+            if signal.name not in results.setdefault(signal.item_id, []):
+                results[signal.item_id].append(signal.name)
+        return results
+    
+    def evaluate_audio(self, features: Dict) -> List[str]:
+        """Pontua os sinais de áudio (prosódia e ritmo da fala do agente, ver core.prosody)"""
+        return self.engine.evaluate_audio(features)
+    
+    def penalize_repetition(self):
+        """Penaliza por repetição REAL (Item 5)"""
+        # Só penaliza se realmente houve repetição desnecessária
+        self.engine.penalize(5)
+    
+    def get_total_score(self) -> Tuple[int, int]:
+        """Retorna pontuação total atual"""
+        return int(self.engine.total()), self.engine.rules.max_total
+    
+    def get_detailed_report(self) -> List[Dict]:
+        """Relatório detalhado por item do checklist"""
+        report = []
+        for item in OFFICIAL_CHECKLIST:
+            score = self.checklist_scores[item["id"]]
+            percentage = (score / item["points"] * 100) if item["points"] > 0 else 0
+            
+            report.append({
+                "id": item["id"],
+                "description": item["description"],
+                "score": score,
+                "max": item["points"],
+                "percentage": percentage,
+                "evidence": self.evidence[item["id"]],
+                "status": "✅" if percentage >= 80 else "⚠️" if percentage >= 50 else "❌"
+            })
+        
+        return report
+
+# ==================== CLIENTE VIRTUAL INTELIGENTE ====================
+class VirtualCustomer:
+    """Cliente virtual com comportamento realista"""
+    
+    def __init__(self, log: ConversationLog = None, profile: CustomerProfile = None):
+        self.profile = profile or CustomerProfile()
+        # Transições, intenções e respostas em data/customer_behavior.json, compiladas para o perfil
+        self.behavior = behavior_for(self.profile)
+        self.state = ConversationState(stage=self.behavior.initial_stage)
+        self.last_intents = frozenset()
+        self._owns_log = log is None
+        self.log = ConversationLog() if log is None else log
+    
+    @property
+    def last_agent_message(self) -> str:
+        return normalize_text(self.log.last("agente"))
+    
+    @property
+    def conversation_context(self) -> List[str]:
+        return [normalize_text(m) for m in self.log.messages("agente")]
+        
+    @traced("customer.generate_response")
+    def generate_response(self, agent_message: str) -> str:
+        """Gera resposta contextual baseada na mensagem do agente"""
+        if self._owns_log:
+            self.log.append("agente", agent_message)
+        self.last_intents = self.behavior.detect(normalize_text(agent_message))
+        transition = self.behavior.step(self.state, self.last_intents)
+        response = transition.apply(self.state)
+        if self._owns_log:
+            self.log.append("cliente", response)
+        return response
+    
+# ==================== SESSÃO DE TREINAMENTO ====================
+OPENING_LINE = "Alô? Preciso falar com a Carglass sobre um problema no meu carro!"
+
+class TrainingSession:
+    """Uma simulação em andamento: o log da conversa e os componentes que leem dele"""
+    __slots__ = ("id", "usuario", "log", "customer", "evaluator", "last_seen")
+    
+    def __init__(self, id: str, usuario: str = "", profile: CustomerProfile = None):
+        self.id = id
+        self.usuario = usuario
+        self.log = ConversationLog([("cliente", OPENING_LINE)])
+        self.customer = VirtualCustomer(self.log, profile)
+        self.evaluator = EvaluationSystem(self.log, self.customer.profile)
+        self.last_seen = time.time()
+    
+    def send(self, agent_message: str) -> str:
+        """Registra a fala do agente, avalia, gera a resposta do cliente e aplica a penalidade de repetição"""
+        self.log.append("agente", agent_message)
+        self.evaluator.evaluate_message(agent_message)
+        old_repetitions = self.customer.state.repetitions
+        
+        customer_response = self.customer.generate_response(agent_message)
+        self.log.append("cliente", customer_response)
+        
+        # Só penaliza se houve repetição REAL (não confirmação ECO)
+        is_confirmation = "confirmacao" in self.customer.last_intents
+        if self.customer.state.repetitions > old_repetitions and not is_confirmation:
+            self.evaluator.penalize_repetition()
+        return customer_response
+    
+    def nbytes(self) -> int:
+        """Memória estimada da sessão, com as regras e o comportamento compilados para o perfil dela
+        (compilados por perfil: só sessões com o mesmo perfil os compartilham)"""
+        return deep_sizeof(self)
@@ -0,0 +1,107 @@
+"""Resposta do cliente gerada de forma especulativa enquanto o atendente ainda digita ou fala.
+
+Cada parcial (texto com debounce ou parcial do STT em streaming) passa pelo detector de intenções do
+cliente (core.behavior). Quando as intenções mudam, a resposta mais provável (CustomerBrain.draft) e o
+áudio dela começam a ser gerados em segundo plano; a especulação anterior é cancelada. No envio, se a
+fala final tem as mesmas intenções (no mesmo ponto da conversa), o trabalho adiantado é aproveitado;
+senão é descartado e a resposta é gerada na hora, como antes.
+"""
+import time, threading
+from concurrent.futures import ThreadPoolExecutor
+from core.normalize import normalize_text
+from core.tracing import span
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+def _executor() -> ThreadPoolExecutor:
+    """Pool de threads compartilhado pelas sessões (as tarefas esperam rede: LLM e TTS)."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculative")
+    return _EXECUTOR
+
+class _Draft:
+    """Especulação em andamento: chave (ponto da conversa, estágio, intenções), futuro e tempos."""
+    __slots__ = ("key", "future", "started", "finished")
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.future = None
+        self.started = time.perf_counter()
+        self.finished = None
+
+class SpeculativeCustomer:
+    """Adianta a resposta do CustomerBrain e, com `synthesize(texto, since=...)` (ex.: tts_bytes), o áudio dela."""
+
+    def __init__(self, brain, behavior, synthesize=None, executor: ThreadPoolExecutor = None):
+        self.brain = brain
+        self.behavior = behavior
+        self.synthesize = synthesize
+        self.executor = executor
+        self.pending = None
+        self.stats = dict(parciais=0, especulacoes=0, canceladas=0, acertos=0, erros=0,
+                          economizado_s=0.0, desperdicado_s=0.0)
+
+    def intents(self, text: str) -> frozenset:
+        return self.behavior.detect(normalize_text(text))
+
+    def _key(self, turns: list, text: str) -> tuple:
+        return len(turns), self.brain.stage, self.intents(text)
+
+    def _generate(self, turns: list, text: str, draft: _Draft = None, since: float = None) -> tuple:
+        """(texto, áudio) da resposta à fala `text`, no estágio seguinte, sem alterar o cérebro."""
+        history = turns + [{"speaker": "agent", "text": text}]
+        reply = self.brain.draft(history, min(self.brain.stage + 1, 4), since=since)
+        audio = self.synthesize(reply, since=since) if self.synthesize else None
+        if draft is not None:
+            draft.finished = time.perf_counter()
+        return reply, audio
+
+    def _drop(self):
+        """Cancela a especulação pendente; se já estava rodando, o trabalho feito conta como desperdício."""
+        draft, self.pending = self.pending, None
+        if draft is None:
+            return
+        self.stats["canceladas"] += 1
+        if not draft.future.cancel():
+            self.stats["desperdicado_s"] += (draft.finished or time.perf_counter()) - draft.started
+
+    def observe(self, turns: list, partial: str):
+        """Parcial da fala do atendente; reespecula só quando as intenções detectadas mudam."""
+        self.stats["parciais"] += 1
+        key = self._key(turns, partial)
+        if not key[2] or (self.pending is not None and self.pending.key == key):
+            return
+        self._drop()
+        draft = _Draft(key)
+        draft.future = (self.executor or _executor()).submit(self._generate, turns, partial, draft)
+        self.pending = draft
+        self.stats["especulacoes"] += 1
+
+    def reply(self, turns: list, final: str, since: float = None) -> tuple:
+        """(texto, áudio) da resposta à fala final, aproveitando a especulação se as intenções conferem.
+        `since`: time.monotonic() do envio da fala, prioridade da geração na hora no limitador de taxa."""
+        key = self._key(turns, final)
+        draft = self.pending
+        if draft is not None and draft.key == key:
+            self.pending = None
+            committed = time.perf_counter()
+            with span("customer.speculative_commit", acerto=True):
+                reply, audio = draft.future.result()
+            self.stats["acertos"] += 1
+            self.stats["economizado_s"] += min(committed, draft.finished) - draft.started
+        else:
+            self._drop()
+            with span("customer.speculative_commit", acerto=False):
+                reply, audio = self._generate(turns, final, since=since)
+            self.stats["erros"] += 1
+        self.brain.stage = min(self.brain.stage + 1, 4)
+        return reply, audio
+
+    def report(self) -> dict:
+        """Taxa de acerto e latência economizada (total e média por resposta)."""
+        replies = self.stats["acertos"] + self.stats["erros"]
+        return dict(self.stats, taxa_acerto=self.stats["acertos"] / replies if replies else 0.0,
+                    economizado_por_resposta_ms=1000 * self.stats["economizado_s"] / replies if replies else 0.0)
@@ -0,0 +1,134 @@
+import os, json, sqlite3, threading
+from datetime import date, timedelta
+
+DB_PATH = os.getenv("VOICE_COACH_DB", os.path.join(os.path.dirname(__file__), "..", "data", "voice_coach.db"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    usuario TEXT NOT NULL,
+    data TEXT NOT NULL,
+    pontuacao_total REAL NOT NULL,
+    pontuacao_maxima REAL NOT NULL,
+    percentual REAL NOT NULL,
+    aprovado INTEGER NOT NULL,
+    duracao_segundos INTEGER,
+    satisfacao_cliente INTEGER,
+    repeticoes INTEGER,
+    report_json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS item_scores (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    item_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    max_score REAL NOT NULL,
+    PRIMARY KEY (session_id, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sessions_user_date ON sessions(usuario, data);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(data, usuario, percentual, aprovado);
+CREATE INDEX IF NOT EXISTS idx_sessions_score ON sessions(percentual);
+CREATE INDEX IF NOT EXISTS idx_item_scores_item ON item_scores(item_id, score);
+"""
+
+def _period(since: str = None, until: str = None) -> tuple:
+    """Limites [início, fim) para `data` ("AAAA-MM-DD HH:MM:SS"): o dia `until` entra inteiro."""
+    end = (date.fromisoformat(until[:10]) + timedelta(days=1)).isoformat() if until else "9999"
+    return since or "", end
+
+class SessionStore:
+    """Persistência local (SQLite em modo WAL) dos relatórios de sessão, mensagens e notas por item."""
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual, para módulos que mantêm tabelas próprias no mesmo banco."""
+        return self._conn()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Uma conexão por thread: o Streamlit executa cada sessão em uma thread própria
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save_session(self, report_data: dict, messages: list) -> int:
+        """Grava uma sessão finalizada e retorna o id gerado."""
+        return self.save_sessions([(report_data, messages)])[0]
+
+    def save_sessions(self, batch: list) -> list:
+        """Grava várias sessões [(report_data, messages)] em uma única transação."""
+        conn = self._conn()
+        ids = []
+        with conn:
+            for report, messages in batch:
+                cur = conn.execute(
+                    "INSERT INTO sessions (usuario, data, pontuacao_total, pontuacao_maxima, percentual, aprovado,"
+                    " duracao_segundos, satisfacao_cliente, repeticoes, report_json) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                    (report["usuario"], report["data"], report["pontuacao_total"], report["pontuacao_maxima"],
+                     report["percentual"], int(report["aprovado"]), report.get("duracao_segundos"),
+                     report.get("satisfacao_cliente"), report.get("repeticoes"),
+                     json.dumps(report, ensure_ascii=False)),
+                )
+                sid = cur.lastrowid
+                ids.append(sid)
+                conn.executemany(
+                    "INSERT INTO messages (session_id, seq, speaker, text) VALUES (?,?,?,?)",
+                    [(sid, i, speaker, text) for i, (speaker, text) in enumerate(messages)],
+                )
+                conn.executemany(
+                    "INSERT INTO item_scores (session_id, item_id, score, max_score) VALUES (?,?,?,?)",
+                    [(sid, it["id"], it["score"], it["max"]) for it in report.get("detalhamento", [])],
+                )
+        return ids
+
+    def user_history(self, usuario: str, limit: int = 50) -> list:
+        """Sessões mais recentes de um treinando (usa idx_sessions_user_date)."""
+        rows = self._conn().execute(
+            "SELECT id, data, pontuacao_total, pontuacao_maxima, percentual, aprovado, duracao_segundos,"
+            " satisfacao_cliente, repeticoes FROM sessions WHERE usuario = ? ORDER BY data DESC LIMIT ?",
+            (usuario, limit),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def session_messages(self, session_id: int) -> list:
+        """Mensagens de uma sessão na ordem original, como tuplas (speaker, texto)."""
+        rows = self._conn().execute(
+            "SELECT speaker, text FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+        ).fetchall()
+        return [(r["speaker"], r["text"]) for r in rows]
+
+    def cohort_summary(self, since: str = None, until: str = None) -> list:
+        """Resumo por treinando no período [since, until] (datas no formato de report_data['data'])."""
+        rows = self._conn().execute(
+            "SELECT usuario, COUNT(*) AS sessoes, AVG(percentual) AS media_percentual,"
+            " MAX(percentual) AS melhor_percentual, SUM(aprovado) AS aprovacoes FROM sessions"
+            " WHERE data >= ? AND data < ? GROUP BY usuario ORDER BY media_percentual DESC",
+            _period(since, until),
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+    def item_pass_rates(self, since: str = None, until: str = None, threshold: float = 0.8) -> list:
+        """Percentual de sessões em que cada item do checklist atingiu o limiar, no período."""
+        rows = self._conn().execute(
+            "SELECT i.item_id, COUNT(*) AS sessoes, AVG(i.score >= ? * i.max_score) AS taxa_aprovacao"
+            " FROM item_scores i JOIN sessions s ON s.id = i.session_id"
+            " WHERE s.data >= ? AND s.data < ? GROUP BY i.item_id ORDER BY i.item_id",
+            (threshold, *_period(since, until)),
+        ).fetchall()
+        return [dict(r) for r in rows]
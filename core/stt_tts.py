@@ -1,9 +1,13 @@
-import os, io, tempfile
+import os, io
 import streamlit as st
 from gtts import gTTS
 import soundfile as sf
 import numpy as np
 from faster_whisper import WhisperModel
+from core.tracing import traced, span
+from core.ratelimit import limiter
+from core.vad import detect_speech, pack_segments, gather
+from core.prosody import prosody_features
 
 _model = None
 def _load_whisper():
@@ -12,31 +16,62 @@ def _load_whisper():
         _model = WhisperModel("small", compute_type="int8")  # ajuste se necessário
     return _model
 
-def transcribe_bytes(b: bytes) -> str:
-    """Transcreve áudio usando Whisper local."""
+def decode_audio(b: bytes) -> np.ndarray:
+    """Decodifica o áudio em memória para PCM float32 mono a 16 kHz."""
+    audio, sr = sf.read(io.BytesIO(b), dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != 16000:
+        # resample
+        duration = len(audio)/sr
+        t = np.linspace(0, duration, int(16000*duration), endpoint=False)
+        audio = np.interp(t, np.linspace(0, duration, len(audio), endpoint=False), audio).astype(np.float32)
+    return audio
+
+@traced("stt.transcribe")
+def transcribe_bytes(b: bytes, stats: dict = None, features: dict = None) -> str:
+    """Transcreve áudio usando Whisper local, só nos trechos com fala.
+
+    Se `stats` for um dict, recebe duração, segundos com fala e a fração do áudio que o Whisper não precisou decodificar.
+    Se `features` for um dict, recebe as medidas de prosódia e ritmo (core.prosody) do mesmo áudio decodificado.
+    """
     try:
-        # Carrega o áudio em memória -> PCM 16k mono
-        with tempfile.NamedTemporaryFile(suffix=".wav") as tmp:
-            tmp.write(b); tmp.flush()
-            audio, sr = sf.read(tmp.name)
+        audio = decode_audio(b)
         
-        if sr != 16000:
-            # resample
-            duration = len(audio)/sr
-            t = np.linspace(0, duration, int(16000*duration), endpoint=False)
-            audio = np.interp(t, np.linspace(0, duration, len(audio), endpoint=False), audio)
-            sr = 16000
+        # Corta silêncio e pausas longas; blocos de até 30 s (janela do Whisper), cortados nas pausas
+        with span("stt.vad"):
+            vad = detect_speech(audio, 16000)
+            chunks = pack_segments(vad)
+        if stats is not None:
+            stats.update(duracao_s=vad.duration, fala_s=vad.voiced, fracao_ignorada=vad.skipped_fraction)
+        if not chunks:
+            if features is not None:
+                features.update(prosody_features(audio, vad))
+            return ""
         
         model = _load_whisper()
-        segments, _ = model.transcribe(audio, language="pt")
-        text = " ".join([s.text for s in segments])
-        return text.strip()
+        timed = []
+        with span("stt.whisper", audio_s=vad.voiced, fracao_ignorada=round(vad.skipped_fraction, 4)):
+            for chunk in chunks:
+                segments, _ = model.transcribe(gather(audio, chunk), language="pt")
+                timed += [(s.start, s.end, s.text) for s in segments]
+        if features is not None:
+            with span("stt.prosody"):
+                features.update(prosody_features(audio, vad, timed))
+        return " ".join(text for _, _, text in timed).strip()
     except Exception as e:
         st.error(f"Erro na transcrição: {e}")
         return "Erro na transcrição do áudio"
 
-def tts_bytes(text: str, use_openai: bool=False, use_azure: bool=False) -> bytes:
-    """Converte texto em áudio usando OpenAI TTS, Azure TTS ou gTTS como fallback."""
+def _gtts_bytes(text: str) -> bytes:
+    fp = io.BytesIO()
+    gTTS(text=text, lang="pt", slow=False).write_to_fp(fp)
+    return fp.getvalue()
+
+@traced("tts.synthesize")
+def tts_bytes(text: str, use_openai: bool=False, use_azure: bool=False, since: float=None) -> bytes:
+    """Converte texto em áudio usando OpenAI TTS, Azure TTS ou gTTS como fallback.
+    As chamadas externas passam pelo limitador de taxa do processo; a mesma fala em andamento é sintetizada uma vez."""
     
     # 1. Tenta OpenAI TTS primeiro (mais confiável)
     if use_openai:
@@ -44,13 +79,15 @@ def tts_bytes(text: str, use_openai: bool=False, use_azure: bool=False) -> bytes
             openai_key = st.secrets.get("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY"))
             if openai_key:
                 from openai import OpenAI
-                client = OpenAI(api_key=openai_key)
+                client = OpenAI(api_key=openai_key, max_retries=0)  # retentativas pelo limitador de taxa
                 
-                response = client.audio.speech.create(
+                response = limiter().call(
+                    "openai.tts", ("tts-1", "nova", text), client.audio.speech.create,
                     model="tts-1",
                     voice="nova",  # Voz feminina natural
                     input=text,
-                    speed=1.0
+                    speed=1.0,
+                    since=since,
                 )
                 
                 return response.content
@@ -87,11 +124,7 @@ def tts_bytes(text: str, use_openai: bool=False, use_azure: bool=False) -> bytes
     
     # 3. Fallback para gTTS (sempre funciona)
     try:
-        fp = io.BytesIO()
-        tts = gTTS(text=text, lang="pt", slow=False)
-        tts.write_to_fp(fp)
-        fp.seek(0)
-        return fp.read()
+        return limiter().call("gtts", text, _gtts_bytes, text, since=since)
     except Exception as e:
         st.error(f"Erro no gTTS: {e}")
         return b""
@@ -0,0 +1,151 @@
+import os, json, time, threading, functools
+from collections import deque
+from contextlib import contextmanager
+
+# Limites dos buckets (segundos) exportados no formato OpenMetrics
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RESERVOIR = 2048  # amostras recentes por etapa usadas nos percentis
+
+class StageStats:
+    """Métricas acumuladas de uma etapa: contadores, buckets e as últimas amostras de wall/CPU."""
+    __slots__ = ("count", "wall_sum", "cpu_sum", "buckets", "wall", "cpu", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.wall_sum = 0.0
+        self.cpu_sum = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.wall = deque(maxlen=RESERVOIR)
+        self.cpu = deque(maxlen=RESERVOIR)
+
+    def add(self, wall: float, cpu: float, error: bool):
+        self.count += 1
+        self.errors += error
+        self.wall_sum += wall
+        self.cpu_sum += cpu
+        for i, bound in enumerate(BUCKETS):
+            if wall <= bound:
+                self.buckets[i] += 1
+                break
+        self.wall.append(wall)
+        self.cpu.append(cpu)
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Tracer:
+    """Registro de spans por etapa, em memória, com exportação opcional para JSONL."""
+
+    def __init__(self, jsonl_path: str = None):
+        self.stages = {}
+        self.lock = threading.Lock()
+        self.jsonl_path = jsonl_path
+
+    def record(self, stage: str, wall: float, cpu: float, error: bool = False, **attrs):
+        with self.lock:
+            self.stages.setdefault(stage, StageStats()).add(wall, cpu, error)
+            if self.jsonl_path:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"ts": time.time(), "stage": stage, "wall_s": wall, "cpu_s": cpu,
+                                        "error": error, **attrs}, ensure_ascii=False) + "\n")
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        """Mede wall time e CPU time (da thread) do bloco."""
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        error = False
+        try:
+            yield
+        except Exception:
+            # st.rerun()/st.stop() usam BaseException e não contam como erro
+            error = True
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - wall0, time.thread_time() - cpu0, error, **attrs)
+
+    def traced(self, stage: str):
+        """Decorador equivalente a `with span(stage)` em volta da função."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def summary(self) -> list:
+        """Uma linha por etapa com contagem, médias e p50/p95/p99 (ms) das amostras recentes."""
+        with self.lock:
+            snapshot = [(name, s.count, s.errors, s.wall_sum, s.cpu_sum, list(s.wall), list(s.cpu))
+                        for name, s in self.stages.items()]
+        rows = []
+        for name, count, errors, wall_sum, cpu_sum, wall, cpu in sorted(snapshot):
+            rows.append({
+                "etapa": name, "chamadas": count, "erros": errors,
+                "media_ms": 1000 * wall_sum / count,
+                "p50_ms": 1000 * _percentile(wall, 0.50),
+                "p95_ms": 1000 * _percentile(wall, 0.95),
+                "p99_ms": 1000 * _percentile(wall, 0.99),
+                "cpu_media_ms": 1000 * cpu_sum / count,
+                "cpu_p95_ms": 1000 * _percentile(cpu, 0.95),
+            })
+        return rows
+
+    def openmetrics(self) -> str:
+        """Métricas no formato texto OpenMetrics (histograma de wall time e contador de CPU por etapa)."""
+        lines = ["# TYPE voice_coach_stage_seconds histogram",
+                 "# UNIT voice_coach_stage_seconds seconds"]
+        with self.lock:
+            stages = sorted(self.stages.items())
+            for name, s in stages:
+                cumulative = 0
+                for bound, n in zip(BUCKETS, s.buckets):
+                    cumulative += n
+                    lines.append(f'voice_coach_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'voice_coach_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {s.count}')
+                lines.append(f'voice_coach_stage_seconds_count{{stage="{name}"}} {s.count}')
+                lines.append(f'voice_coach_stage_seconds_sum{{stage="{name}"}} {s.wall_sum}')
+            lines.append("# TYPE voice_coach_stage_cpu_seconds counter")
+            for name, s in stages:
+                lines.append(f'voice_coach_stage_cpu_seconds_total{{stage="{name}"}} {s.cpu_sum}')
+            lines.append("# TYPE voice_coach_stage_errors counter")
+            for name, s in stages:
+                lines.append(f'voice_coach_stage_errors_total{{stage="{name}"}} {s.errors}')
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+
+def serve_metrics(tracer: "Tracer", port: int, host: str = "127.0.0.1"):
+    """Sobe, em uma thread daemon, um endpoint HTTP local com /metrics em OpenMetrics."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.openmetrics().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# Instância do processo; VOICE_COACH_TRACE_FILE ativa a gravação em JSONL
+TRACER = Tracer(os.getenv("VOICE_COACH_TRACE_FILE"))
+span = TRACER.span
+traced = TRACER.traced
@@ -0,0 +1,131 @@
+"""Segmentação de transcrições brutas (texto corrido, sem rótulo de falante) em turnos atendente/cliente.
+
+O texto é quebrado em frases e cada frase recebe uma pontuação linear de "fala do atendente" a partir de
+pistas estruturais (pergunta, resposta curta logo após pergunta, eco de números) e lexicais definidas em
+data/turn_cues.json. Tudo é calculado de uma vez sobre o DataFrame inteiro com kernels de string do Arrow;
+um classificador treinado (interface `decision_function`, como o LogisticRegression do scikit-learn) pode
+substituir os pesos do arquivo usando a mesma matriz de atributos.
+
+Uso:
+    python -m core.turns data/transcripts_sample.csv --repeat 10000
+"""
+import os, re, json, time
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from core.ingest import ID_COL, TEXT_COL
+from core.normalize import normalize_series, normalize_text
+
+CUES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "turn_cues.json")
+AGENT, CUSTOMER = "agent", "customer"
+# short_question substitui as pistas "correto?", "certo?" e "isso?": as pistas lexicais passam pelo
+# normalize_text, que tira a pontuação, e "correto" sozinho também casaria com "Está correto." do cliente
+STRUCTURAL = ("first", "question", "after_question", "short", "short_question", "question_with_digits")
+SHORT_WORDS = 3
+
+# Fim de frase seguido de espaço; "R$ 1,00" e "corretora.santafe" não quebram
+_SENTENCE_BREAK = r"(?<=[.?!…])\s+"
+_WORD = "a-z0-9"
+
+@lru_cache(maxsize=None)
+def load_cues(path: str = CUES_PATH) -> dict:
+    """Lê as pistas e compila cada grupo lexical em uma regex com limites de palavra."""
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    lexical = []
+    for group in spec["lexical"]:
+        alts = "|".join(re.escape(normalize_text(k)) for k in group["any"])
+        head = "^" if group.get("start") else f"(?:^|[^{_WORD}])"
+        lexical.append((group["name"], f"{head}(?:{alts})(?:$|[^{_WORD}])", group["weight"]))
+    weights = [spec["structural"].get(name, 0.0) for name in STRUCTURAL] + [w for _, _, w in lexical]
+    return {"bias": spec.get("bias", 0.0), "lexical": lexical, "weights": np.asarray(weights),
+            "names": list(STRUCTURAL) + [name for name, _, _ in lexical]}
+
+def split_sentences(texts: pd.Series) -> pd.DataFrame:
+    """Uma linha por frase: `call` (rótulo do índice de `texts`), `pos` (ordem na ligação) e `text`."""
+    parts = texts.fillna("").astype(str).str.strip().str.split(_SENTENCE_BREAK, regex=True)
+    exploded = parts.explode()
+    exploded = exploded[exploded.notna() & (exploded != "")]
+    frame = pd.DataFrame({"call": exploded.index, "text": exploded.to_numpy(dtype=object)})
+    frame["pos"] = frame.groupby("call", sort=False).cumcount()
+    return frame
+
+def turn_features(sentences: pd.DataFrame, cues: dict = None) -> np.ndarray:
+    """Matriz (frases, atributos) na ordem de `load_cues()["names"]`."""
+    cues = cues or load_cues()
+    text = sentences["text"].astype("string[pyarrow]")
+    norm = normalize_series(sentences["text"]).astype("string[pyarrow]")
+    question = text.str.endswith("?").to_numpy(dtype=bool)
+    first = (sentences["pos"] == 0).to_numpy()
+    # Pergunta anterior na mesma ligação (a primeira frase nunca é resposta)
+    after_question = np.concatenate([[False], question[:-1]]) & ~first
+    short = (text.str.count(" ") < SHORT_WORDS).to_numpy(dtype=bool)
+    digits = text.str.contains(r"\d", regex=True).to_numpy(dtype=bool)
+    columns = [first, question, after_question, short, short & question, question & digits]
+    columns += [norm.str.contains(pattern, regex=True).to_numpy(dtype=bool) for _, pattern, _ in cues["lexical"]]
+    return np.column_stack(columns).astype(np.float32)
+
+def label_sentences(texts: pd.Series, cues: dict = None, classifier=None) -> pd.DataFrame:
+    """Frases com o falante estimado; frases sem pista nenhuma herdam o falante da anterior."""
+    cues = cues or load_cues()
+    sentences = split_sentences(texts)
+    if sentences.empty:
+        return sentences.assign(speaker=pd.Series(dtype=object))
+    features = turn_features(sentences, cues)
+    if classifier is not None:
+        score = np.asarray(classifier.decision_function(features), dtype=np.float64)
+    else:
+        score = features @ cues["weights"] + cues["bias"]
+    speaker = pd.Series(np.where(score > 0, AGENT, np.where(score < 0, CUSTOMER, None)), dtype=object)
+    sentences["speaker"] = speaker.groupby(sentences["call"].to_numpy(), sort=False).ffill().fillna(AGENT).to_numpy()
+    return sentences
+
+def segment_turns(texts: pd.Series, cues: dict = None, classifier=None) -> pd.Series:
+    """Turnos [{"speaker", "text"}] por ligação, no formato de ScoreEngine.consume_turns, indexados como `texts`."""
+    sentences = label_sentences(texts.reset_index(drop=True), cues, classifier)
+    call, speaker = sentences["call"].to_numpy(), sentences["speaker"].to_numpy()
+    # Frases consecutivas do mesmo falante na mesma ligação formam um turno
+    change = np.ones(len(sentences), dtype=bool)
+    change[1:] = (call[1:] != call[:-1]) | (speaker[1:] != speaker[:-1])
+    turn_id = np.cumsum(change)
+    merged = sentences.groupby(turn_id, sort=False).agg(call=("call", "first"), speaker=("speaker", "first"),
+                                                         text=("text", " ".join))
+    if merged.empty:
+        # Nenhuma frase (série vazia ou só textos vazios/nulos): nenhuma ligação tem turnos
+        return pd.Series([[] for _ in range(len(texts))], index=texts.index, dtype=object)
+    records = [{"speaker": s, "text": t} for s, t in zip(merged["speaker"], merged["text"])]
+    bounds = np.flatnonzero(np.r_[True, merged["call"].to_numpy()[1:] != merged["call"].to_numpy()[:-1], True])
+    out = [[] for _ in range(len(texts))]
+    calls = merged["call"].to_numpy()
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        out[calls[a]] = records[a:b]
+    return pd.Series(out, index=texts.index, dtype=object)
+
+def split_turns(text: str) -> list:
+    """Turnos de uma única transcrição."""
+    return segment_turns(pd.Series([text])).iloc[0]
+
+def segment_transcripts(df: pd.DataFrame, cues: dict = None, classifier=None) -> pd.Series:
+    """Turnos de cada linha do DataFrame de transcrições (load_transcripts), indexados por IdAnalysis."""
+    turns = segment_turns(df[TEXT_COL], cues, classifier)
+    if ID_COL in df.columns:
+        turns.index = df[ID_COL].to_numpy()
+    return turns
+
+if __name__ == "__main__":
+    import argparse
+    from core.scenarios import load_transcripts
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="CSV ou diretório Parquet de transcrições")
+    parser.add_argument("--repeat", type=int, default=1, help="replica as linhas para medir vazão")
+    parser.add_argument("--show", type=int, default=0, help="imprime os N primeiros turnos da primeira ligação")
+    args = parser.parse_args()
+    df = load_transcripts(args.path)
+    df = pd.concat([df] * args.repeat, ignore_index=True)
+    start = time.perf_counter()
+    turns = segment_transcripts(df)
+    elapsed = time.perf_counter() - start
+    n_turns = sum(len(t) for t in turns)
+    print(f"{len(df)} ligações, {n_turns} turnos em {elapsed:.2f} s — {len(df) / elapsed * 60:,.0f} ligações/min")
+    for turn in turns.iloc[0][: args.show]:
+        print(f"[{turn['speaker']}] {turn['text']}")
@@ -0,0 +1,100 @@
+import numpy as np
+
+FRAME_MS = 30           # janela de energia
+PAD_MS = 200            # margem mantida antes e depois de cada trecho de fala
+MIN_PAUSE_MS = 500      # pausas menores que isso não separam trechos
+MARGIN_DB = 12.0        # quanto acima do ruído de fundo conta como fala
+FLOOR_DBFS = -50.0      # abaixo disso é sempre silêncio
+MAX_CHUNK_S = 30.0      # janela do Whisper: trechos são agrupados até esse tamanho
+
+class VadResult:
+    """Trechos de fala (amostras [start, end)) e quanto do áudio ficou de fora.
+
+    Guarda também a energia por janela e o limiar usados na detecção, reaproveitados por core.prosody.
+    """
+    __slots__ = ("segments", "n_samples", "sr", "energy", "threshold", "frame_len")
+
+    def __init__(self, segments: np.ndarray, n_samples: int, sr: int, energy: np.ndarray = None,
+                 threshold: float = 0.0, frame_len: int = 0):
+        self.segments = segments
+        self.n_samples = n_samples
+        self.sr = sr
+        self.energy = np.empty(0, dtype=np.float32) if energy is None else energy
+        self.threshold = threshold
+        self.frame_len = frame_len
+
+    @property
+    def duration(self) -> float:
+        return self.n_samples / self.sr
+
+    @property
+    def voiced(self) -> float:
+        return float((self.segments[:, 1] - self.segments[:, 0]).sum()) / self.sr
+
+    @property
+    def skipped_fraction(self) -> float:
+        return 1.0 - self.voiced / self.duration if self.n_samples else 0.0
+
+def frame_energy_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """Energia (dBFS) de cada janela, com o áudio remodelado em (janelas, frame_len)."""
+    n_frames = -(-len(audio) // frame_len)
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(n_frames, frame_len)
+    return 10 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame_len + 1e-10)
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """Intervalos [início, fim) dos trechos True de uma máscara, como array (n, 2)."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.column_stack([np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)])
+
+def detect_speech(audio: np.ndarray, sr: int, frame_ms: int = FRAME_MS, pad_ms: int = PAD_MS,
+                  min_pause_ms: int = MIN_PAUSE_MS, margin_db: float = MARGIN_DB,
+                  floor_dbfs: float = FLOOR_DBFS) -> VadResult:
+    """Detecta fala por energia com limiar adaptativo ao ruído de fundo; tudo vetorizado por janela."""
+    frame_len = max(1, sr * frame_ms // 1000)
+    if len(audio) == 0:
+        return VadResult(np.empty((0, 2), dtype=np.int64), 0, sr, frame_len=frame_len)
+    energy = frame_energy_db(audio, frame_len)
+    # Ruído de fundo estimado pelas janelas mais silenciosas; o teto pelo pico evita
+    # descartar tudo quando o áudio é fala do começo ao fim
+    noise = np.percentile(energy, 10)
+    threshold = max(min(noise + margin_db, energy.max() - margin_db), floor_dbfs)
+    voiced = energy > threshold
+
+    # Margem em volta da fala: dilatação da máscara por convolução
+    pad = pad_ms // frame_ms
+    if pad:
+        voiced = np.convolve(voiced, np.ones(2 * pad + 1), mode="same") > 0
+    runs = _runs(voiced)
+    if len(runs) > 1:
+        # Junta trechos separados por pausas curtas
+        keep = (runs[1:, 0] - runs[:-1, 1]) * frame_ms >= min_pause_ms
+        starts = runs[np.concatenate([[True], keep]), 0]
+        ends = runs[np.concatenate([keep, [True]]), 1]
+        runs = np.column_stack([starts, ends])
+    segments = np.minimum(runs * frame_len, len(audio)).astype(np.int64)
+    return VadResult(segments, len(audio), sr, energy, threshold, frame_len)
+
+def pack_segments(vad: VadResult, max_seconds: float = MAX_CHUNK_S) -> list:
+    """Agrupa trechos consecutivos em blocos de até `max_seconds`, cortando só nas pausas.
+
+    Trechos de fala maiores que o limite são cortados em pedaços do tamanho do limite. Devolve listas de (start, end).
+    """
+    limit = int(max_seconds * vad.sr)
+    chunks, current, size = [], [], 0
+    for start, end in vad.segments.tolist():
+        pieces = [(s, min(s + limit, end)) for s in range(start, end, limit)]
+        for s, e in pieces:
+            if current and size + (e - s) > limit:
+                chunks.append(current)
+                current, size = [], 0
+            current.append((s, e))
+            size += e - s
+    if current:
+        chunks.append(current)
+    return chunks
+
+def gather(audio: np.ndarray, chunk: list) -> np.ndarray:
+    """Concatena os trechos de um bloco em um único array para o Whisper."""
+    return np.concatenate([audio[s:e] for s, e in chunk]) if chunk else audio[:0]
@@ -1,9 +1,18 @@
 import streamlit as st
+import os
 import time
-from datetime import datetime
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 import random
+import uuid
+from core.storage import SessionStore
+from core.analytics import CohortAnalytics
+from core.rules import highlight
+from core.simulation import OFFICIAL_CHECKLIST, TrainingSession
+from core.sessions import SessionPool
+from core.profiles import ProfilePool
+from core.reference_scorer import KnnScorer, find_gabarito, load_references, openai_embedder, session_text
+from core.jobs import JobQueue, DONE, FAILED
+from core.tracing import TRACER, span, serve_metrics
 
 # ==================== CONFIGURAÇÃO DA PÁGINA ====================
 st.set_page_config(
@@ -149,487 +158,89 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ==================== CHECKLIST OFICIAL CARGLASS (81 PONTOS) ====================
-OFFICIAL_CHECKLIST = [
-    {
-        "id": 1,
-        "description": "Atendeu em 5s e saudação correta com técnicas de atendimento encantador",
-        "points": 10,
-        "keywords": ["bom dia", "boa tarde", "boa noite", "carglass", "meu nome", "posso ajudar"],
-        "required": True
-    },
-    {
-        "id": 2,
-        "description": "Solicitou dados completos (2 telefones, nome, CPF, placa, endereço)",
-        "points": 6,
-        "keywords": ["nome", "cpf", "telefone", "segundo telefone", "placa", "endereço"],
-        "required": True
-    },
-    {
-        "id": 3,
-        "description": "Verbalizou o script LGPD",
-        "points": 2,
-        "keywords": ["lgpd", "proteção de dados", "autoriza", "compartilhar"],
-        "required": False
-    },
-    {
-        "id": 4,
-        "description": "Repetiu verbalmente 2 de 3 (placa, telefone, CPF) para confirmar",
-        "points": 5,
-        "keywords": ["confirmando", "repito", "correto"],
-        "required": True
-    },
-    {
-        "id": 5,
-        "description": "Evitou solicitações duplicadas e escutou atentamente",
-        "points": 3,
-        "keywords": ["entendi", "compreendo", "anotado"],
-        "required": False
-    },
-    {
-        "id": 6,
-        "description": "Compreendeu a solicitação e demonstrou conhecimento dos serviços",
-        "points": 5,
-        "keywords": ["para-brisa", "franquia", "seguro", "cobertura"],
-        "required": True
-    },
-    {
-        "id": 7,
-        "description": "Confirmou informações completas do dano (data, motivo, tamanho, LED/Xenon)",
-        "points": 10,
-        "keywords": ["quando", "como aconteceu", "tamanho", "led", "xenon", "sensor"],
-        "required": True
-    },
-    {
-        "id": 8,
-        "description": "Confirmou cidade e selecionou primeira loja do sistema",
-        "points": 10,
-        "keywords": ["cidade", "loja", "unidade", "localização"],
-        "required": True
-    },
-    {
-        "id": 9,
-        "description": "Comunicação eficaz (sem gírias, avisou ausências/retornos)",
-        "points": 5,
-        "keywords": ["aguarde", "momento", "retornei", "voltei"],
-        "required": False
-    },
-    {
-        "id": 10,
-        "description": "Conduta acolhedora (empatia, sorriso na voz)",
-        "points": 4,
-        "keywords": ["entendo", "compreendo", "vamos resolver", "pode ficar tranquilo"],
-        "required": False
-    },
-    {
-        "id": 11,
-        "description": "Script de encerramento completo (validade, franquia, link, aguardar contato)",
-        "points": 15,
-        "keywords": ["protocolo", "validade", "franquia", "link", "acompanhamento", "documentos", "prazo"],
-        "required": True
-    },
-    {
-        "id": 12,
-        "description": "Orientou sobre a pesquisa de satisfação",
-        "points": 6,
-        "keywords": ["pesquisa", "satisfação", "avaliação", "nota"],
-        "required": False
-    }
-]
+# ==================== PERSISTÊNCIA ====================
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    """Banco local de sessões, compartilhado por todas as sessões do Streamlit"""
+    return SessionStore()
 
-# ==================== MODELOS DE DADOS ====================
-@dataclass
-class CustomerProfile:
-    """Perfil do cliente para simulação"""
-    name: str = "João Silva"
-    cpf: str = "123.456.789-10"
-    phone1: str = "11-99999-8888"
-    phone2: str = "11-97777-6666"
-    plate: str = "ABC-1234"
-    car: str = "Honda Civic 2020"
-    address: str = "Rua das Flores, 123 - Vila Olímpia, São Paulo/SP"
-    insurance: str = "Porto Seguro"
-    problem: str = "trinca no para-brisa de 15cm"
-    problem_date: str = "ontem"
-    has_special: bool = False  # LED/Xenon
+@st.cache_resource
+def get_cohort_analytics() -> CohortAnalytics:
+    """Rollups diários da turma sobre o banco de sessões"""
+    return CohortAnalytics(get_session_store())
 
-@dataclass
-class ConversationState:
-    """Estado da conversa"""
-    collected_data: Dict[str, bool] = field(default_factory=lambda: {
-        'greeting': False,
-        'name': False,
-        'cpf': False,
-        'phone1': False,
-        'phone2': False,
-        'plate': False,
-        'address': False,
-        'lgpd': False,
-        'problem': False,
-        'damage_details': False,
-        'city': False,
-        'closing': False
-    })
-    
-    patience: int = 100
-    satisfaction: int = 70
-    repetitions: int = 0
-    stage: str = "initial"
+@st.cache_data(ttl=30, show_spinner=False)
+def refresh_cohort_rollups() -> int:
+    """Atualiza os rollups no máximo a cada 30s no processo, não a cada render do painel"""
+    return get_cohort_analytics().refresh()
 
-# ==================== SISTEMA DE AVALIAÇÃO ====================
-class EvaluationSystem:
-    """Sistema de avaliação baseado no checklist oficial"""
-    
-    def __init__(self):
-        self.checklist_scores = {item["id"]: 0 for item in OFFICIAL_CHECKLIST}
-        self.evidence = {item["id"]: [] for item in OFFICIAL_CHECKLIST}
-        self.messages_history = []
-        # Item 5 começa com pontos máximos
-        self.checklist_scores[5] = 3
-        
-    def evaluate_message(self, message: str) -> Dict:
-        """Avalia mensagem do agente baseado no checklist"""
-        message_lower = message.lower()
-        self.messages_history.append(message)
-        
-        results = {}
-        
-        # ITEM 1 - Saudação (10 pts)
-        if self.checklist_scores[1] < 10:
-            greeting_score = 0
-            evidences = []
-            
-            # Saudação (3 pts)
-            if any(w in message_lower for w in ['bom dia', 'boa tarde', 'boa noite', 'olá']):
-                greeting_score += 3
-                evidences.append("saudação")
-            
-            # Carglass (3 pts)
-            if 'carglass' in message_lower:
-                greeting_score += 3
-                evidences.append("carglass")
-            
-            # Nome do atendente (4 pts)
-            if any(w in message_lower for w in ['meu nome é', 'me chamo', 'sou o', 'sou a']):
-                greeting_score += 4
-                evidences.append("nome do atendente")
-            
-            if greeting_score > 0:
-                self.checklist_scores[1] = min(10, self.checklist_scores[1] + greeting_score)
-                self.evidence[1] = evidences
-        
-        # ITEM 2 - Coleta de dados (6 pts)
-        data_requested = []
-        if 'nome' in message_lower and any(w in message_lower for w in ['seu', 'qual', 'me informa', 'pode']):
-            data_requested.append('nome')
-        if 'cpf' in message_lower:
-            data_requested.append('cpf')
-        if 'telefone' in message_lower or 'contato' in message_lower:
-            data_requested.append('telefone')
-        if any(w in message_lower for w in ['segundo telefone', 'outro telefone', 'segunda opção']):
-            data_requested.append('segundo telefone')
-        if 'placa' in message_lower:
-            data_requested.append('placa')
-        if 'endereço' in message_lower or 'onde mora' in message_lower:
-            data_requested.append('endereço')
-        
-        if data_requested:
-            for item in data_requested:
-                if item not in self.evidence[2]:
-                    self.evidence[2].append(item)
-            # Pontuação proporcional (6 dados = 6 pontos)
-            self.checklist_scores[2] = min(6, len(self.evidence[2]))
-        
-        # ITEM 3 - LGPD (2 pts)
-        if self.checklist_scores[3] < 2:
-            if any(w in message_lower for w in ['lgpd', 'lei geral', 'proteção de dados', 'proteção de dado']):
-                if 'autoriza' in message_lower or 'compartilhar' in message_lower or 'compartilhamento' in message_lower:
-                    self.checklist_scores[3] = 2
-                    self.evidence[3] = ['LGPD mencionado']
-        
-        # ITEM 4 - Confirmação ECO (5 pts)
-        if any(w in message_lower for w in ['confirmando', 'confirma', 'repito', 'repetindo']):
-            # Verifica se está confirmando dados principais
-            if any(d in message_lower for d in ['cpf', 'telefone', 'placa', '123.456', '99999', 'abc']):
-                self.checklist_scores[4] = min(5, self.checklist_scores[4] + 2.5)
-                if 'confirmação' not in self.evidence[4]:
-                    self.evidence[4].append('confirmação')
-        
-        # ITEM 6 - Conhecimento técnico (5 pts)
-        tech_words = ['para-brisa', 'parabrisa', 'franquia', 'seguro', 'cobertura', 'vistoria', 'sinistro']
-        found_tech = [w for w in tech_words if w in message_lower]
-        if found_tech:
-            self.checklist_scores[6] = min(5, self.checklist_scores[6] + len(found_tech))
-            self.evidence[6].extend(found_tech)
-        
-        # ITEM 7 - Informações do dano (10 pts)
-        damage_info = 0
-        damage_evidence = []
-        
-        if 'quando' in message_lower:
-            damage_info += 2
-            damage_evidence.append('quando')
-        if any(w in message_lower for w in ['como aconteceu', 'o que aconteceu', 'o que houve']):
-            damage_info += 2
-            damage_evidence.append('como')
-        if 'tamanho' in message_lower:
-            damage_info += 2
-            damage_evidence.append('tamanho')
-        if any(w in message_lower for w in ['led', 'xenon', 'sensor', 'câmera']):
-            damage_info += 4
-            damage_evidence.append('acessórios')
-        
-        if damage_info > 0:
-            self.checklist_scores[7] = min(10, self.checklist_scores[7] + damage_info)
-            self.evidence[7].extend(damage_evidence)
-        
-        # ITEM 8 - Cidade/Loja (10 pts)
-        if self.checklist_scores[8] < 10:
-            city_score = 0
-            if 'cidade' in message_lower or 'onde' in message_lower and 'prefere' in message_lower:
-                city_score += 5
-                self.evidence[8].append('cidade')
-            if 'loja' in message_lower or 'unidade' in message_lower:
-                city_score += 5
-                self.evidence[8].append('loja')
-            
-            if city_score > 0:
-                self.checklist_scores[8] = min(10, self.checklist_scores[8] + city_score)
-        
-        # ITEM 9 - Comunicação profissional (5 pts)
-        prof_words = ['aguarde', 'momento', 'por favor', 'posso ajudar']
-        found_prof = [w for w in prof_words if w in message_lower]
-        if found_prof:
-            self.checklist_scores[9] = min(5, self.checklist_scores[9] + len(found_prof))
-            self.evidence[9].extend(found_prof)
-        
-        # ITEM 10 - Empatia (4 pts)
-        empathy_words = ['entendo', 'compreendo', 'vamos resolver', 'pode ficar tranquilo', 'preocupação']
-        found_empathy = [w for w in empathy_words if w in message_lower]
-        if found_empathy:
-            self.checklist_scores[10] = min(4, self.checklist_scores[10] + len(found_empathy))
-            self.evidence[10].extend(found_empathy)
-        
-        # ITEM 11 - Encerramento (15 pts)
-        closing_score = 0
-        closing_evidence = []
-        
-        if 'protocolo' in message_lower:
-            closing_score += 3
-            closing_evidence.append('protocolo')
-        if 'validade' in message_lower or 'prazo' in message_lower or '14 dias' in message_lower:
-            closing_score += 3
-            closing_evidence.append('validade')
-        if 'franquia' in message_lower:
-            closing_score += 3
-            closing_evidence.append('franquia')
-        if 'link' in message_lower or 'acompanhamento' in message_lower:
-            closing_score += 3
-            closing_evidence.append('link')
-        if 'documento' in message_lower or 'cnh' in message_lower:
-            closing_score += 3
-            closing_evidence.append('documentos')
-        
-        if closing_score > 0:
-            self.checklist_scores[11] = min(15, self.checklist_scores[11] + closing_score)
-            self.evidence[11].extend(closing_evidence)
-        
-        # ITEM 12 - Pesquisa de satisfação (6 pts)
-        if self.checklist_scores[12] < 6:
-            if 'pesquisa' in message_lower and ('satisfação' in message_lower or 'avaliação' in message_lower):
-                self.checklist_scores[12] = 6
-                self.evidence[12] = ['pesquisa mencionada']
-        
-        return results
-    
-    def penalize_repetition(self):
-        """Penaliza por repetição REAL (Item 5)"""
-        # Só penaliza se realmente houve repetição desnecessária
-        self.checklist_scores[5] = max(0, self.checklist_scores[5] - 1)
-    
-    def get_total_score(self) -> Tuple[int, int]:
-        """Retorna pontuação total atual"""
-        total = sum(self.checklist_scores.values())
-        return int(total), 81
-    
-    def get_detailed_report(self) -> List[Dict]:
-        """Relatório detalhado por item do checklist"""
-        report = []
-        for item in OFFICIAL_CHECKLIST:
-            score = self.checklist_scores[item["id"]]
-            percentage = (score / item["points"] * 100) if item["points"] > 0 else 0
-            
-            report.append({
-                "id": item["id"],
-                "description": item["description"],
-                "score": score,
-                "max": item["points"],
-                "percentage": percentage,
-                "evidence": self.evidence[item["id"]],
-                "status": "✅" if percentage >= 80 else "⚠️" if percentage >= 50 else "❌"
-            })
-        
-        return report
+@st.cache_resource(show_spinner=False)
+def get_session_pool() -> SessionPool:
+    """Conversas em andamento; sessões ociosas vão para disco (VOICE_COACH_SESSION_DIR)"""
+    return SessionPool()
 
-# ==================== CLIENTE VIRTUAL INTELIGENTE ====================
-class VirtualCustomer:
-    """Cliente virtual com comportamento realista"""
-    
-    def __init__(self):
-        self.profile = CustomerProfile()
-        self.state = ConversationState()
-        self.last_agent_message = ""
-        self.conversation_context = []
-        
-    def generate_response(self, agent_message: str) -> str:
-        """Gera resposta contextual baseada na mensagem do agente"""
-        msg_lower = agent_message.lower()
-        self.last_agent_message = msg_lower
-        self.conversation_context.append(msg_lower)
-        
-        # IMPORTANTE: Detecta confirmações (ECO) vs perguntas reais
-        is_confirmation = any(w in msg_lower for w in ['confirmando', 'confere', 'correto', 'isso mesmo', 'é isso', 'repito'])
-        
-        # Análise detalhada do que está sendo perguntado
-        is_asking_name = 'nome' in msg_lower and not is_confirmation
-        is_asking_cpf = 'cpf' in msg_lower and not is_confirmation
-        is_asking_phone = ('telefone' in msg_lower or 'contato' in msg_lower) and not is_confirmation
-        is_asking_second = any(w in msg_lower for w in ['segundo', 'outro', 'adicional', 'segunda opção'])
-        is_asking_plate = ('placa' in msg_lower or 'veículo' in msg_lower) and not is_confirmation
-        is_asking_address = ('endereço' in msg_lower or 'onde mora' in msg_lower or 'cep' in msg_lower) and not is_confirmation
-        is_greeting = any(w in msg_lower for w in ['bom dia', 'boa tarde', 'boa noite', 'olá'])
-        
-        # Se é uma saudação inicial
-        if is_greeting and not self.state.collected_data['greeting']:
-            self.state.collected_data['greeting'] = True
-            return f"Olá! Meu seguro é {self.profile.insurance} e tenho um problema no vidro do meu carro. Preciso resolver isso urgente!"
-        
-        # Se está CONFIRMANDO dados (ECO) - NÃO É REPETIÇÃO!
-        if is_confirmation:
-            # Responde positivamente sem reclamar
-            if self.state.patience > 70:
-                return "Sim, está correto."
-            elif self.state.patience > 50:
-                return "Isso mesmo."
-            else:
-                return "Sim, pode prosseguir."
-        
-        # NOME - só reclama se realmente está perguntando de novo
-        if is_asking_name:
-            if self.state.collected_data['name']:
-                self.state.repetitions += 1
-                self.state.patience -= 20
-                return f"Já informei meu nome: {self.profile.name}. Vocês não anotam?"
-            else:
-                self.state.collected_data['name'] = True
-                return f"Meu nome é {self.profile.name}."
-        
-        # CPF - só reclama se realmente está perguntando de novo
-        if is_asking_cpf:
-            if self.state.collected_data['cpf']:
-                # Só reclama se não for confirmação
-                if not any(w in msg_lower for w in ['confirmando', str(self.profile.cpf)]):
-                    self.state.repetitions += 1
-                    self.state.patience -= 20
-                    return f"Já informei o CPF: {self.profile.cpf}."
-                else:
-                    return "Sim, está correto."
-            else:
-                self.state.collected_data['cpf'] = True
-                return f"Meu CPF é {self.profile.cpf}."
-        
-        # TELEFONES - lógica melhorada
-        if is_asking_phone:
-            if is_asking_second:
-                if self.state.collected_data['phone2']:
-                    self.state.patience -= 15
-                    return "Já passei o segundo telefone!"
-                else:
-                    self.state.collected_data['phone2'] = True
-                    return f"O segundo telefone é {self.profile.phone2}."
-            else:
-                # Primeira menção a telefone
-                if not self.state.collected_data['phone1']:
-                    self.state.collected_data['phone1'] = True
-                    return f"Meu telefone é {self.profile.phone1}."
-                elif not self.state.collected_data['phone2'] and not any(n in msg_lower for n in [self.profile.phone1[:8], '8888']):
-                    # Se ainda não deu o segundo e não está confirmando o primeiro
-                    return f"Precisa de um segundo número? Tenho também {self.profile.phone2}."
-        
-        # PLACA - só reclama se realmente está perguntando de novo
-        if is_asking_plate:
-            if self.state.collected_data['plate']:
-                if not any(w in msg_lower for w in ['confirmando', 'abc-1234', 'abc 1234']):
-                    self.state.repetitions += 1
-                    self.state.patience -= 25
-                    return f"Já falei! Placa {self.profile.plate}, é um {self.profile.car}."
-                else:
-                    return "Sim, exatamente."
-            else:
-                self.state.collected_data['plate'] = True
-                return f"Placa {self.profile.plate}, é um {self.profile.car}."
-        
-        # ENDEREÇO
-        if is_asking_address:
-            if self.state.collected_data['address']:
-                self.state.patience -= 20
-                return "Já passei meu endereço completo."
-            else:
-                self.state.collected_data['address'] = True
-                return f"Meu endereço é {self.profile.address}."
-        
-        # LGPD
-        if 'lgpd' in msg_lower or 'proteção de dados' in msg_lower or 'lei geral' in msg_lower:
-            self.state.collected_data['lgpd'] = True
-            return "Sim, autorizo o compartilhamento dos dados para o atendimento."
-        
-        # PROBLEMA/DANO
-        if any(w in msg_lower for w in ['problema', 'aconteceu', 'ocorreu', 'o que houve']):
-            if not self.state.collected_data['problem']:
-                self.state.collected_data['problem'] = True
-                return f"Tenho uma {self.profile.problem}. Aconteceu {self.profile.problem_date} na estrada."
-            else:
-                return f"Como já disse, é uma trinca de 15cm no para-brisa."
-        
-        # QUANDO
-        if 'quando' in msg_lower and 'aconteceu' in msg_lower:
-            return f"Foi {self.profile.problem_date}, estava dirigindo na estrada."
-        
-        # LED/XENON/SENSOR - resposta específica
-        if any(w in msg_lower for w in ['led', 'xenon', 'sensor', 'câmera', 'chuva']):
-            self.state.collected_data['damage_details'] = True
-            return "Não, o veículo não tem LED, Xenon ou sensor de chuva no vidro."
-        
-        # CIDADE/LOJA
-        if any(w in msg_lower for w in ['cidade', 'loja', 'unidade', 'onde prefere', 'localização para']):
-            if not self.state.collected_data['city']:
-                self.state.collected_data['city'] = True
-                return "Prefiro fazer em São Paulo, na loja mais próxima da Vila Olímpia."
-            else:
-                return "Como disse, Vila Olímpia em São Paulo."
-        
-        # PROTOCOLO/ENCERRAMENTO
-        if any(w in msg_lower for w in ['protocolo', 'validade', 'franquia', 'documento', 'prazo']):
-            self.state.collected_data['closing'] = True
-            return "Ok, anotei tudo. Preciso levar algum documento específico?"
-        
-        # PESQUISA DE SATISFAÇÃO
-        if 'pesquisa' in msg_lower or 'satisfação' in msg_lower or 'avaliação' in msg_lower:
-            return "Sim, responderei a pesquisa de satisfação."
-        
-        # AGRADECIMENTO
-        if any(w in msg_lower for w in ['obrigado', 'obrigada', 'agradeço', 'tenha um']):
-            return "Obrigado pelo atendimento!"
-        
-        # DÚVIDAS
-        if 'dúvida' in msg_lower or 'alguma pergunta' in msg_lower:
-            return "Não, está tudo claro. Obrigado!"
-        
-        # Resposta padrão contextual
-        if self.state.patience < 30:
-            return "Estou com pressa, podemos agilizar o atendimento?"
-        else:
-            return "Certo, pode prosseguir."
+@st.cache_resource(show_spinner=False)
+def get_profile_pool() -> ProfilePool:
+    """Perfis de cliente pré-gerados; VOICE_COACH_PROFILE_SEED torna o sorteio reprodutível"""
+    seed = os.getenv("VOICE_COACH_PROFILE_SEED")
+    return ProfilePool(seed=int(seed) if seed else None)
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue() -> JobQueue:
+    """Tarefas pós-sessão em segundo plano (persistência, segunda opinião), compartilhadas pelo processo"""
+    return JobQueue(workers=int(os.getenv("VOICE_COACH_JOB_WORKERS", "2")))
+
+@st.cache_resource(show_spinner=False)
+def get_reference_scorer():
+    """kNN no gabarito para a segunda opinião da nota; None sem gabarito ou sem chave da OpenAI"""
+    path = find_gabarito()
+    key = os.getenv("OPENAI_API_KEY")
+    try:
+        key = st.secrets.get("OPENAI_API_KEY", key)
+    except Exception:
+        pass
+    if path is None or not key:
+        return None
+    from openai import OpenAI
+    return KnnScorer(load_references(path)), openai_embedder(OpenAI(api_key=key, max_retries=0))
+
+def current_session():
+    """Simulação da sessão atual (o st.session_state guarda só o id)"""
+    return get_session_pool().get(st.session_state.get("session_id"))
+
+def end_session():
+    """Descarta a simulação atual da memória e do disco"""
+    get_session_pool().discard(st.session_state.get("session_id"))
+    st.session_state.session_id = None
+
+def cohort_dashboard():
+    """Painel de turma para supervisores, lido dos rollups diários"""
+    analytics = get_cohort_analytics()
+    refresh_cohort_rollups()
+    
+    col_a, col_b = st.columns(2)
+    with col_a:
+        since = st.date_input("De", value=date.today() - timedelta(days=365))
+    with col_b:
+        until = st.date_input("Até", value=date.today())
+    since, until = since.isoformat(), until.isoformat()
+    
+    items = analytics.item_pass_rates(since, until)
+    if items.empty:
+        st.info("Nenhuma sessão registrada no período.")
+        return
+    
+    st.markdown("**Taxa de aprovação por item do checklist**")
+    st.bar_chart(items.set_index("item_id")["taxa_aprovacao"])
+    
+    st.markdown("**Distribuição das notas**")
+    st.bar_chart(analytics.score_distribution(since, until)["sessoes"])
+    
+    st.markdown("**Evolução diária (média %)**")
+    st.line_chart(analytics.daily_trend(since, until)["media_percentual"])
+    
+    st.markdown("**Resumo por treinando**")
+    st.dataframe(analytics.trainee_summary(since, until), use_container_width=True, hide_index=True)
 
 # ==================== INTERFACE PRINCIPAL ====================
 def init_session_state():
@@ -639,11 +250,10 @@ def init_session_state():
         st.session_state.logged_in = False
         st.session_state.username = ""
         st.session_state.session_active = False
-        st.session_state.messages = []
-        st.session_state.customer = None
-        st.session_state.evaluator = None
+        st.session_state.session_id = None
         st.session_state.start_time = None
         st.session_state.session_duration = 0
+        st.session_state.saved_session_id = None
 
 def login_screen():
     """Tela de login"""
@@ -728,9 +338,9 @@ def main_interface():
             
             st.info("""
             **Cliente Virtual:**
-            - João Silva
-            - Seguro: Porto Seguro
-            - Problema: Trinca no para-brisa (15cm)
+            - Sorteado a cada simulação
+            - Nome, CPF, telefones, placa, veículo e seguradora variam
+            - Problema: dano em vidro, farol ou retrovisor
             - Urgência: Alta
             
             **Objetivo:**
@@ -741,16 +351,22 @@ def main_interface():
             
             if st.button("🚀 INICIAR SIMULAÇÃO", type="primary", use_container_width=True):
                 st.session_state.session_active = True
-                st.session_state.customer = VirtualCustomer()
-                st.session_state.evaluator = EvaluationSystem()
+                session = TrainingSession(uuid.uuid4().hex, st.session_state.username, get_profile_pool().draw())
+                st.session_state.session_id = get_session_pool().add(session).id
                 st.session_state.start_time = time.time()
-                st.session_state.messages = [
-                    ("cliente", "Alô? Preciso falar com a Carglass sobre um problema no meu carro!")
-                ]
+                st.session_state.saved_session_id = None
                 st.rerun()
+            
+            # Depois do botão: ao iniciar, o rerun acontece antes de criar os widgets do painel
+            with st.expander("📈 Painel da Turma"):
+                cohort_dashboard()
     
     else:
         # Interface de simulação ativa
+        session = current_session()
+        if session is None:
+            st.session_state.session_active = False
+            st.rerun()
         col_left, col_right = st.columns([3, 1])
         
         with col_left:
@@ -775,7 +391,7 @@ def main_interface():
             st.markdown("### 💬 Conversa")
             chat_html = '<div class="chat-wrapper">'
             
-            for speaker, message in st.session_state.messages:
+            for speaker, message in session.log:
                 if speaker == "cliente":
                     chat_html += f'<div class="customer-message">🔸 <strong>Cliente:</strong> {message}</div>'
                 else:
@@ -799,26 +415,8 @@ def main_interface():
             with col1:
                 if st.button("📤 Enviar", type="primary", use_container_width=True, disabled=not user_input):
                     if user_input:
-                        # Adiciona mensagem do agente
-                        st.session_state.messages.append(("agente", user_input))
-                        
-                        # Avalia a mensagem
-                        st.session_state.evaluator.evaluate_message(user_input)
-                        
-                        # Verifica se é confirmação (ECO) ou repetição real
-                        is_confirmation = any(w in user_input.lower() for w in ['confirmando', 'confere', 'correto', 'isso mesmo', 'é isso', 'repito'])
-                        
-                        # Salva estado anterior de repetições
-                        old_repetitions = st.session_state.customer.state.repetitions
-                        
-                        # Gera resposta do cliente
-                        customer_response = st.session_state.customer.generate_response(user_input)
-                        st.session_state.messages.append(("cliente", customer_response))
-                        
-                        # Só penaliza se houve repetição REAL (não confirmação ECO)
-                        if st.session_state.customer.state.repetitions > old_repetitions and not is_confirmation:
-                            st.session_state.evaluator.penalize_repetition()
-                        
+                        # Avalia a fala, gera a resposta do cliente e aplica a penalidade de repetição
+                        session.send(user_input)
                         st.rerun()
             
             with col2:
@@ -829,7 +427,7 @@ def main_interface():
             with col3:
                 if st.button("🔄 Reset", use_container_width=True):
                     st.session_state.session_active = False
-                    st.session_state.messages = []
+                    end_session()
                     st.rerun()
             
             st.markdown('</div>', unsafe_allow_html=True)
@@ -838,7 +436,7 @@ def main_interface():
 # Métricas em tempo real
             st.markdown("### 📊 Métricas")
             
-            total, max_score = st.session_state.evaluator.get_total_score()
+            total, max_score = session.evaluator.get_total_score()
             percentage = (total / 81 * 100)
             
             # Display de pontuação
@@ -864,7 +462,7 @@ def main_interface():
             
             # Estado do cliente
             st.markdown("### 😊 Cliente")
-            patience = st.session_state.customer.state.patience
+            patience = session.customer.state.patience
             
             if patience > 70:
                 st.success(f"Satisfeito ({patience}%)")
@@ -873,22 +471,23 @@ def main_interface():
             else:
                 st.error(f"Frustrado ({patience}%)")
             
-            if st.session_state.customer.state.repetitions > 0:
-                st.error(f"⚠️ {st.session_state.customer.state.repetitions} repetições detectadas!")
+            if session.customer.state.repetitions > 0:
+                st.error(f"⚠️ {session.customer.state.repetitions} repetições detectadas!")
             
             # Checklist de dados coletados
             st.markdown("### 📋 Checklist")
             
+            collected = session.customer.state.collected_data
             checklist_items = [
-                ("Nome", st.session_state.customer.state.collected_data.get('name', False)),
-                ("CPF", st.session_state.customer.state.collected_data.get('cpf', False)),
-                ("Telefone 1", st.session_state.customer.state.collected_data.get('phone1', False)),
-                ("Telefone 2", st.session_state.customer.state.collected_data.get('phone2', False)),
-                ("Placa", st.session_state.customer.state.collected_data.get('plate', False)),
-                ("Endereço", st.session_state.customer.state.collected_data.get('address', False)),
-                ("Problema", st.session_state.customer.state.collected_data.get('problem', False)),
-                ("LGPD", st.session_state.customer.state.collected_data.get('lgpd', False)),
-                ("LED/Xenon", st.session_state.customer.state.collected_data.get('damage_details', False))
+                ("Nome", collected.name),
+                ("CPF", collected.cpf),
+                ("Telefone 1", collected.phone1),
+                ("Telefone 2", collected.phone2),
+                ("Placa", collected.plate),
+                ("Endereço", collected.address),
+                ("Problema", collected.problem),
+                ("LGPD", collected.lgpd),
+                ("LED/Xenon", collected.damage_details)
             ]
             
             for item, collected in checklist_items:
@@ -898,9 +497,67 @@ def main_interface():
             # Debug (expandível)
             with st.expander("🔍 Debug"):
                 st.write("**Pontuação por Item:**")
-                for item in st.session_state.evaluator.get_detailed_report():
+                for item in session.evaluator.get_detailed_report():
                     st.write(f"{item['status']} Item {item['id']}: {item['score']:.1f}/{item['max']} pts")
 
+def post_session_jobs_pending(session_id: str) -> bool:
+    jobs = get_job_queue()
+    return any(job is not None and not job.done()
+               for job in (jobs.get(("salvar", session_id)), jobs.get(("gabarito", session_id))))
+
+def post_session_panel(session_id: str, total: float, report: list):
+    """Resultados das tarefas pós-sessão: consulta a cada segundo só enquanto alguma tarefa não terminou"""
+    if post_session_jobs_pending(session_id):
+        post_session_polling(session_id, total, report)
+    else:
+        render_post_session(session_id, total, report)
+
+@st.fragment(run_every=1.0)
+def post_session_polling(session_id: str, total: float, report: list):
+    """Só o fragmento é refeito; quando as tarefas terminam, um rerun da página troca pelo painel estático"""
+    render_post_session(session_id, total, report)
+    if not post_session_jobs_pending(session_id):
+        st.rerun()
+
+def render_post_session(session_id: str, total: float, report: list):
+    """Resultados das tarefas pós-sessão, preenchidos conforme terminam"""
+    jobs = get_job_queue()
+    saved = jobs.get(("salvar", session_id))
+    if saved is not None:
+        if saved.status == DONE:
+            st.session_state.saved_session_id = saved.result
+            st.caption("💾 Sessão salva no histórico")
+        elif saved.status == FAILED:
+            st.warning(f"Não foi possível salvar a sessão no histórico: {saved.error}")
+            if st.button("🔁 Tentar salvar novamente", key=f"retry_salvar_{session_id}"):
+                jobs.retry(("salvar", session_id))
+                st.rerun()
+        else:
+            st.caption("💾 Salvando a sessão no histórico...")
+    
+    # Segunda opinião: nota das ligações de referência do gabarito mais parecidas com esta sessão
+    second = jobs.get(("gabarito", session_id))
+    if second is None:
+        return
+    with st.expander("🔎 Segunda opinião (gabarito)"):
+        if second.status == FAILED:
+            st.warning(f"Segunda opinião indisponível: {second.error}")
+            if st.button("🔁 Tentar novamente", key=f"retry_gabarito_{session_id}"):
+                jobs.retry(("gabarito", session_id))
+                st.rerun()
+        elif second.status != DONE:
+            st.info("⏳ Comparando com as ligações de referência...")
+        else:
+            opinion = second.result
+            st.metric("Nota prevista pelas ligações de referência", f"{opinion['expected']:.0f}/81",
+                      delta=f"{opinion['expected'] - total:+.0f} em relação às regras")
+            st.dataframe(
+                [{"Item": item["id"], "Regras (%)": round(item["percentage"]),
+                  "Gabarito (%)": round(100 * opinion["items"].get(item["id"], 0))} for item in report],
+                use_container_width=True, hide_index=True,
+            )
+            st.caption("Referências mais próximas: " + ", ".join(f"#{ref} ({sim:.2f})" for ref, sim in opinion["neighbors"]))
+
 def results_screen():
     """Tela de resultados após finalizar"""
     st.markdown("""
@@ -910,8 +567,10 @@ def results_screen():
     </div>
     """, unsafe_allow_html=True)
     
+    session = current_session()
+    
     # Pontuação geral
-    total, max_score = st.session_state.evaluator.get_total_score()
+    total, max_score = session.evaluator.get_total_score()
     percentage = (total / 81 * 100)
     
     col1, col2, col3, col4 = st.columns(4)
@@ -936,7 +595,7 @@ def results_screen():
     # Análise detalhada por item do checklist
     st.markdown("### 📋 Análise Detalhada do Checklist")
     
-    report = st.session_state.evaluator.get_detailed_report()
+    report = session.evaluator.get_detailed_report()
     
     # Divide em duas colunas para melhor visualização
     col1, col2 = st.columns(2)
@@ -963,11 +622,18 @@ def results_screen():
             </div>
             """, unsafe_allow_html=True)
     
+    # Falas do atendente com os trechos que pontuaram destacados (spans do próprio RuleEngine)
+    with st.expander("🖍️ Evidências na conversa"):
+        evaluator = session.evaluator
+        for turn, message in enumerate(evaluator.messages_history):
+            marked = highlight(message, evaluator.engine.spans.for_turn(turn))
+            st.markdown(f'<div class="agent-message" style="text-align: left;">{marked}</div>', unsafe_allow_html=True)
+    
     # Feedback do cliente
     st.markdown("### 💬 Feedback do Cliente Virtual")
     
-    patience = st.session_state.customer.state.patience
-    repetitions = st.session_state.customer.state.repetitions
+    patience = session.customer.state.patience
+    repetitions = session.customer.state.repetitions
     
     if repetitions > 2:
         st.error(f"❌ Cliente ficou frustrado com {repetitions} repetições desnecessárias")
@@ -989,38 +655,50 @@ def results_screen():
             st.warning(f"**Melhorar Item {item['id']}:** {item['description']}")
             st.write(f"   → Você obteve {item['score']:.1f} de {item['max']} pontos possíveis")
     
+    # Dados do relatório (exportação e histórico)
+    import json
+    report_data = {
+        "usuario": st.session_state.username,
+        "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "pontuacao_total": total,
+        "pontuacao_maxima": 81,
+        "percentual": percentage,
+        "aprovado": percentage >= 80,
+        "duracao_segundos": int(time.time() - st.session_state.start_time) if st.session_state.start_time else 0,
+        "detalhamento": report,
+        "satisfacao_cliente": patience,
+        "repeticoes": repetitions,
+        "evidencias": session.evaluator.engine.export_spans()
+    }
+    
+    # Persistência e análises mais pesadas vão para a fila de tarefas: a nota das regras já está na tela.
+    # A chave da tarefa evita repetir o trabalho nos reruns do results_screen
+    jobs = get_job_queue()
+    if st.session_state.get("saved_session_id") is None:
+        jobs.submit(("salvar", session.id), get_session_store().save_session, report_data, session.log,
+                    name="salvar_sessao", priority=0)
+    reference = get_reference_scorer()
+    if reference is not None:
+        scorer, embed = reference
+        jobs.submit(("gabarito", session.id), scorer.predict, session_text(session.log), embed,
+                    name="segunda_opiniao", priority=5)
+    post_session_panel(session.id, total, report)
+    
     # Botões de ação
     col1, col2, col3 = st.columns(3)
     
     with col1:
         if st.button("🔄 Nova Simulação", type="primary", use_container_width=True):
             st.session_state.session_active = False
-            st.session_state.messages = []
-            st.session_state.customer = None
-            st.session_state.evaluator = None
+            end_session()
             st.session_state.start_time = None
+            st.session_state.saved_session_id = None
             st.rerun()
     
     with col2:
-        if st.button("📊 Ver Histórico", use_container_width=True):
-            st.info("Função de histórico em desenvolvimento")
+        show_history = st.button("📊 Ver Histórico", use_container_width=True)
     
     with col3:
-        # Preparar dados para download
-        import json
-        report_data = {
-            "usuario": st.session_state.username,
-            "data": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "pontuacao_total": total,
-            "pontuacao_maxima": 81,
-            "percentual": percentage,
-            "aprovado": percentage >= 80,
-            "duracao_segundos": int(time.time() - st.session_state.start_time) if st.session_state.start_time else 0,
-            "detalhamento": report,
-            "satisfacao_cliente": patience,
-            "repeticoes": repetitions
-        }
-        
         st.download_button(
             label="📥 Exportar Relatório",
             data=json.dumps(report_data, indent=2, ensure_ascii=False),
@@ -1028,10 +706,56 @@ def results_screen():
             mime="application/json",
             use_container_width=True
         )
+    
+    if show_history:
+        st.markdown("### 📊 Histórico de Sessões")
+        history = get_session_store().user_history(st.session_state.username)
+        if history:
+            st.dataframe(history, use_container_width=True, hide_index=True)
+        else:
+            st.info("Nenhuma sessão registrada ainda.")
+
+# ==================== INSTRUMENTAÇÃO ====================
+@st.cache_resource
+def start_metrics_endpoint():
+    """Endpoint /metrics (OpenMetrics) opcional, ativado por VOICE_COACH_METRICS_PORT"""
+    port = os.getenv("VOICE_COACH_METRICS_PORT")
+    return serve_metrics(TRACER, int(port)) if port else None
+
+def latency_panel():
+    """Painel de latências por etapa na barra lateral (opcional)"""
+    if not st.sidebar.checkbox("⏱️ Latências por etapa", key="show_latency_panel"):
+        return
+    rows = TRACER.summary()
+    if rows:
+        st.sidebar.dataframe(rows, hide_index=True, use_container_width=True)
+        st.sidebar.download_button("📥 OpenMetrics", TRACER.openmetrics(), file_name="metrics.txt",
+                                   mime="text/plain", use_container_width=True)
+    else:
+        st.sidebar.caption("Nenhuma etapa medida ainda.")
+
+def memory_panel():
+    """Memória estimada por sessão em andamento na barra lateral (opcional)"""
+    if not st.sidebar.checkbox("🧠 Memória por sessão", key="show_memory_panel"):
+        return
+    pool = get_session_pool()
+    rows = pool.memory_report()
+    if rows:
+        st.sidebar.dataframe(rows, hide_index=True, use_container_width=True)
+    st.sidebar.caption(f"{len(rows)} em memória ({sum(r['kb'] for r in rows):.0f} KB) · "
+                       f"{pool.on_disk()} ociosas em disco")
 
 # ==================== FUNÇÃO PRINCIPAL ====================
 def main():
     """Função principal do aplicativo"""
+    start_metrics_endpoint()
+    with span("streamlit.rerun"):
+        render()
+    latency_panel()
+    memory_panel()
+
+def render():
+    """Renderiza a tela correspondente ao estado da sessão"""
     init_session_state()
     
     # Verifica estado de login
@@ -1041,7 +765,7 @@ def main():
         # Verifica se há uma sessão ativa ou se deve mostrar resultados
         if st.session_state.session_active:
             main_interface()
-        elif len(st.session_state.messages) > 0 and st.session_state.evaluator:
+        elif current_session() is not None:
             results_screen()
         else:
             main_interface()
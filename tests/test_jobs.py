@@ -0,0 +1,16 @@
+from core.jobs import JobQueue, FAILED
+
+def test_falha_so_roda_de_novo_com_retry():
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("banco bloqueado")
+
+    jobs = JobQueue(workers=1)
+    job = jobs.submit("salvar", failing)
+    job.event.wait(5)
+    assert jobs.submit("salvar", failing) is job and job.status == FAILED
+    retried = jobs.retry("salvar")
+    retried.event.wait(5)
+    assert retried is not job and len(calls) == 2
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+from core.normalize import normalize_series, normalize_text
+
+@pytest.mark.parametrize("text, expected", [
+    ("ano 2016 15 cm", "ano 2016 15 cm"),
+    ("contagem 3 2 1", "contagem 3 2 1"),
+    ("A ordem é 280, 39, 52", "a ordem e 280 39 52"),
+    ("CPF 123.456.789-10", "cpf 12345678910"),
+    ("(54) 99113-0199", "54991130199"),
+    ("CEP 30130-000", "cep 30130000"),
+    ("um dois três", "123"),
+    ("nove nove 8 7 6", "99876"),
+])
+def test_digitos_unidos_so_em_formatos_conhecidos(text, expected):
+    assert normalize_text(text) == expected
+
+def test_serie_igual_ao_texto():
+    texts = pd.Series(["ano 2016 15 cm", "3 2 1", "CPF 123.456.789-10", "três dois um", None])
+    assert list(normalize_series(texts)) == [normalize_text(t or "") for t in texts]
@@ -0,0 +1,16 @@
+import threading
+from core import ratelimit
+
+def test_limiter_unico_no_primeiro_acesso_concorrente(monkeypatch):
+    monkeypatch.setattr(ratelimit, "_LIMITER", None)
+    barrier, got = threading.Barrier(16), []
+    def first_access():
+        barrier.wait()
+        got.append(ratelimit.limiter())
+    threads = [threading.Thread(target=first_access) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(l) for l in got}) == 1
+    assert got[0] is ratelimit.limiter()
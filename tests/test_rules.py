@@ -0,0 +1,36 @@
+import pytest
+from core.behavior import behavior_for
+from core.normalize import normalize_text
+from core.profiles import CustomerProfile
+from core.rules import RuleEngine, highlight, load_rules
+
+def score(text: str, fuzzy: bool = True) -> dict:
+    engine = RuleEngine(load_rules(fuzzy=fuzzy))
+    engine.evaluate_message(text)
+    return engine.scores
+
+@pytest.mark.parametrize("text", ["O carro estava perto da escola?", "Preciso controlar o prazo."])
+def test_saudacao_nao_casa_dentro_de_palavra(text):
+    assert score(text)[1] == 0
+    assert "saudacao" not in behavior_for(CustomerProfile()).detect(normalize_text(text))
+
+def test_saudacao_e_radicais_continuam_casando():
+    assert score("Olá, bom dia!")[1] > 0
+    assert "saudacao" in behavior_for(CustomerProfile()).detect(normalize_text("Olá, bom dia!"))
+    assert "confirmacao" in behavior_for(CustomerProfile()).detect(normalize_text("Estou confirmando os dados"))
+
+@pytest.mark.parametrize("text", ["A loja fica em Vitória?", "O senhor entende o procedimento?",
+                                  "Eu comento com o gerente.", "O problema foi repetido."])
+def test_aproximado_nao_casa_palavra_vizinha(text):
+    assert score(text) == score(text, fuzzy=False)
+
+def test_aproximado_recupera_erro_de_transcricao():
+    assert score("Cargless, meu nome é Ana.")[1] > score("Cargless, meu nome é Ana.", fuzzy=False)[1]
+
+def test_highlight_escapa_a_fala():
+    text = "<b>Bom dia</b>, Carglass & cia"
+    engine = RuleEngine(load_rules())
+    spans = engine.evaluate_message(text)
+    marked = highlight(text, spans)
+    assert "<b>" not in marked and "&lt;b&gt;" in marked and "&amp; cia" in marked
+    assert "<mark>" in marked
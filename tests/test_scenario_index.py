@@ -0,0 +1,7 @@
+from core.scenario_index import build_sampler
+from core.scenarios import pick_scenario
+
+def test_sem_cenarios_nao_cria_sampler():
+    sampler = build_sampler([])
+    assert sampler is None
+    assert pick_scenario([], sampler)["type"] == "Padrão"
@@ -0,0 +1,13 @@
+from core.storage import SessionStore
+
+def report(usuario: str, data: str) -> dict:
+    return {"usuario": usuario, "data": data, "pontuacao_total": 40, "pontuacao_maxima": 81, "percentual": 49.4,
+            "aprovado": False, "detalhamento": [{"id": 1, "score": 10, "max": 10}]}
+
+def test_periodo_inclui_o_dia_final_inteiro(tmp_path):
+    store = SessionStore(str(tmp_path / "coach.db"))
+    store.save_sessions([(report("ana", "2026-10-18 23:59:59"), []), (report("ana", "2026-10-19 14:30:00"), []),
+                         (report("ana", "2026-10-20 00:00:00"), [])])
+    assert store.cohort_summary("2026-10-18", "2026-10-19")[0]["sessoes"] == 2
+    assert store.item_pass_rates("2026-10-19", "2026-10-19")[0]["sessoes"] == 1
+    assert store.cohort_summary()[0]["sessoes"] == 3
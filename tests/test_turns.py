@@ -0,0 +1,16 @@
+import pandas as pd
+import pytest
+from core.turns import segment_turns, split_turns
+
+@pytest.mark.parametrize("texts", [pd.Series(["", None]), pd.Series([], dtype=object)])
+def test_sem_frases_devolve_listas_vazias(texts):
+    turns = segment_turns(texts)
+    assert turns.tolist() == [[]] * len(texts)
+    assert turns.index.equals(texts.index)
+
+def test_texto_vazio_no_meio():
+    turns = segment_turns(pd.Series(["Bom dia, com quem eu falo? Com Cláudia.", ""]))
+    assert len(turns.iloc[0]) == 2 and turns.iloc[1] == []
+
+def test_split_turns_vazio():
+    assert split_turns("") == []